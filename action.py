@@ -1,8 +1,10 @@
 from turtle import Turtle, mainloop
 from player import Player
+from lazy import Lazy
 
 class Action(Turtle):
-    def __init__(self):
+    def __init__(self, table=None):
+        self.table = table if table is not None else Player
         super().__init__()
         self.penup()
         self.hideturtle()
@@ -16,7 +18,7 @@ class Action(Turtle):
         self.color("black")
         self.write(f"Do: ", font=("Arial", 24, "normal"))
         self.forward(60)
-        self.color(Player.player_color[Player.current_player])
+        self.color(Player.player_color[self.table.current_player])
         if self.current_action == 0:
             # self.color("Red")
             self.write(f"Roll Dice", font=("Arial", 24, "normal"))
@@ -29,4 +31,4 @@ class Action(Turtle):
         self.write_action()
 
 
-action_writer = Action()
\ No newline at end of file
+action_writer = Lazy(Action)
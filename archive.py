@@ -0,0 +1,432 @@
+"""
+Compact archive of many games.
+
+A turn is stored as a 6-bit code, the only thing it adds to the game:
+
+    bits 0-2  die - 1
+    bits 3-4  piece moved (0-3)
+    bit  5    pass, no legal move for the die
+
+Who moved, where from and what was captured are left out, since they
+follow from the rules and the turns before. Four codes fill three bytes,
+so a turn costs 0.75 bytes on disk plus a share of its game's header.
+
+Games are written in blocks of up to ``BLOCK_GAMES``. A block holds the
+headers of its games followed by all their turns packed back to back:
+
+    block    u32 games, u32 turn bytes, headers, turns
+    header   varint zigzag(seed - previous seed), u16 seats (4 bits per
+             seat, an index into the file's seat names), u8 winner + 1
+             and first player << 4, varint turns
+
+Seeds are stored as the difference to the previous game of the block,
+so the consecutive seeds of a ``simulate`` run take one byte each. The
+index block at the end of the file lists every block's offset and first
+game id; the last 12 bytes give the index offset and a magic number.
+A block ends where the next one, or the index, begins.
+
+``ArchiveWriter`` buffers a block and writes it with one call;
+``ArchiveReader`` reads and decodes a block at a time with NumPy, or one
+game by id through the index.
+
+    python -m archive write games.dta --games 100000 --seats random,capture,first,furthest
+    python -m archive info games.dta
+"""
+
+import argparse
+import bisect
+import os
+import random
+import struct
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import engine
+from engine import NUM_PLAYERS
+
+MAGIC = b"DTAR"
+INDEX_MAGIC = b"DTIX"
+END_MAGIC = b"DTAE"
+VERSION = 1
+BLOCK_GAMES = 4096
+
+FILE_HEADER = struct.Struct("<4sHH")
+BLOCK_HEADER = struct.Struct("<II")
+INDEX_HEADER = struct.Struct("<4sI")
+INDEX_ENTRY = struct.Struct("<QQI")
+TRAILER = struct.Struct("<Q4s")
+
+PASS_BIT = 1 << 5
+CODE_BITS = 6
+CODES_PER_GROUP = 4
+GROUP_BYTES = 3
+
+Game = namedtuple("Game", "id seed seats winner first_player codes")
+
+
+def turn_code(die, piece):
+    """Code of a turn; ``piece`` None for a pass."""
+    if piece is None:
+        return die - 1 | PASS_BIT
+    return die - 1 | piece << 3
+
+
+def dice(codes):
+    return (codes & 7) + 1
+
+
+def pieces(codes):
+    return (codes >> 3) & 3
+
+
+def passes(codes):
+    return (codes & PASS_BIT) != 0
+
+
+def pack_codes(codes):
+    """Bytes of turn ``codes`` packed four to three bytes."""
+    codes = np.asarray(codes, dtype=np.uint32)
+    padding = -len(codes) % CODES_PER_GROUP
+    if padding:
+        codes = np.concatenate([codes, np.zeros(padding, np.uint32)])
+    groups = codes.reshape(-1, CODES_PER_GROUP)
+    values = groups[:, 0] | groups[:, 1] << 6 | groups[:, 2] << 12 | groups[:, 3] << 18
+    out = np.empty((len(values), GROUP_BYTES), np.uint8)
+    out[:, 0] = values
+    out[:, 1] = values >> 8
+    out[:, 2] = values >> 16
+    return out.tobytes()
+
+
+def unpack_codes(data, count=None):
+    """Turn codes (uint8) of packed ``data``, the first ``count`` of them."""
+    raw = np.frombuffer(data, np.uint8).reshape(-1, GROUP_BYTES)
+    values = (
+        raw[:, 0].astype(np.uint32)
+        | raw[:, 1].astype(np.uint32) << 8
+        | raw[:, 2].astype(np.uint32) << 16
+    )
+    codes = np.empty((len(values), CODES_PER_GROUP), np.uint8)
+    codes[:, 0] = values & 63
+    codes[:, 1] = values >> 6 & 63
+    codes[:, 2] = values >> 12 & 63
+    codes[:, 3] = values >> 18
+    codes = codes.ravel()
+    return codes if count is None else codes[:count]
+
+
+def packed_size(turns):
+    return -(-turns // CODES_PER_GROUP) * GROUP_BYTES
+
+
+def _varint(value, out):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _zigzag(value):
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def replay_codes(codes, first_player=0):
+    """Final ``GameState`` of a game played through the rules from its codes."""
+    state = engine.new_game(first_player)
+    for code in np.asarray(codes).tolist():
+        engine.apply_roll(state, (code & 7) + 1)
+        engine.apply_move(state, None if code & PASS_BIT else code >> 3 & 3)
+    return state
+
+
+class ArchiveWriter:
+    """Streams games into an archive file, one block per write."""
+
+    def __init__(self, path, seat_names=(), block_games=BLOCK_GAMES):
+        if len(seat_names) > 16:
+            raise ValueError("at most 16 seat names fit in 4 bits")
+        self.file = open(path, "wb")
+        self.seat_names = list(seat_names)
+        self.block_games = block_games
+        names = ",".join(self.seat_names).encode()
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, len(names)) + names)
+        self.index = []
+        self.games = 0
+        self.turns = 0
+        self._headers = bytearray()
+        self._codes = []
+        self._block_games = 0
+        self._previous_seed = 0
+
+    def add(self, seed, seats, winner, codes, first_player=0):
+        """Append one game; ``seats`` are indices into ``seat_names``."""
+        if not 0 <= seed < 1 << 64:
+            raise ValueError("seeds are unsigned 64-bit integers")
+        codes = np.asarray(codes, dtype=np.uint8)
+        headers = self._headers
+        _varint(_zigzag(seed - self._previous_seed), headers)
+        self._previous_seed = seed
+        packed = 0
+        for seat, name in enumerate(seats):
+            packed |= name << (4 * seat)
+        headers += packed.to_bytes(2, "little")
+        headers.append(winner + 1 | first_player << 4)
+        _varint(len(codes), headers)
+        self._codes.append(codes)
+        self._block_games += 1
+        self.games += 1
+        self.turns += len(codes)
+        if self._block_games >= self.block_games:
+            self._write_block()
+
+    def _write_block(self):
+        if not self._block_games:
+            return
+        turns = pack_codes(np.concatenate(self._codes)) if self._codes else b""
+        self.index.append((self.file.tell(), self.games - self._block_games, self._block_games))
+        self.file.write(
+            BLOCK_HEADER.pack(self._block_games, len(turns)) + self._headers + turns
+        )
+        self._headers = bytearray()
+        self._codes = []
+        self._block_games = 0
+        self._previous_seed = 0
+
+    def close(self):
+        if self.file.closed:
+            return
+        self._write_block()
+        offset = self.file.tell()
+        self.file.write(INDEX_HEADER.pack(INDEX_MAGIC, len(self.index)))
+        self.file.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in self.index))
+        self.file.write(TRAILER.pack(offset, END_MAGIC))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Block:
+    """Decoded block: per-game header columns and all turn codes."""
+
+    def __init__(self, first_game, seeds, seats, winners, first_players, lengths, codes):
+        self.first_game = first_game
+        self.seeds = seeds
+        self.seats = seats
+        self.winners = winners
+        self.first_players = first_players
+        self.lengths = lengths
+        self.codes = codes
+        self.starts = np.concatenate([[0], np.cumsum(lengths)])
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def game(self, index):
+        return Game(
+            self.first_game + index,
+            int(self.seeds[index]),
+            self.seats[index],
+            int(self.winners[index]),
+            int(self.first_players[index]),
+            self.codes[self.starts[index]:self.starts[index + 1]],
+        )
+
+
+class ArchiveReader:
+    """Reads an archive block by block, or single games through the index."""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        header = self.file.read(FILE_HEADER.size)
+        magic, version, names = FILE_HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} archive")
+        names = self.file.read(names).decode()
+        self.seat_names = names.split(",") if names else []
+        self.file.seek(-TRAILER.size, 2)
+        index_offset, end = TRAILER.unpack(self.file.read(TRAILER.size))
+        if end != END_MAGIC:
+            raise ValueError(f"{path} has no index; was the writer closed?")
+        self.file.seek(index_offset)
+        self._index_offset = index_offset
+        magic, blocks = INDEX_HEADER.unpack(self.file.read(INDEX_HEADER.size))
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{path} has a damaged index")
+        self.index = list(
+            INDEX_ENTRY.iter_unpack(self.file.read(blocks * INDEX_ENTRY.size))
+        )
+        self._firsts = [first for _, first, _ in self.index]
+
+    def __len__(self):
+        return sum(games for _, _, games in self.index)
+
+    def read_block(self, number):
+        """Decoded block ``number``, read with one call."""
+        offset, first_game, _ = self.index[number]
+        end = self.index[number + 1][0] if number + 1 < len(self.index) else self._index_offset
+        self.file.seek(offset)
+        data = self.file.read(end - offset)
+        return self._decode(first_game, data)
+
+    def _decode(self, first_game, data):
+        games, turn_bytes = BLOCK_HEADER.unpack_from(data)
+        # The headers fill the block up to its turns and are read one by one
+        header_end = len(data) - turn_bytes
+        seeds = np.empty(games, np.uint64)
+        seats = np.empty((games, NUM_PLAYERS), np.uint8)
+        flags = np.empty(games, np.uint8)
+        lengths = np.empty(games, np.int64)
+        offset = BLOCK_HEADER.size
+        seed = 0
+        for game in range(games):
+            delta, offset = _read_varint(data, offset)
+            seed += _unzigzag(delta)
+            seeds[game] = seed
+            packed = data[offset] | data[offset + 1] << 8
+            for seat in range(NUM_PLAYERS):
+                seats[game, seat] = packed >> (4 * seat) & 15
+            flags[game] = data[offset + 2]
+            lengths[game], offset = _read_varint(data, offset + 3)
+        if offset != header_end:
+            raise ValueError(f"block of game {first_game} is damaged")
+        codes = unpack_codes(data[offset:], int(lengths.sum()))
+        return Block(
+            first_game,
+            seeds,
+            seats,
+            (flags & 15).astype(np.int8) - 1,
+            flags >> 4,
+            lengths,
+            codes,
+        )
+
+    def blocks(self):
+        for number in range(len(self.index)):
+            yield self.read_block(number)
+
+    def __iter__(self):
+        for block in self.blocks():
+            for index in range(len(block)):
+                yield block.game(index)
+
+    def game(self, game_id):
+        """``Game`` number ``game_id``, decoding only its block."""
+        number = bisect.bisect_right(self._firsts, game_id) - 1
+        if number < 0 or game_id >= len(self):
+            raise IndexError(f"no game {game_id}")
+        block = self.read_block(number)
+        return block.game(game_id - block.first_game)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record_game(policies, rng, dice_rng, max_turns=20_000):
+    """Play like ``simulate.play_game`` and return ``(winner, codes)``."""
+    state = engine.new_game()
+    codes = bytearray()
+    while not state.is_over and len(codes) < max_turns:
+        die = engine.roll(state, dice_rng.randbelow)
+        moves = engine.legal_moves(state)
+        piece = policies[state.current_player](state, moves, rng) if moves else None
+        engine.apply_move(state, piece)
+        codes.append(turn_code(die, piece))
+    return state.winner, codes
+
+
+def write_run(path, seat_names, games, seed=0, block_games=BLOCK_GAMES):
+    """Play ``games`` games as ``simulate`` would and archive them.
+
+    Game seeds are ``seed << 32 | game`` and must fit the archive's 64
+    bits, so ``seed`` and ``games`` are limited to 32 bits. ValueError
+    for those and for seat names that are not ``simulate`` policies.
+    """
+    from rng import SeededDiceRNG
+    from simulate import POLICIES, game_seed
+
+    if not 0 <= seed < 1 << 32 or games > 1 << 32:
+        raise ValueError("archived runs take a 32-bit seed and at most 2**32 games")
+    for name in seat_names:
+        if name not in POLICIES:
+            raise ValueError(f"unknown policy {name!r}, expected one of {', '.join(POLICIES)}")
+    names = sorted(set(seat_names))
+    seats = [names.index(name) for name in seat_names]
+    policies = [POLICIES[name] for name in seat_names]
+    with ArchiveWriter(path, names, block_games) as writer:
+        for game in range(games):
+            winner, codes = record_game(
+                policies, random.Random(game_seed(seed, game)), SeededDiceRNG(seed, game)
+            )
+            writer.add(game_seed(seed, game), seats, winner, codes)
+        return writer.games, writer.turns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m archive", description="Write or inspect game archives."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    write = commands.add_parser("write", help="play games and archive them")
+    write.add_argument("path")
+    write.add_argument("--games", type=int, default=1000)
+    write.add_argument("--seats", default="random,random,random,random")
+    write.add_argument("--seed", type=int, default=0)
+    info = commands.add_parser("info", help="summarize an archive")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "write":
+        try:
+            games, turns = write_run(args.path, args.seats.split(","), args.games, args.seed)
+        except ValueError as error:
+            parser.error(str(error))
+        print(f"{games} games, {turns} turns")
+        return 0
+
+    with ArchiveReader(args.path) as reader:
+        start = time.perf_counter()
+        games = turns = 0
+        wins = [0] * NUM_PLAYERS
+        for block in reader.blocks():
+            games += len(block)
+            turns += len(block.codes)
+            for seat in range(NUM_PLAYERS):
+                wins[seat] += int((block.winners == seat).sum())
+        elapsed = time.perf_counter() - start
+    size = os.path.getsize(args.path)
+    print(f"games: {games}  turns: {turns}  seats: {','.join(reader.seat_names)}")
+    print(f"bytes per turn: {size / max(turns, 1):.3f}  decoded in {elapsed:.3f} s")
+    print("wins per seat: " + " ".join(str(count) for count in wins))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Pre-rendered board background.
+
+``Board.create_board`` draws the grid one turtle stroke at a time, which
+takes seconds. ``board_image`` paints the static board instead: ring
+squares, coloured start squares, home columns and bases, all taken from
+the compiled ``track.TRACK`` geometry. It is written once as a PNG that
+``screen.bgpic`` shows in a single blit.
+
+Images are cached on disk under ``CACHE_DIR`` with a name derived from
+the geometry and window size, and remembered in memory for the rest of
+the process, so later starts only load the file.
+"""
+
+import hashlib
+import os
+import struct
+import zlib
+from pathlib import Path
+
+from cache import CACHE_DIR
+from cells import BOARD_SIZE, BOX_SIZE, ORIGIN, cell_of
+from piece_path import (
+    active_pos_1,
+    active_pos_2,
+    active_pos_3,
+    active_pos_4,
+    inactive_pos_1,
+    inactive_pos_2,
+    inactive_pos_3,
+    inactive_pos_4,
+)
+from track import HOME_ENTRY, PATH_LEN, TRACK
+
+# Bump when the drawing changes so old cached files are not reused.
+VERSION = 1
+
+BACKGROUND = (238, 238, 238)
+SQUARE = (255, 255, 255)
+LINE = (0, 0, 0)
+CENTRE = (90, 90, 90)
+PLAYER_COLORS = ((0, 160, 0), (230, 200, 0), (30, 90, 210), (210, 40, 40))
+BASE_SIZE = 6
+
+INACTIVE = (inactive_pos_1, inactive_pos_2, inactive_pos_3, inactive_pos_4)
+ACTIVE = (active_pos_1, active_pos_2, active_pos_3, active_pos_4)
+
+_memory = {}
+
+
+def _tint(color):
+    return tuple((c + 2 * 255) // 3 for c in color)
+
+
+def cache_key(width, height, track=TRACK):
+    """Hex digest of everything the picture depends on."""
+    digest = hashlib.sha1()
+    digest.update(struct.pack("<3i", VERSION, width, height))
+    for table in (track.ring, track.starts, track.homes):
+        digest.update(table.tobytes())
+    digest.update(repr((INACTIVE, ACTIVE, PLAYER_COLORS)).encode())
+    return digest.hexdigest()[:16]
+
+
+class _Canvas:
+    """RGB pixel rows with canvas-style coordinates (origin at the centre)."""
+
+    def __init__(self, width, height, color):
+        self.width = width
+        self.height = height
+        self.rows = [bytearray(bytes(color) * width) for _ in range(height)]
+
+    def rect(self, left, top, right, bottom, color):
+        """Fill canvas-coordinate box [left, right) x (bottom, top]."""
+        x0 = max(0, left + self.width // 2)
+        x1 = min(self.width, right + self.width // 2)
+        y0 = max(0, self.height // 2 - top)
+        y1 = min(self.height, self.height // 2 - bottom)
+        if x0 >= x1:
+            return
+        span = bytes(color) * (x1 - x0)
+        for row in self.rows[y0:y1]:
+            row[3 * x0:3 * x1] = span
+
+    def cell(self, cell, color, outline=LINE):
+        row, col = divmod(cell, BOARD_SIZE)
+        left = ORIGIN[0] + col * BOX_SIZE
+        top = ORIGIN[1] - row * BOX_SIZE
+        self.rect(left, top, left + BOX_SIZE + 1, top - BOX_SIZE - 1, outline)
+        self.rect(left + 1, top - 1, left + BOX_SIZE, top - BOX_SIZE, color)
+
+    def png(self):
+        raw = b"".join(b"\x00" + bytes(row) for row in self.rows)
+
+        def chunk(kind, data):
+            return (
+                struct.pack(">I", len(data))
+                + kind
+                + data
+                + struct.pack(">I", zlib.crc32(kind + data))
+            )
+
+        header = struct.pack(">2I5B", self.width, self.height, 8, 2, 0, 0, 0)
+        return (
+            b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b"")
+        )
+
+
+def _base_corner(player):
+    """Top-left cell of the 6x6 corner holding ``player``'s base."""
+    row, col = divmod(cell_of(INACTIVE[player][0]), BOARD_SIZE)
+    far = BOARD_SIZE - BASE_SIZE
+    return (0 if row < BASE_SIZE else far), (0 if col < BASE_SIZE else far)
+
+
+def render_board(width, height, track=TRACK):
+    """PNG bytes of the static board for a ``width`` x ``height`` window."""
+    canvas = _Canvas(width, height, BACKGROUND)
+    for player, color in enumerate(PLAYER_COLORS):
+        top, left = _base_corner(player)
+        for row in range(top, top + BASE_SIZE):
+            for col in range(left, left + BASE_SIZE):
+                canvas.cell(row * BOARD_SIZE + col, _tint(color), _tint(color))
+        for pos in INACTIVE[player] + ACTIVE[player]:
+            canvas.cell(cell_of(pos), SQUARE)
+    middle = BOARD_SIZE // 2
+    for row in range(middle - 1, middle + 2):
+        for col in range(middle - 1, middle + 2):
+            canvas.cell(row * BOARD_SIZE + col, CENTRE, CENTRE)
+    for cell in track.ring:
+        canvas.cell(cell, SQUARE)
+    for player, color in enumerate(PLAYER_COLORS):
+        canvas.cell(track.cell(player, 0), color)
+        for pos in range(HOME_ENTRY + 1, PATH_LEN):
+            canvas.cell(track.cell(player, pos), color)
+    return canvas.png()
+
+
+def board_image(width, height, track=TRACK, cache_dir=None):
+    """Path of the cached board PNG for this geometry and window size."""
+    cache_dir = Path(cache_dir) if cache_dir is not None else CACHE_DIR
+    key = (cache_key(width, height, track), cache_dir)
+    path = _memory.get(key)
+    if path is not None and path.exists():
+        return path
+    path = cache_dir / f"board-{key[0]}.png"
+    if not path.exists():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(f".{os.getpid()}.tmp")
+        partial.write_bytes(render_board(width, height, track))
+        os.replace(partial, path)
+    _memory[key] = path
+    return path
@@ -0,0 +1,13 @@
+"""
+On-disk cache location shared by the modules that keep computed files.
+
+``CACHE_DIR`` is ``dice-turtle`` under ``$XDG_CACHE_HOME``, or under
+``~/.cache`` when that is not set.
+"""
+
+import os
+from pathlib import Path
+
+CACHE_DIR = Path(
+    os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+) / "dice-turtle"
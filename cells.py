@@ -0,0 +1,126 @@
+"""
+Board cells and cell occupancy.
+
+Path coordinates in ``piece_path`` were picked by hand from the drawn
+board and are off by a pixel here and there, e.g. ``[-279,-7]`` and
+``[-279,-8]`` are the same square. ``cell_of`` snaps a coordinate to the
+15x15 grid that ``Board`` draws and returns a canonical cell id, so pieces
+are compared by square instead of by float position.
+
+``Occupancy`` records which pieces stand on each cell as one bitmask per
+cell (bit ``i`` is piece ``i``), so the pieces on a square are found with
+one dictionary lookup however many players are in the game.
+"""
+
+BOARD_SIZE = 15
+BOX_SIZE = 41
+ORIGIN = (-300, 300)
+NO_CELL = -1
+
+
+def cell_of(coord):
+    """Canonical id (``row * 15 + col``) of the grid square containing ``coord``."""
+    x, y = coord
+    col = int((x - ORIGIN[0]) // BOX_SIZE)
+    row = int((ORIGIN[1] - y) // BOX_SIZE)
+    if not (0 <= col < BOARD_SIZE and 0 <= row < BOARD_SIZE):
+        raise ValueError(f"{coord} is outside the board")
+    return row * BOARD_SIZE + col
+
+
+def cell_position(cell):
+    """Pixel centre of ``cell``, the inverse of ``cell_of``."""
+    row, col = divmod(cell, BOARD_SIZE)
+    return (
+        ORIGIN[0] + col * BOX_SIZE + BOX_SIZE // 2,
+        ORIGIN[1] - row * BOX_SIZE - BOX_SIZE // 2,
+    )
+
+
+CENTRE = cell_of((8, -8))
+
+
+def track_cell(coord):
+    """Like ``cell_of``, but NO_CELL for the centre where nothing is captured."""
+    cell = cell_of(coord)
+    return NO_CELL if cell == CENTRE else cell
+
+
+def build_cell_table(paths, path_len):
+    """Cell id for every (player, progress) on the track.
+
+    Progress ``path_len`` and the centre square map to ``NO_CELL``, since
+    pieces there can never be captured.
+    """
+    table = []
+    for path in paths:
+        row = []
+        for pos in range(path_len + 1):
+            on_path = pos < min(path_len, len(path))
+            row.append(track_cell(path[pos]) if on_path else NO_CELL)
+        table.append(tuple(row))
+    return tuple(table)
+
+
+def player_mask(player, pieces_per_player):
+    """Bits of all pieces owned by ``player``."""
+    return ((1 << pieces_per_player) - 1) << (player * pieces_per_player)
+
+
+class Occupancy:
+    """Pieces per cell, kept up to date one move at a time."""
+
+    __slots__ = ("cells",)
+
+    def __init__(self, cells=None):
+        self.cells = {} if cells is None else cells
+
+    def copy(self):
+        return Occupancy(self.cells.copy())
+
+    def __eq__(self, other):
+        return isinstance(other, Occupancy) and self.cells == other.cells
+
+    def __repr__(self):
+        return f"Occupancy({self.cells})"
+
+    def at(self, cell):
+        """Bitmask of the pieces on ``cell``."""
+        return self.cells.get(cell, 0)
+
+    def add(self, piece, cell):
+        if cell != NO_CELL:
+            self.cells[cell] = self.cells.get(cell, 0) | (1 << piece)
+
+    def remove(self, piece, cell):
+        if cell != NO_CELL:
+            mask = self.cells[cell] & ~(1 << piece)
+            if mask:
+                self.cells[cell] = mask
+            else:
+                del self.cells[cell]
+
+    def move(self, piece, old_cell, new_cell):
+        if old_cell != new_cell:
+            self.remove(piece, old_cell)
+            self.add(piece, new_cell)
+
+    def capture(self, cell, keep_mask):
+        """Clear every piece on ``cell`` outside ``keep_mask``; return their bits."""
+        mask = self.cells.get(cell, 0)
+        captured = mask & ~keep_mask
+        if captured:
+            self.cells[cell] = mask & keep_mask
+            if not self.cells[cell]:
+                del self.cells[cell]
+        return captured
+
+
+def pieces_in(mask):
+    """Piece indices set in ``mask``, lowest first."""
+    pieces = []
+    while mask:
+        low = mask & -mask
+        pieces.append(low.bit_length() - 1)
+        mask ^= low
+    return pieces
@@ -0,0 +1,285 @@
+"""
+Client side of the networked game.
+
+``GameClient`` talks to ``server.GameServer`` over asyncio streams and
+keeps a mirror ``GameState`` that it updates from the server's
+``SNAPSHOT``, ``ROLLED`` and ``MOVED`` messages, so bots and views can
+read the position without asking the server.
+
+``watch`` follows a table as a spectator instead, from a snapshot and
+``TURN`` deltas.
+
+``TurtleAdapter`` shows the game on the turtles of a game built with
+``game.create_game(table=...)``: space sends a roll and clicking a piece
+sends a move, instead of changing the local state directly. ``main``
+opens a window and plays one seat, or watches with ``--watch``:
+
+    python -m client --port 8765
+    python -m client --port 8765 --watch 12
+"""
+
+import argparse
+import asyncio
+import queue
+import sys
+import threading
+
+import engine
+import statecode
+from cells import NO_CELL, track_cell
+from engine import BASE, PATH_LEN, PIECES_PER_PLAYER, START
+from protocol import (
+    ANY_GAME,
+    PASS,
+    ROLL_FRAME,
+    Error,
+    Join,
+    Move,
+    Moved,
+    Rolled,
+    Seated,
+    Snapshot,
+    Turn,
+    Watch,
+    captured_pieces,
+    decode,
+    encode,
+)
+from server import DEFAULT_HOST, DEFAULT_PORT
+
+POLL_MS = 20
+
+
+def follow(state, message):
+    """``state`` after the server message; a new state for a ``SNAPSHOT``."""
+    kind = type(message)
+    if kind is Rolled:
+        engine.apply_roll(state, message.die)
+    elif kind is Moved:
+        engine.apply_move(state, None if message.piece == PASS else message.piece)
+    elif kind is Turn:
+        engine.apply_roll(state, message.die)
+        engine.apply_move(state, None if message.piece == PASS else message.piece)
+    elif kind is Snapshot:
+        state = statecode.decode(message.code)
+    return state
+
+
+class ProtocolError(Exception):
+    """The server answered a command with an ``ERROR`` message."""
+
+    def __init__(self, code):
+        super().__init__(f"server error {code}")
+        self.code = code
+
+
+class GameClient:
+    """One connection to the game server and the game it is seated at."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.state = engine.new_game()
+        self.game = None
+        self.seat = -1
+
+    @classmethod
+    async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    @property
+    def my_turn(self):
+        state = self.state
+        return state.current_player == self.seat and not state.is_over
+
+    def roll(self):
+        self.writer.write(ROLL_FRAME)
+
+    def move(self, piece):
+        self.writer.write(encode(Move(piece)))
+
+    async def receive(self):
+        """Next message from the server, applied to ``state``."""
+        reader = self.reader
+        size = (await reader.readexactly(1))[0]
+        message = decode(await reader.readexactly(size))
+        self.apply(message)
+        return message
+
+    def apply(self, message):
+        self.state = follow(self.state, message)
+        if type(message) is Seated:
+            self.game = message.game
+            self.seat = message.seat
+
+    async def join(self, game=ANY_GAME):
+        """Take a seat and return it; ProtocolError if the server refuses."""
+        self.writer.write(encode(Join(game)))
+        while True:
+            message = await self.receive()
+            if type(message) is Seated:
+                return message.seat
+            if type(message) is Error:
+                raise ProtocolError(message.code)
+
+    def watch(self, game):
+        """Follow table ``game``; ``receive`` then yields its snapshot and turns."""
+        self.writer.write(encode(Watch(game)))
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class TurtleAdapter:
+    """Draws a remote game on the turtles of a local ``game.Game``.
+
+    It follows the messages with a state of its own, since the client's
+    mirror is updated on the network thread.
+    """
+
+    def __init__(self, game, client):
+        self.game = game
+        self.client = client
+        self.state = engine.new_game()
+
+    def show(self, message):
+        self.state = follow(self.state, message)
+        game = self.game
+        table = game.table
+        kind = type(message)
+        if kind is Rolled or kind is Turn:
+            table.current_value = message.die
+            game.dice.shape(f"./resources/dice_{message.die}.gif")
+            game.action.update_action(1)
+        if kind is Moved or kind is Turn:
+            if message.piece != PASS:
+                index = message.player * PIECES_PER_PLAYER + message.piece
+                self.place(index, message.end)
+            for index in captured_pieces(message.captured):
+                self.place(index, BASE)
+            self.show_turn()
+        elif kind is Snapshot:
+            for index, pos in enumerate(self.state.progress):
+                self.place(index, pos)
+            self.show_turn()
+
+    def show_turn(self):
+        game = self.game
+        game.player.show_player(self.state.current_player)
+        game.action.update_action(0)
+
+    def place(self, index, pos):
+        """Put the turtle of global piece ``index`` at progress ``pos``."""
+        piece = self.game.pieces[index // PIECES_PER_PLAYER][index % PIECES_PER_PLAYER]
+        if pos == BASE:
+            piece.current_pos = START
+            piece.set_inactive()
+        elif pos == START:
+            piece.current_pos = START
+            piece.is_active = True
+            piece.set_cell(NO_CELL)
+            piece.goto(piece.active_pos)
+        else:
+            piece.current_pos = pos
+            piece.is_active = True
+            piece.is_finished = pos == PATH_LEN
+            piece.goto(piece.path[pos])
+            piece.set_cell(track_cell(piece.path[pos]))
+
+    def bind(self, screen, send):
+        """Route space and clicks on the client's own pieces to the server through ``send``.
+
+        The seat is only known once the join is answered, so each click
+        checks it when it happens.
+        """
+        client = self.client
+        screen.onkeypress(lambda: send(client.roll), " ")
+
+        def click(player, slot):
+            if player == client.seat:
+                send(client.move, slot)
+
+        for player, pieces in self.game.pieces.items():
+            for slot, piece in enumerate(pieces):
+                piece.onclick(lambda x, y, player=player, slot=slot: click(player, slot))
+
+
+async def _pump(client, game_id, watch, inbox):
+    if watch:
+        client.watch(game_id)
+        inbox.put("watching")
+    else:
+        inbox.put(f"seat {await client.join(game_id)}")
+    while True:
+        try:
+            inbox.put(await client.receive())
+        except (asyncio.IncompleteReadError, ConnectionError):
+            inbox.put(None)
+            return
+
+
+def main(argv=None):
+    import turtle
+
+    from board_image import board_image
+    from game import create_game
+    from table import Table
+
+    parser = argparse.ArgumentParser(
+        prog="python -m client", description="Play a networked Dice-Turtle game."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--game", type=int, default=ANY_GAME)
+    parser.add_argument("--watch", type=int, metavar="GAME", default=None)
+    args = parser.parse_args(argv)
+    watch = args.watch is not None
+    game_id = args.watch if watch else args.game
+
+    # The network runs on its own loop thread; the turtles only ever
+    # change on the Tk thread, from messages polled off ``inbox``.
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    client = asyncio.run_coroutine_threadsafe(
+        GameClient.connect(args.host, args.port), loop
+    ).result()
+    inbox = queue.SimpleQueue()
+    asyncio.run_coroutine_threadsafe(_pump(client, game_id, watch, inbox), loop)
+
+    screen = turtle.Screen()
+    screen.setup(width=750, height=750)
+    screen.listen()
+    screen.bgpic(str(board_image(750, 750)))
+    for name in ("1", "2", "3", "4", "5", "6", "blank"):
+        screen.addshape(f"./resources/dice_{name}.gif")
+    screen.tracer(0)
+    adapter = TurtleAdapter(create_game(table=Table()), client)
+    if not watch:
+        adapter.bind(screen, loop.call_soon_threadsafe)
+    screen.title(f"Dice - {inbox.get()}")
+
+    def poll():
+        while True:
+            try:
+                message = inbox.get_nowait()
+            except queue.Empty:
+                break
+            if message is None:
+                screen.title("Dice - disconnected")
+                return
+            adapter.show(message)
+        screen.update()
+        screen.ontimer(poll, POLL_MS)
+
+    poll()
+    turtle.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
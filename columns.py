@@ -0,0 +1,440 @@
+"""
+Column store and queries over game archives.
+
+An ``archive`` file keeps only the die and the piece of each turn, which
+is as small as it gets but has to be replayed before anything else about
+a turn is known. ``build`` replays an archive once through the engine and
+writes ``<archive>.cols``, one byte per turn per column:
+
+    player    seat that took the turn
+    die       value rolled
+    piece     piece moved (0-3), -1 for a pass
+    before    progress of the piece before the move, BASE for a pass
+    after     progress of the piece after the move, BASE for a pass
+    captures  number of pieces sent back to base by the move
+    victim    furthest progress among the captured pieces, BASE if none
+
+followed by where each game starts, each game's winner and a zone map:
+the minimum and maximum of every column over each chunk of
+``CHUNK_TURNS`` turns. Sections are 64-byte aligned:
+
+    header    magic "DTCL", u16 version, u16 columns, u32 chunk turns,
+              u64 turns, u64 games
+    columns   int8 per turn, in ``COLUMNS`` order
+    starts    int64 per game + 1: first turn of each game
+    winners   int8 per game
+    zones     int8 minimum per column per chunk, then the maxima
+
+``ColumnStore`` maps the file and exposes every section as a read-only
+NumPy view, so opening a store of any size costs nothing and only the
+pages a query touches are read. ``Query`` filters turns with
+``where`` and aggregates what matches; the zone map lets it pass over a
+chunk that cannot match without reading it, and take a chunk whole when
+every turn in it matches. Captures within one step of the home column:
+
+    store.query().where("victim", ">=", HOME_ENTRY - 1).games()
+
+    python -m columns build games.dta
+    python -m columns query games.dta.cols --where "victim>=49" --games
+"""
+
+import argparse
+import operator
+import os
+import re
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import engine
+from archive import PASS_BIT, ArchiveReader
+from engine import BASE, PIECES_PER_PLAYER
+
+MAGIC = b"DTCL"
+VERSION = 1
+CHUNK_TURNS = 1 << 16
+ALIGN = 64
+HEADER = struct.Struct("<4sHHIQQ")
+
+COLUMNS = ("player", "die", "piece", "before", "after", "captures", "victim")
+PLAYER, DIE, PIECE, BEFORE, AFTER, CAPTURES, VICTIM = range(len(COLUMNS))
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+AGGREGATES = ("count", "sum", "min", "max", "mean")
+
+def column_path(archive_path):
+    return f"{archive_path}.cols"
+
+
+def _aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def _layout(turns, games, chunk_turns):
+    """Offsets of the sections of a column file and its total size."""
+    offset = _aligned(HEADER.size)
+    columns = []
+    for _ in COLUMNS:
+        columns.append(offset)
+        offset = _aligned(offset + turns)
+    starts = offset
+    winners = _aligned(starts + 8 * (games + 1))
+    zones = _aligned(winners + games)
+    chunks = -(-turns // chunk_turns)
+    return columns, starts, winners, zones, zones + 2 * len(COLUMNS) * chunks
+
+
+def block_columns(archive_path, number):
+    """Replay block ``number`` of an archive into per-turn columns.
+
+    Returns ``(columns, lengths, winners)``: an int8 array of shape
+    ``(len(COLUMNS), turns)`` and the block's game lengths and winners.
+    """
+    with ArchiveReader(archive_path) as reader:
+        block = reader.read_block(number)
+    rows = bytearray()
+    codes = block.codes.tolist()
+    starts = block.starts.tolist()
+    for game in range(len(block)):
+        state = engine.new_game(int(block.first_players[game]))
+        progress = state.progress
+        for code in codes[starts[game]:starts[game + 1]]:
+            player = state.current_player
+            die = (code & 7) + 1
+            engine.apply_roll(state, die)
+            if code & PASS_BIT:
+                engine.apply_move(state, None)
+                rows += bytes((player, die, 255, BASE & 255, BASE & 255, 0, BASE & 255))
+                continue
+            piece = code >> 3 & 3
+            index = player * PIECES_PER_PLAYER + piece
+            before = progress[index]
+            # Captured pieces are sent to BASE, so read where they stood first
+            standing = progress[:]
+            captured = engine.apply_move(state, piece)
+            after = progress[index]
+            victim = max((standing[other] for other in captured), default=BASE)
+            rows += bytes(
+                (player, die, piece, before & 255, after & 255, len(captured), victim & 255)
+            )
+    columns = np.frombuffer(rows, np.int8).reshape(-1, len(COLUMNS)).T
+    return columns, block.lengths, block.winners
+
+
+def build(archive_path, path=None, workers=1, chunk_turns=CHUNK_TURNS):
+    """Write the column file of an archive; return ``(games, turns)``.
+
+    Blocks are replayed in ``workers`` processes and written in order.
+    """
+    path = path or column_path(archive_path)
+    with ArchiveReader(archive_path) as reader:
+        blocks = len(reader.index)
+        games = len(reader)
+        turns = sum(int(block.lengths.sum()) for block in reader.blocks())
+    columns, starts, winners, zones, size = _layout(turns, games, chunk_turns)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(COLUMNS), chunk_turns, turns, games))
+        f.truncate(size)
+    data = np.memmap(path, np.uint8, "r+")
+    views = [data[offset:offset + turns].view(np.int8) for offset in columns]
+    game_starts = data[starts:starts + 8 * (games + 1)].view("<i8")
+    game_winners = data[winners:winners + games].view(np.int8)
+    game_starts[0] = 0
+    turn = game = 0
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(block_columns, [archive_path] * blocks, range(blocks))
+    else:
+        pool = None
+        results = (block_columns(archive_path, number) for number in range(blocks))
+    try:
+        for block, lengths, block_winners in results:
+            for view, column in zip(views, block):
+                view[turn:turn + block.shape[1]] = column
+            turn += block.shape[1]
+            game_starts[game + 1:game + 1 + len(lengths)] = np.cumsum(lengths) + (
+                game_starts[game]
+            )
+            game_winners[game:game + len(lengths)] = block_winners
+            game += len(lengths)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    # Zone map: minimum and maximum of every column over each chunk
+    chunks = np.arange(0, turns, chunk_turns)
+    zone = data[zones:size].view(np.int8).reshape(2, len(COLUMNS), len(chunks))
+    if turns:
+        for number, view in enumerate(views):
+            zone[0, number] = np.minimum.reduceat(view, chunks)
+            zone[1, number] = np.maximum.reduceat(view, chunks)
+    data.flush()
+    del data, views, zone
+    return games, turns
+
+
+class ColumnStore:
+    """A column file mapped into memory, every section a NumPy view."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{path} is not a column file")
+        magic, version, count, chunk_turns, turns, games = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or count != len(COLUMNS):
+            raise ValueError(f"{path} is not a version {VERSION} column file")
+        columns, starts, winners, zones, size = _layout(turns, games, chunk_turns)
+        if os.path.getsize(path) < size:
+            raise ValueError(f"{path} is cut short")
+        data = np.memmap(path, np.uint8, "r")
+        self.path = path
+        self.turns = turns
+        self.games = games
+        self.chunk_turns = chunk_turns
+        self.columns = {
+            name: data[offset:offset + turns].view(np.int8)
+            for name, offset in zip(COLUMNS, columns)
+        }
+        self.starts = data[starts:starts + 8 * (games + 1)].view("<i8")
+        self.winners = data[winners:winners + games].view(np.int8)
+        chunks = -(-turns // chunk_turns)
+        zone = data[zones:size].view(np.int8).reshape(2, len(COLUMNS), chunks)
+        self.minima = dict(zip(COLUMNS, zone[0]))
+        self.maxima = dict(zip(COLUMNS, zone[1]))
+
+    def __len__(self):
+        return self.turns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def chunks(self):
+        return len(self.minima[COLUMNS[0]])
+
+    def game_of(self, turns):
+        """Game id of each turn index in ``turns``."""
+        return np.searchsorted(self.starts, turns, side="right") - 1
+
+    def game(self, game_id):
+        """Every column of one game, as views."""
+        if not 0 <= game_id < self.games:
+            raise IndexError(f"no game {game_id}")
+        start, stop = self.starts[game_id], self.starts[game_id + 1]
+        return {name: column[start:stop] for name, column in self.columns.items()}
+
+    def query(self):
+        return Query(self)
+
+
+class Query:
+    """Turns of a ``ColumnStore`` matching every ``where`` condition.
+
+    A query is immutable: ``where`` returns a new one, so a base query
+    can be narrowed in several directions.
+    """
+
+    def __init__(self, store, conditions=()):
+        self.store = store
+        self.conditions = tuple(conditions)
+
+    def where(self, column, op, value):
+        if column not in COLUMNS:
+            raise ValueError(f"unknown column {column!r}; choose from {', '.join(COLUMNS)}")
+        if op not in OPERATORS:
+            raise ValueError(f"unknown operator {op!r}")
+        if not -128 <= value <= 127:
+            raise ValueError("columns hold values between -128 and 127")
+        return Query(self.store, self.conditions + ((column, op, value),))
+
+    def _zones(self):
+        """Per chunk: whether it may hold a match, and whether every turn matches."""
+        store = self.store
+        may = np.ones(store.chunks, bool)
+        every = np.ones(store.chunks, bool)
+        for column, op, value in self.conditions:
+            low = store.minima[column].astype(np.int16)
+            high = store.maxima[column].astype(np.int16)
+            if op == "==":
+                may &= (low <= value) & (value <= high)
+                every &= (low == value) & (high == value)
+            elif op == "!=":
+                may &= (low != value) | (high != value)
+                every &= (value < low) | (high < value)
+            elif op in ("<", "<="):
+                compare = OPERATORS[op]
+                may &= compare(low, value)
+                every &= compare(high, value)
+            else:
+                compare = OPERATORS[op]
+                may &= compare(high, value)
+                every &= compare(low, value)
+        return may, every
+
+    def chunks(self):
+        """``(start, stop, mask)`` of each chunk that may match.
+
+        ``mask`` is None when every turn of the chunk matches.
+        """
+        store = self.store
+        size = store.chunk_turns
+        may, every = self._zones()
+        for chunk in np.flatnonzero(may).tolist():
+            start = chunk * size
+            stop = min(start + size, store.turns)
+            if every[chunk]:
+                yield start, stop, None
+                continue
+            mask = None
+            for column, op, value in self.conditions:
+                hit = OPERATORS[op](store.columns[column][start:stop], value)
+                mask = hit if mask is None else mask & hit
+            yield start, stop, mask
+
+    def count(self):
+        total = 0
+        for start, stop, mask in self.chunks():
+            total += stop - start if mask is None else int(np.count_nonzero(mask))
+        return total
+
+    def turns(self):
+        """Indices of the matching turns."""
+        found = [
+            np.arange(start, stop) if mask is None else start + np.flatnonzero(mask)
+            for start, stop, mask in self.chunks()
+        ]
+        return np.concatenate(found) if found else np.empty(0, np.int64)
+
+    def games(self):
+        """Ids of the games with at least one matching turn."""
+        return np.unique(self.store.game_of(self.turns()))
+
+    def values(self, column):
+        """Values of ``column`` at the matching turns."""
+        data = self.store.columns[column]
+        found = [
+            data[start:stop] if mask is None else data[start:stop][mask]
+            for start, stop, mask in self.chunks()
+        ]
+        return np.concatenate(found) if found else np.empty(0, np.int8)
+
+    def aggregate(self, column, how="count"):
+        """``count``, ``sum``, ``min``, ``max`` or ``mean`` of ``column`` over the matches.
+
+        Works a chunk at a time, so it needs no more memory than one chunk.
+        ``min``, ``max`` and ``mean`` are None when nothing matches.
+        """
+        if how not in AGGREGATES:
+            raise ValueError(f"unknown aggregate {how!r}; choose from {', '.join(AGGREGATES)}")
+        if column not in COLUMNS:
+            raise ValueError(f"unknown column {column!r}")
+        data = self.store.columns[column]
+        count = total = 0
+        low = high = None
+        for start, stop, mask in self.chunks():
+            values = data[start:stop] if mask is None else data[start:stop][mask]
+            if not len(values):
+                continue
+            count += len(values)
+            total += int(values.sum(dtype=np.int64))
+            low = int(values.min()) if low is None else min(low, int(values.min()))
+            high = int(values.max()) if high is None else max(high, int(values.max()))
+        if how == "count":
+            return count
+        if how == "sum":
+            return total
+        if how == "min":
+            return low
+        if how == "max":
+            return high
+        return total / count if count else None
+
+    def histogram(self, column):
+        """``{value: matching turns}`` of ``column``."""
+        data = self.store.columns[column]
+        counts = np.zeros(256, np.int64)
+        for start, stop, mask in self.chunks():
+            values = data[start:stop] if mask is None else data[start:stop][mask]
+            counts += np.bincount(values.view(np.uint8), minlength=256)
+        return {
+            int(np.int8(np.uint8(value))): int(counts[value])
+            for value in np.flatnonzero(counts)
+        }
+
+
+CONDITION = re.compile(r"^\s*(\w+)\s*(==|!=|<=|>=|<|>)\s*(-?\d+)\s*$")
+
+
+def parse_condition(text):
+    """``(column, op, value)`` of a condition like ``"victim>=49"``."""
+    match = CONDITION.match(text)
+    if match is None:
+        raise ValueError(f"cannot read condition {text!r}")
+    column, op, value = match.groups()
+    return column, op, int(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m columns", description="Build and query column files of archives."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="replay an archive into a column file")
+    build_parser.add_argument("archive")
+    build_parser.add_argument("--output", default=None)
+    build_parser.add_argument("--workers", type=int, default=None)
+    query_parser = commands.add_parser("query", help="filter and aggregate column files")
+    query_parser.add_argument("paths", nargs="+")
+    query_parser.add_argument(
+        "--where", action="append", default=[], help='condition such as "after>=50"'
+    )
+    query_parser.add_argument("--games", action="store_true", help="list matching game ids")
+    query_parser.add_argument(
+        "--aggregate", metavar="HOW:COLUMN", default=None, help='e.g. "mean:die"'
+    )
+    query_parser.add_argument("--histogram", metavar="COLUMN", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        games, turns = build(args.archive, args.output, args.workers or os.cpu_count() or 1)
+        elapsed = time.perf_counter() - start
+        print(f"{games} games, {turns} turns in {elapsed:.1f} s")
+        return 0
+
+    start = time.perf_counter()
+    try:
+        conditions = [parse_condition(text) for text in args.where]
+        for path in args.paths:
+            store = ColumnStore(path)
+            query = store.query()
+            for condition in conditions:
+                query = query.where(*condition)
+            if args.games:
+                found = query.games()
+                print(f"{path}: {len(found)} games: " + " ".join(map(str, found[:50])))
+            elif args.aggregate:
+                how, _, column = args.aggregate.partition(":")
+                print(f"{path}: {how} {column} = {query.aggregate(column, how)}")
+            elif args.histogram:
+                print(f"{path}: {query.histogram(args.histogram)}")
+            else:
+                print(f"{path}: {query.count()} of {len(store)} turns")
+    except ValueError as error:
+        parser.error(str(error))
+    print(f"{time.perf_counter() - start:.3f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
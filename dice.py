@@ -1,13 +1,17 @@
 from turtle import Turtle, mainloop
 from random import randint
 import secrets
+from engine import ROLL_FACES
 
 class Dice(Turtle):
     prev_value = 0
     current_value = 0
     consecutive_six = 0
     allow_rolling = True
-    def __init__(self):
+    # Source of randbelow(); secrets is used when no generator from rng.py is set
+    rng = None
+    def __init__(self, table=None):
+        self.table = table if table is not None else Dice
         super().__init__()
         self.penup()
         self.hideturtle()
@@ -15,24 +19,21 @@ class Dice(Turtle):
         self.showturtle()
         self.shape(f"./resources/dice_blank.gif")
     def roll(self):
+        table = self.table
         # random_dice = randint(1,6)
-        random_dice = secrets.randbelow(6) + 1
+        randbelow = table.rng.randbelow if table.rng is not None else secrets.randbelow
+        # A third six in a row is re-rolled until it is not a six, which
+        # leaves 1-5 equally likely, so draw from those directly.
+        random_dice = randbelow(ROLL_FACES[table.consecutive_six]) + 1
         # debug
         # random_dice = 6
         if random_dice == 6:
-            Dice.consecutive_six += 1
+            table.consecutive_six += 1
         else:
-            Dice.consecutive_six = 0
-        if Dice.consecutive_six == 3:
-            Dice.consecutive_six -= 1
-            self.roll()
-            return
-            # debug
-            # random_dice = 5
-            # Dice.consecutive_six = 0
-        Dice.prev_value = Dice.current_value
-        Dice.current_value = random_dice
-        self.shape(f"./resources/dice_{self.current_value}.gif")
+            table.consecutive_six = 0
+        table.prev_value = table.current_value
+        table.current_value = random_dice
+        self.shape(f"./resources/dice_{table.current_value}.gif")
 
 
 if __name__ == "__main__":
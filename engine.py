@@ -0,0 +1,248 @@
+"""
+Headless rules engine for Dice-Turtle.
+
+The rules that ``Piece.move``, ``check_overlap`` and ``Dice.roll`` apply to
+turtles live here as plain functions over a ``GameState``, so games can be
+played without a Tk window. The turtle front end only has to render the
+state this module produces. Captures look up the landing square in the
+state's ``Occupancy`` instead of comparing every piece. Board squares come
+from the compiled ``track.TRACK`` tables.
+
+Piece progress follows ``Piece.current_pos``:
+
+    BASE   (-2)  piece sits on its inactive spot (``is_active`` False)
+    START  (-1)  piece was activated by a six and waits on its active spot
+    0..55        index into the player's path
+    PATH_LEN     piece reached the centre (``is_finished`` True)
+"""
+
+import secrets
+from fractions import Fraction
+
+from cells import NO_CELL, Occupancy, pieces_in, player_mask
+from track import PATH_LEN, TRACK
+
+NUM_PLAYERS = 4
+PIECES_PER_PLAYER = 4
+NUM_PIECES = NUM_PLAYERS * PIECES_PER_PLAYER
+BASE = -2
+START = -1
+
+# Phases mirror the values shown by ``Action.update_action``.
+ROLL = 0
+MOVE = 1
+
+# ``Dice.roll`` re-rolls a third six until it gets something else, so after
+# two sixes the shown value is uniform over 1-5. ROLL_DISTRIBUTION[streak]
+# lists (value, probability) for each value of ``six_streak``; a roll is a
+# single draw below ROLL_FACES[streak].
+MAX_SIX_STREAK = 2
+ROLL_FACES = (6, 6, 5)
+ROLL_DISTRIBUTION = tuple(
+    tuple((value, Fraction(1, faces)) for value in range(1, faces + 1))
+    for faces in ROLL_FACES
+)
+
+# CELLS[player][progress] is the board square of a piece on the track,
+# NO_CELL at the centre where nothing can be captured.
+CELLS = TRACK.capture_cells()
+OWN_MASKS = tuple(
+    player_mask(player, PIECES_PER_PLAYER) for player in range(NUM_PLAYERS)
+)
+
+
+class GameState:
+    """Complete state of one game, free of any turtle objects."""
+
+    __slots__ = (
+        "progress",
+        "current_player",
+        "die",
+        "prev_die",
+        "six_streak",
+        "phase",
+        "winner",
+        "_occupancy",
+    )
+
+    def __init__(self, first_player=0):
+        self.progress = [BASE] * NUM_PIECES
+        self.current_player = first_player
+        self.die = 0
+        self.prev_die = 0
+        self.six_streak = 0
+        self.phase = ROLL
+        self.winner = -1
+        self._occupancy = None
+
+    def copy(self):
+        other = GameState.__new__(GameState)
+        other.progress = self.progress[:]
+        other.current_player = self.current_player
+        other.die = self.die
+        other.prev_die = self.prev_die
+        other.six_streak = self.six_streak
+        other.phase = self.phase
+        other.winner = self.winner
+        occupancy = self._occupancy
+        other._occupancy = None if occupancy is None else occupancy.copy()
+        return other
+
+    def __eq__(self, other):
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name)
+            for name in self.__slots__
+            if name != "_occupancy"
+        )
+
+    @property
+    def occupancy(self):
+        """``Occupancy`` of the track, built from ``progress`` on first use.
+
+        Moves keep it up to date. Code that writes ``progress`` directly
+        should go through ``place`` instead.
+        """
+        if self._occupancy is None:
+            occupancy = Occupancy()
+            for index, pos in enumerate(self.progress):
+                if 0 <= pos < PATH_LEN:
+                    occupancy.add(index, CELLS[index // PIECES_PER_PLAYER][pos])
+            self._occupancy = occupancy
+        return self._occupancy
+
+    def place(self, index, pos):
+        """Put piece ``index`` at progress ``pos`` without applying any rules."""
+        self.progress[index] = pos
+        self._occupancy = None
+
+    def __repr__(self):
+        return (
+            f"GameState(player={self.current_player}, die={self.die}, "
+            f"phase={self.phase}, six_streak={self.six_streak}, "
+            f"winner={self.winner}, progress={self.progress})"
+        )
+
+    @property
+    def is_over(self):
+        return self.winner != -1
+
+    def player_progress(self, player):
+        first = player * PIECES_PER_PLAYER
+        return self.progress[first:first + PIECES_PER_PLAYER]
+
+    def is_active(self, index):
+        """Same meaning as ``Piece.is_active`` for the piece at ``index``."""
+        return self.progress[index] != BASE
+
+    def is_finished(self, index):
+        return self.progress[index] == PATH_LEN
+
+    def available(self, player):
+        """Unfinished pieces, as in ``Piece.piece_status[player]["available"]``."""
+        return sum(1 for pos in self.player_progress(player) if pos != PATH_LEN)
+
+    def active(self, player):
+        """Pieces out of base that have not finished yet."""
+        return sum(
+            1 for pos in self.player_progress(player) if BASE < pos < PATH_LEN
+        )
+
+
+def new_game(first_player=0):
+    return GameState(first_player)
+
+
+def apply_roll(state, value):
+    """Record a die roll for the player to move.
+
+    A third six in a row is never shown by ``Dice.roll``, which re-rolls
+    instead, so it is rejected here.
+    """
+    if state.is_over:
+        raise ValueError("the game is already over")
+    if state.phase != ROLL:
+        raise ValueError("a move is pending, the die cannot be rolled")
+    if not 1 <= value <= 6:
+        raise ValueError(f"die value must be between 1 and 6, got {value}")
+    if value == 6:
+        if state.six_streak == MAX_SIX_STREAK:
+            raise ValueError("a third consecutive six is re-rolled")
+        state.six_streak += 1
+    else:
+        state.six_streak = 0
+    state.prev_die = state.die
+    state.die = value
+    state.phase = MOVE
+
+
+def roll(state, randbelow=secrets.randbelow):
+    """Draw a die value from ``ROLL_DISTRIBUTION`` and apply it."""
+    value = randbelow(ROLL_FACES[state.six_streak]) + 1
+    apply_roll(state, value)
+    return value
+
+
+def can_move(state, piece):
+    """Whether the current player's ``piece`` (0-3) may use the rolled die."""
+    pos = state.progress[state.current_player * PIECES_PER_PLAYER + piece]
+    if pos == BASE:
+        return state.die == 6
+    return pos != PATH_LEN and pos + state.die <= PATH_LEN
+
+
+def legal_moves(state):
+    """Pieces (0-3) of the current player that can move; empty means pass."""
+    if state.phase != MOVE or state.is_over:
+        return []
+    return [piece for piece in range(PIECES_PER_PLAYER) if can_move(state, piece)]
+
+
+def _cell(index, pos):
+    if 0 <= pos < PATH_LEN:
+        return CELLS[index // PIECES_PER_PLAYER][pos]
+    return NO_CELL
+
+
+def apply_move(state, piece):
+    """Move the current player's ``piece`` (0-3) by the rolled die.
+
+    Pass ``None`` when ``legal_moves`` is empty. A six keeps the turn,
+    any other value hands it to the next player. Returns the global
+    indices of opponent pieces sent back to base.
+    """
+    if state.phase != MOVE:
+        raise ValueError("roll the die before moving")
+    player = state.current_player
+    captured = []
+    if piece is None:
+        if legal_moves(state):
+            raise ValueError("cannot pass while a legal move exists")
+    else:
+        if not 0 <= piece < PIECES_PER_PLAYER:
+            raise ValueError(f"piece must be between 0 and 3, got {piece}")
+        if not can_move(state, piece):
+            raise ValueError(f"piece {piece} cannot move {state.die}")
+        index = player * PIECES_PER_PLAYER + piece
+        pos = state.progress[index]
+        if pos == BASE:
+            state.progress[index] = START
+        else:
+            occupancy = state.occupancy
+            new_pos = pos + state.die
+            state.progress[index] = new_pos
+            cell = _cell(index, new_pos)
+            occupancy.move(index, _cell(index, pos), cell)
+            if cell != NO_CELL:
+                hit = occupancy.capture(cell, OWN_MASKS[player])
+                if hit:
+                    captured = pieces_in(hit)
+                    for other in captured:
+                        state.progress[other] = BASE
+            elif new_pos == PATH_LEN and state.available(player) == 0:
+                state.winner = player
+    state.phase = ROLL
+    if state.die != 6 and not state.is_over:
+        state.current_player = (player + 1) % NUM_PLAYERS
+    return captured
@@ -0,0 +1,444 @@
+"""
+Reinforcement learning environments in the style of Gymnasium.
+
+``DiceEnv`` wraps one ``engine`` game behind ``reset`` and ``step``; the
+agent picks which piece to move after each roll. ``VectorDiceEnv`` runs
+``num_envs`` games in NumPy arrays and steps them all in one call, with
+every array it touches allocated up front, including the observation,
+reward and mask buffers it hands back.
+
+Both play the same game by default: the policy acts for whichever seat
+is to move (self-play), one step is one turn, and the observation is
+seen from the seat to move:
+
+    0-15   progress of all 16 pieces, the seat's own four first and the
+           others in turn order (``engine`` encoding, BASE = -2)
+    16     die rolled for this turn
+    17     sixes rolled in a row, this roll included
+
+Actions are 0-3 for a piece and ``PASS`` (4), which is the only legal
+action when no piece can use the die. ``info["action_mask"]`` marks the
+legal actions. The reward is 1 for the step whose move wins the game and
+belongs to ``info["actor"]``, the seat that moved; a six keeps the turn,
+so the next observation may be for the same seat. ``DiceEnv`` can
+instead seat the agent at seat 0 against ``simulate`` policies, with a
+reward of 1 for a win and -1 for a loss.
+
+``VectorDiceEnv`` resets a finished game in the same step, so the
+observation returned for it is the first of the next game. Moves that the
+mask rules out are replaced by the lowest legal one.
+
+The spaces are small stand-ins for ``gymnasium.spaces`` with the same
+attributes, so Gymnasium is not needed.
+"""
+
+import random
+
+import numpy as np
+
+import engine
+from batch import CELL_STRIDE, CELL_TABLE, OWNER
+from cells import NO_CELL
+from engine import BASE, NUM_PIECES, NUM_PLAYERS, PATH_LEN, PIECES_PER_PLAYER, START
+
+PASS = PIECES_PER_PLAYER
+ACTIONS = PIECES_PER_PLAYER + 1
+OBS_SIZE = NUM_PIECES + 2
+DIE = NUM_PIECES
+STREAK = NUM_PIECES + 1
+MAX_TURNS = 10_000
+
+# ORDER[player]: piece indices in observation order for that player
+ORDER = np.array(
+    [[(player * PIECES_PER_PLAYER + k) % NUM_PIECES for k in range(NUM_PIECES)]
+     for player in range(NUM_PLAYERS)],
+    dtype=np.intp,
+)
+_CELL_FLAT = CELL_TABLE.ravel()
+_NEXT_PLAYER = np.roll(np.arange(NUM_PLAYERS, dtype=np.intp), -1)
+# Cell compared against when no capture can happen; no piece is ever on it
+_MISS = np.iinfo(np.int8).min
+
+
+class Discrete:
+    """Integers 0 .. n - 1."""
+
+    def __init__(self, n):
+        self.n = n
+        self.shape = ()
+        self.dtype = np.dtype(np.int64)
+
+    def sample(self, rng=None, mask=None):
+        rng = rng if rng is not None else np.random.default_rng()
+        if mask is not None:
+            return int(rng.choice(np.flatnonzero(mask)))
+        return int(rng.integers(self.n))
+
+    def contains(self, x):
+        return isinstance(x, (int, np.integer)) and 0 <= x < self.n
+
+
+class MultiDiscrete:
+    """One ``Discrete`` per element of ``nvec``."""
+
+    def __init__(self, nvec):
+        self.nvec = np.asarray(nvec, np.int64)
+        self.shape = self.nvec.shape
+        self.dtype = np.dtype(np.int64)
+
+    def sample(self, rng=None):
+        rng = rng if rng is not None else np.random.default_rng()
+        return rng.integers(self.nvec)
+
+    def contains(self, x):
+        x = np.asarray(x)
+        return x.shape == self.shape and bool(((0 <= x) & (x < self.nvec)).all())
+
+
+class Box:
+    """Arrays of ``shape`` with every element between ``low`` and ``high``."""
+
+    def __init__(self, low, high, shape, dtype):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.low = np.broadcast_to(np.asarray(low, self.dtype), self.shape)
+        self.high = np.broadcast_to(np.asarray(high, self.dtype), self.shape)
+
+    def sample(self, rng=None):
+        rng = rng if rng is not None else np.random.default_rng()
+        return rng.integers(self.low, self.high, endpoint=True).astype(self.dtype)
+
+    def contains(self, x):
+        x = np.asarray(x)
+        return (
+            x.shape == self.shape
+            and bool(((self.low <= x) & (x <= self.high)).all())
+        )
+
+
+_OBS_LOW = [BASE] * NUM_PIECES + [1, 0]
+_OBS_HIGH = [PATH_LEN] * NUM_PIECES + [6, engine.MAX_SIX_STREAK]
+
+
+def observation_space(shape=(OBS_SIZE,)):
+    return Box(_OBS_LOW, _OBS_HIGH, shape, np.int8)
+
+
+def observe(state, out=None):
+    """Observation of ``state`` for the seat to move, after its roll."""
+    out = np.empty(OBS_SIZE, np.int8) if out is None else out
+    progress = state.progress
+    out[:NUM_PIECES] = [progress[index] for index in ORDER[state.current_player]]
+    out[DIE] = state.die
+    out[STREAK] = state.six_streak
+    return out
+
+
+def action_mask(state, out=None):
+    """Legal actions of ``state``: its legal pieces, or only ``PASS``."""
+    out = np.zeros(ACTIONS, bool) if out is None else out
+    out[:] = False
+    moves = engine.legal_moves(state)
+    out[moves] = True
+    out[PASS] = not moves
+    return out
+
+
+class DiceEnv:
+    """One game behind a Gymnasium-style ``reset``/``step``.
+
+    ``opponents`` None lets the agent play every seat. A ``simulate``
+    policy name or callable ``(state, moves, rng)`` seats the agent at
+    seat 0 and plays the other seats with it between the agent's turns.
+    """
+
+    metadata = {"render_modes": []}
+
+    def __init__(self, opponents=None, max_turns=MAX_TURNS):
+        if isinstance(opponents, str):
+            from simulate import POLICIES
+
+            opponents = POLICIES[opponents]
+        self.opponents = opponents
+        self.max_turns = max_turns
+        self.action_space = Discrete(ACTIONS)
+        self.observation_space = observation_space()
+        self.state = None
+        self.turns = 0
+        self._rng = random.Random()
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            self._rng = random.Random(seed)
+        self.state = engine.new_game()
+        self.turns = 0
+        engine.roll(self.state, self._rng.randrange)
+        return observe(self.state), self._info(self.state.current_player)
+
+    def action_masks(self):
+        return action_mask(self.state)
+
+    def _info(self, actor):
+        return {
+            "action_mask": action_mask(self.state),
+            "player": self.state.current_player,
+            "actor": actor,
+        }
+
+    def _turn(self, piece):
+        """Play ``piece`` (or PASS) for the seat to move; True when it won."""
+        state = self.state
+        player = state.current_player
+        engine.apply_move(state, None if piece == PASS else piece)
+        self.turns += 1
+        return state.winner == player
+
+    def step(self, action):
+        state = self.state
+        if state is None:
+            raise RuntimeError("call reset() before step()")
+        if state.is_over:
+            raise RuntimeError("the game is over; call reset()")
+        action = int(action)
+        if not 0 <= action < ACTIONS or not action_mask(state)[action]:
+            raise ValueError(f"action {action} is not legal here")
+        actor = state.current_player
+        won = self._turn(action)
+        reward = 1.0 if won else 0.0
+        if self.opponents is not None:
+            while not state.is_over and state.current_player != 0:
+                engine.roll(state, self._rng.randrange)
+                moves = engine.legal_moves(state)
+                piece = self.opponents(state, moves, self._rng) if moves else PASS
+                if self._turn(piece):
+                    reward = -1.0
+        terminated = state.is_over
+        truncated = not terminated and self.turns >= self.max_turns
+        if not terminated:
+            engine.roll(state, self._rng.randrange)
+        return observe(state), reward, terminated, truncated, self._info(actor)
+
+
+class VectorDiceEnv:
+    """``num_envs`` self-play games stepped together without allocating.
+
+    ``reset`` and ``step`` return the env's own buffers, overwritten by
+    the next call; copy what has to outlive a step. Every ufunc runs on
+    contiguous operands of one dtype, since mixing dtypes or broadcasting
+    makes NumPy allocate a cast buffer; values are widened or broadcast
+    with ``np.copyto`` first.
+    """
+
+    metadata = {"render_modes": [], "autoreset_mode": "same-step"}
+
+    def __init__(self, num_envs, seed=None, max_turns=MAX_TURNS):
+        n = self.num_envs = num_envs
+        self.max_turns = max_turns
+        self.single_action_space = Discrete(ACTIONS)
+        self.single_observation_space = observation_space()
+        self.action_space = MultiDiscrete(np.full(n, ACTIONS))
+        self.observation_space = observation_space((n, OBS_SIZE))
+        self.rng = np.random.default_rng(seed)
+
+        # Games are rows; cells mirror progress like ``BatchGames.cells``
+        self.progress = np.full((n, NUM_PIECES), BASE, np.int8)
+        self.cells = np.full((n, NUM_PIECES), NO_CELL, np.int8)
+        self.player = np.zeros(n, np.intp)
+        self.streak = np.zeros(n, np.int8)
+        self.die = np.zeros(n, np.int8)
+        self.turns = np.zeros(n, np.int32)
+
+        self.observations = np.zeros((n, OBS_SIZE), np.int8)
+        self.rewards = np.zeros(n, np.float32)
+        self.terminated = np.zeros(n, bool)
+        self.truncated = np.zeros(n, bool)
+        self.mask = np.zeros((n, ACTIONS), bool)
+        self.actor = np.zeros(n, np.int8)
+        self.infos = {"action_mask": self.mask, "actor": self.actor}
+
+        self._progress_flat = self.progress.reshape(-1)
+        self._cells_flat = self.cells.reshape(-1)
+        self._mask_flat = self.mask.reshape(-1)
+        rows = np.arange(n, dtype=np.intp)
+        self._rows5 = rows * ACTIONS
+        self._rows16 = rows * NUM_PIECES
+        self._rows16_wide = np.repeat(self._rows16[:, None], NUM_PIECES, axis=1)
+        self._owner = np.tile(OWNER, (n, 1))
+
+        # Flat indices of every piece in observation order; the first
+        # four are the pieces of the player to move
+        self._order = np.zeros((n, NUM_PIECES), np.intp)
+        self._own = np.zeros((n, PIECES_PER_PLAYER), np.intp)
+        self._seen = np.zeros((n, NUM_PIECES), np.int8)
+        self._pos = np.zeros((n, PIECES_PER_PLAYER), np.int8)
+        self._die4 = np.zeros((n, PIECES_PER_PLAYER), np.int8)
+        self._six4 = np.zeros((n, PIECES_PER_PLAYER), bool)
+        self._base = np.zeros((n, PIECES_PER_PLAYER), bool)
+        self._ahead = np.zeros((n, PIECES_PER_PLAYER), bool)
+        self._legal = np.zeros((n, PIECES_PER_PLAYER), bool)
+        self._cell16 = np.zeros((n, NUM_PIECES), np.int8)
+        self._player16 = np.zeros((n, NUM_PIECES), np.int8)
+        self._hit = np.zeros((n, NUM_PIECES), bool)
+        self._other = np.zeros((n, NUM_PIECES), bool)
+        self._raw = np.zeros(n, np.intp)
+        self._action = np.zeros(n, np.intp)
+        self._first = np.zeros(n, np.intp)
+        self._index = np.zeros(n, np.intp)
+        self._offset = np.zeros(n, np.intp)
+        self._cell_index = np.zeros(n, np.intp)
+        self._next = np.zeros(n, np.intp)
+        self._old = np.zeros(n, np.int8)
+        self._new = np.zeros(n, np.int8)
+        self._cell = np.zeros(n, np.int8)
+        self._flag = np.zeros(n, bool)
+        self._still = np.zeros(n, bool)
+        self._done = np.zeros(n, bool)
+        self._draw = np.zeros(n, np.float64)
+        self._faces = np.zeros(n, np.float64)
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.progress.fill(BASE)
+        self.cells.fill(NO_CELL)
+        self.player.fill(0)
+        self.streak.fill(0)
+        self.turns.fill(0)
+        self.rewards.fill(0)
+        self.terminated.fill(False)
+        self.truncated.fill(False)
+        self.actor.fill(0)
+        self._roll()
+        return self.observations, self.infos
+
+    def action_masks(self):
+        return self.mask
+
+    def _roll(self):
+        """Roll for every game and write its observation and action mask."""
+        die, streak, flag = self.die, self.streak, self._flag
+        # After two sixes the die shows 1-5
+        np.equal(streak, engine.MAX_SIX_STREAK, out=flag)
+        np.copyto(self._faces, flag)
+        np.subtract(6.0, self._faces, out=self._faces)
+        self.rng.random(out=self._draw)
+        np.multiply(self._draw, self._faces, out=self._draw)
+        np.floor(self._draw, out=self._draw)
+        np.add(self._draw, 1.0, out=self._draw)
+        np.copyto(die, self._draw, casting="unsafe")
+        np.add(streak, 1, out=streak)
+        np.not_equal(die, 6, out=flag)
+        np.copyto(streak, 0, where=flag)
+
+        order, own = self._order, self._own
+        np.take(ORDER, self.player, axis=0, out=order, mode="clip")
+        np.add(order, self._rows16_wide, out=order)
+        np.copyto(own, order[:, :PIECES_PER_PLAYER])
+
+        # A piece in base needs a six; the others must not overshoot
+        pos, base, ahead, legal = self._pos, self._base, self._ahead, self._legal
+        np.take(self._progress_flat, own, out=pos, mode="clip")
+        np.equal(pos, BASE, out=base)
+        np.copyto(self._six4, flag[:, None])
+        np.logical_not(self._six4, out=self._six4)
+        np.logical_and(base, self._six4, out=legal)
+        np.copyto(self._die4, die[:, None])
+        np.add(pos, self._die4, out=pos)
+        np.less_equal(pos, PATH_LEN, out=ahead)
+        np.logical_not(base, out=base)
+        np.logical_and(ahead, base, out=ahead)
+        np.logical_or(legal, ahead, out=legal)
+        np.copyto(self.mask[:, :PASS], legal)
+        np.any(legal, axis=1, out=flag)
+        np.logical_not(flag, out=self.mask[:, PASS])
+
+        obs = self.observations
+        np.take(self._progress_flat, order, out=self._seen, mode="clip")
+        np.copyto(obs[:, :NUM_PIECES], self._seen)
+        np.copyto(obs[:, DIE], die)
+        np.copyto(obs[:, STREAK], streak)
+
+    def _legalize(self, actions):
+        """``actions`` with every masked-out choice replaced by the first legal one."""
+        raw, action, flag, first = self._raw, self._action, self._flag, self._first
+        np.copyto(raw, actions, casting="unsafe")
+        np.clip(raw, 0, PASS, out=action)
+        np.equal(action, raw, out=flag)
+        np.add(self._rows5, action, out=self._index)
+        np.take(self._mask_flat, self._index, out=self._still, mode="clip")
+        np.logical_and(flag, self._still, out=flag)
+        np.logical_not(flag, out=flag)
+        first.fill(PASS)
+        for piece in reversed(range(PIECES_PER_PLAYER)):
+            np.copyto(first, piece, where=self.mask[:, piece])
+        np.copyto(action, first, where=flag)
+        return action
+
+    def step(self, actions):
+        """Play one turn in every game; returns ``(obs, rewards, terminated, truncated, infos)``."""
+        action = self._legalize(actions)
+        player, die = self.player, self.die
+        old, new, cell, still, flag = self._old, self._new, self._cell, self._still, self._flag
+
+        # Move the chosen piece; a pass rewrites piece 0 where it is
+        np.equal(action, PASS, out=still)
+        index = self._index
+        np.minimum(action, PIECES_PER_PLAYER - 1, out=index)
+        np.add(index, self._rows16, out=index)
+        np.multiply(player, PIECES_PER_PLAYER, out=self._offset)
+        np.add(index, self._offset, out=index)
+        np.take(self._progress_flat, index, out=old, mode="clip")
+        np.add(old, die, out=new)
+        np.equal(old, BASE, out=flag)
+        np.copyto(new, START, where=flag)
+        np.copyto(new, old, where=still)
+        np.put(self._progress_flat, index, new, mode="clip")
+
+        cell_index = self._cell_index
+        np.multiply(player, CELL_STRIDE, out=cell_index)
+        np.add(cell_index, 2, out=cell_index)
+        np.copyto(self._offset, new)
+        np.add(cell_index, self._offset, out=cell_index)
+        np.take(_CELL_FLAT, cell_index, out=cell, mode="clip")
+        np.put(self._cells_flat, index, cell, mode="clip")
+
+        # Opponent pieces on the square the piece moved to go back to base
+        np.less(cell, 0, out=flag)
+        np.logical_or(flag, still, out=flag)
+        np.copyto(cell, _MISS, where=flag)
+        hit, other = self._hit, self._other
+        np.copyto(self._cell16, cell[:, None])
+        np.equal(self.cells, self._cell16, out=hit)
+        np.copyto(self._player16, player[:, None], casting="unsafe")
+        np.not_equal(self._owner, self._player16, out=other)
+        np.logical_and(hit, other, out=hit)
+        np.copyto(self.progress, BASE, where=hit)
+        np.copyto(self.cells, NO_CELL, where=hit)
+
+        pos, terminated, truncated = self._pos, self.terminated, self.truncated
+        np.take(self._progress_flat, self._own, out=pos, mode="clip")
+        np.equal(pos, PATH_LEN, out=self._ahead)
+        np.all(self._ahead, axis=1, out=terminated)
+        np.copyto(self.rewards, terminated)
+        np.copyto(self.actor, player, casting="unsafe")
+
+        np.add(self.turns, 1, out=self.turns)
+        np.greater_equal(self.turns, self.max_turns, out=truncated)
+        np.logical_not(terminated, out=flag)
+        np.logical_and(truncated, flag, out=truncated)
+
+        # A six keeps the turn
+        np.not_equal(die, 6, out=flag)
+        np.take(_NEXT_PLAYER, player, out=self._next, mode="clip")
+        np.copyto(player, self._next, where=flag)
+
+        done = self._done
+        np.logical_or(terminated, truncated, out=done)
+        if done.any():
+            np.copyto(self.progress, BASE, where=done[:, None])
+            np.copyto(self.cells, NO_CELL, where=done[:, None])
+            np.copyto(player, 0, where=done)
+            np.copyto(self.streak, 0, where=done)
+            np.copyto(self.turns, 0, where=done)
+        self._roll()
+        return self.observations, self.rewards, terminated, truncated, self.infos
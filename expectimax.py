@@ -0,0 +1,249 @@
+"""
+Expectimax search bot.
+
+``ExpectimaxBot`` picks a move for the player to move by searching the
+``engine`` rules: decision nodes for moves, chance nodes for the die with
+the probabilities in ``engine.ROLL_DISTRIBUTION``. Values are scalar and
+seen from the searching player, who maximizes; every opponent minimizes
+(the paranoid reduction of a four-player game), which keeps values in
+[-1, 1] so chance nodes can be cut off with Star1 bounds.
+
+Search deepens one decision ply at a time until the per-move time
+budget runs out and the move from the last finished depth is played.
+Positions are cached in a transposition table keyed by the incremental
+Zobrist hash from ``statecode``, and moves are tried in order: the
+table's best move, then captures, finishing, entering home, leaving
+base, and the piece furthest along. Positions covered by an endgame
+``tablebase.Tablebase`` passed as ``tablebase`` are played from the
+table without searching.
+"""
+
+import time
+
+import engine
+import movegen
+import statecode
+from engine import BASE, CELLS, MOVE, NUM_PLAYERS, PATH_LEN, PIECES_PER_PLAYER
+from movegen import ENTERS_HOME, FINISHES, LEAVES_BASE
+from track import HOME_ENTRY
+
+WIN = 1.0
+LOSS = -1.0
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Chance outcomes per six streak, with float probabilities.
+OUTCOMES = tuple(
+    tuple((value, float(p)) for value, p in row) for row in engine.ROLL_DISTRIBUTION
+)
+
+# Worth of one piece by progress + 2. Leaving base takes a six, so a piece
+# out of base is worth a head start; home squares cannot be captured.
+_PIECE_VALUE = tuple(
+    0 if pos == BASE else pos + 18 + (4 if pos > HOME_ENTRY else 0)
+    + (6 if pos == PATH_LEN else 0)
+    for pos in range(BASE, PATH_LEN + 1)
+)
+_MAX_SCORE = PIECES_PER_PLAYER * max(_PIECE_VALUE)
+
+
+class _Timeout(Exception):
+    pass
+
+
+def evaluate(state, player):
+    """Score of ``state`` for ``player`` in [-1, 1]: own progress against the best opponent."""
+    if state.is_over:
+        return WIN if state.winner == player else LOSS
+    scores = [0] * NUM_PLAYERS
+    for index, pos in enumerate(state.progress):
+        scores[index // PIECES_PER_PLAYER] += _PIECE_VALUE[pos - BASE]
+    own = scores[player]
+    scores[player] = 0
+    return (own - max(scores)) / _MAX_SCORE
+
+
+class ExpectimaxBot:
+    """Star1 expectimax with a transposition table and iterative deepening.
+
+    ``time_budget`` is in seconds; ``None`` searches to ``max_depth``
+    every time, which makes the bot deterministic for simulations.
+    """
+
+    def __init__(self, time_budget=0.05, max_depth=8, table_size=1 << 18, tablebase=None):
+        self.time_budget = time_budget
+        self.tablebase = tablebase
+        self.max_depth = max_depth
+        self.table_size = table_size
+        self.table = {}
+        self.root = None
+        self.nodes = 0
+        self.depth = 0
+        self._deadline = None
+
+    def __call__(self, state, moves, rng):
+        """Policy signature used by ``simulate``."""
+        return self.choose(state)
+
+    def choose(self, state):
+        """Piece (0-3) to move after the die was rolled, or None to pass."""
+        if state.phase != MOVE or state.is_over:
+            raise ValueError("choose() needs a rolled die")
+        moves = engine.legal_moves(state)
+        if len(moves) <= 1:
+            self.depth = 0
+            return moves[0] if moves else None
+        if self.tablebase is not None:
+            piece = self.tablebase.best_move(state)
+            if piece is not None:
+                self.depth = 0
+                return piece
+        if (
+            self.time_budget is None
+            or state.current_player != self.root
+            or len(self.table) > self.table_size
+        ):
+            # Values are stored from the root player's side. Bounds left by
+            # earlier searches can change ties, so fixed-depth searches
+            # start empty to stay reproducible.
+            self.table = {}
+            self.root = state.current_player
+        self.nodes = 0
+        self._deadline = (
+            None
+            if self.time_budget is None
+            # Keep a tenth of the budget for unwinding and the reply.
+            else time.perf_counter() + 0.9 * self.time_budget
+        )
+        h = statecode.zobrist(state)
+        best = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            started = time.perf_counter()
+            try:
+                best = self._root(state, h, depth)
+            except _Timeout:
+                break
+            self.depth = depth
+            if self._deadline is not None:
+                # Each ply costs roughly ten times the previous one; do not
+                # start a depth that has no chance of finishing.
+                now = time.perf_counter()
+                if now + 10 * (now - started) > self._deadline:
+                    break
+        return best
+
+    def _root(self, state, h, depth):
+        best_value = LOSS - 1
+        best = None
+        alpha = LOSS
+        for piece in self._ordered(state, h):
+            child = state.copy()
+            _, child_h = statecode.apply_move(child, piece, h)
+            value = self._search(child, child_h, depth - 1, alpha, WIN)
+            if value > best_value:
+                best_value = value
+                best = piece
+                alpha = max(alpha, value)
+        self.table[h] = (depth, EXACT, best_value, best)
+        return best
+
+    def _search(self, state, h, depth, alpha, beta):
+        self.nodes += 1
+        if (
+            self._deadline is not None
+            and not self.nodes & 63
+            and time.perf_counter() > self._deadline
+        ):
+            raise _Timeout
+        if state.is_over or depth == 0:
+            return evaluate(state, self.root)
+        if state.phase != MOVE:
+            return self._chance(state, h, depth, alpha, beta)
+
+        entry = self.table.get(h)
+        if entry is not None and entry[0] >= depth:
+            _, flag, value, _ = entry
+            if (
+                flag == EXACT
+                or (flag == LOWER and value >= beta)
+                or (flag == UPPER and value <= alpha)
+            ):
+                return value
+
+        moves = self._ordered(state, h)
+        if not moves:
+            child = state.copy()
+            _, child_h = statecode.apply_move(child, None, h)
+            return self._search(child, child_h, depth - 1, alpha, beta)
+
+        maximizing = state.current_player == self.root
+        start_alpha, start_beta = alpha, beta
+        best_value = LOSS - 1 if maximizing else WIN + 1
+        best = moves[0]
+        for piece in moves:
+            child = state.copy()
+            _, child_h = statecode.apply_move(child, piece, h)
+            value = self._search(child, child_h, depth - 1, alpha, beta)
+            if maximizing:
+                if value > best_value:
+                    best_value, best = value, piece
+                    alpha = max(alpha, value)
+            elif value < best_value:
+                best_value, best = value, piece
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= start_alpha:
+            flag = UPPER
+        elif best_value >= start_beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[h] = (depth, flag, best_value, best)
+        return best_value
+
+    def _chance(self, state, h, depth, alpha, beta):
+        """Star1: stop once the remaining outcomes cannot bring the mean into the window."""
+        total = 0.0
+        remaining = 1.0
+        for value, p in OUTCOMES[state.six_streak]:
+            remaining -= p
+            low = max(LOSS, (alpha - total - remaining * WIN) / p)
+            high = min(WIN, (beta - total - remaining * LOSS) / p)
+            child = state.copy()
+            child_h = statecode.apply_roll(child, value, h)
+            total += p * self._search(child, child_h, depth, low, high)
+            if total + remaining * WIN <= alpha:
+                return total + remaining * WIN
+            if total + remaining * LOSS >= beta:
+                return total + remaining * LOSS
+        return total
+
+    def _ordered(self, state, h):
+        """Legal pieces, most promising first."""
+        player = state.current_player
+        first = player * PIECES_PER_PLAYER
+        occupancy = state.occupancy
+        own = engine.OWN_MASKS[player]
+        scored = []
+        for piece, dest, flags in movegen.legal_moves(state):
+            score = state.progress[first + piece]
+            if 0 <= dest < PATH_LEN and occupancy.at(CELLS[player][dest]) & ~own:
+                score += 1000
+            if flags & FINISHES:
+                score += 500
+            if flags & ENTERS_HOME:
+                score += 200
+            if flags & LEAVES_BASE:
+                score += 100
+            scored.append((score, piece))
+        scored.sort(reverse=True)
+        moves = [piece for _, piece in scored]
+        entry = self.table.get(h)
+        if entry is not None and entry[3] in moves:
+            moves.remove(entry[3])
+            moves.insert(0, entry[3])
+        return moves
@@ -0,0 +1,47 @@
+"""
+Game factory for the turtle front end.
+
+Nothing that opens a window is created at import time. ``create_game``
+builds the turtles in the order the game needs them: the player label
+first (it picks the first player), then the action label, the die and
+the 16 pieces. ``main`` calls it once the screen is set up.
+
+Given a ``table.Table`` the game gets turtles of its own that keep their
+state on that table, so several games can share one process; without
+one it uses the module-level turtles and class attributes.
+"""
+
+from dice import Dice
+from action import Action, action_writer
+from piece import create_pieces
+from player import Player, p
+
+
+class Game:
+    """The turtles of one running game."""
+
+    def __init__(self, player, action, dice, pieces, table=None):
+        self.player = player
+        self.action = action
+        self.dice = dice
+        self.pieces = pieces
+        self.table = table
+
+
+def create_game(rng=None, table=None):
+    """Build the turtles; ``rng`` (see rng.py) becomes the dice source."""
+    if table is not None:
+        if rng is not None:
+            table.rng = rng
+        table.player = Player(table)
+        table.action = Action(table)
+        dice = Dice(table)
+        pieces = create_pieces(table)
+        return Game(table.player, table.action, dice, pieces, table)
+    player = p.get()
+    action = action_writer.get()
+    if rng is not None:
+        Dice.rng = rng
+    dice = Dice()
+    pieces = create_pieces()
+    return Game(player, action, dice, pieces)
@@ -0,0 +1,334 @@
+"""
+Append-only binary game log.
+
+Every event of a game is one 2-byte little-endian record: the low three
+bits give the kind and the rest its fields.
+
+    GAME      first player, seeded   starts a game; then u32 id, u64 seed
+    ROLL      player, die
+    ACTIVATE  piece                  piece left its base on a six
+    MOVE      piece, to              piece moved along its path
+    PASS      player                 no legal move for the die
+    CAPTURE   piece                  piece sent back to base by the move
+    FINISH    piece, won             piece reached the centre
+    TABLE                            then u32 id: later records are that game's
+
+Pieces are global indices 0-15 (player * 4 + slot) and ``to`` is the
+progress after the move, as in ``engine``. The GAME record carries the
+game id and the seed of its dice: a game played under seed ``k`` with
+id ``g`` rolls stream ``g`` of ``rng.SeededDiceRNG(k)``. An unseeded
+game stores seed 0 with the seeded bit clear.
+
+``GameLog`` collects the records of one game in memory; ``apply_roll``
+and ``apply_move`` run the engine rules and record what happened, like
+their counterparts in ``statecode``. Given a ``LogWriter``, a game log
+also hands every record to it as it happens. The writer appends them
+to a file through a large buffer, so the cost of a turn is a few bytes
+copied in memory. Games played at the same time interleave in the file,
+and a TABLE record marks each switch from one game to another.
+
+``games`` splits a log into the records of each game, and ``rebuild``
+replays a log through the engine and returns the state of every game
+in it, checking each recorded capture and finish against the rules on
+the way.
+"""
+
+import struct
+from collections import namedtuple
+
+import engine
+from engine import BASE, PATH_LEN, PIECES_PER_PLAYER, START
+
+GAME = 0
+ROLL = 1
+ACTIVATE = 2
+MOVE = 3
+PASS = 4
+CAPTURE = 5
+FINISH = 6
+TABLE = 7
+
+RECORD = struct.Struct("<H")
+RECORD_SIZE = RECORD.size
+HEADER = struct.Struct("<HIQ")
+SWITCH = struct.Struct("<HI")
+SEEDED = 4
+SEED_MASK = (1 << 64) - 1
+BUFFER_SIZE = 1 << 16
+
+# Event of a GAME or TABLE record has the game id as its value
+Event = namedtuple("Event", "kind player piece value")
+Header = namedtuple("Header", "game seed first_player")
+
+
+def record(kind, payload=0):
+    """Bytes of one record."""
+    return RECORD.pack(kind | payload << 3)
+
+
+def header(first_player=0, game=0, seed=None):
+    """Bytes of the GAME record starting game ``game`` with dice under ``seed``.
+
+    Seeds are kept to 64 bits, as ``rng.SeededDiceRNG`` uses them.
+    """
+    if seed is None:
+        return HEADER.pack(GAME | first_player << 3, game, 0)
+    return HEADER.pack(GAME | (first_player | SEEDED) << 3, game, seed & SEED_MASK)
+
+
+# Every record a turn can produce, built once so logging only copies bytes
+_ROLLS = tuple(
+    tuple(record(ROLL, player | die << 2) for die in range(7)) for player in range(4)
+)
+_ACTIVATES = tuple(record(ACTIVATE, piece) for piece in range(engine.NUM_PIECES))
+_MOVES = tuple(
+    tuple(record(MOVE, piece | pos << 4) for pos in range(PATH_LEN + 1))
+    for piece in range(engine.NUM_PIECES)
+)
+_PASSES = tuple(record(PASS, player) for player in range(4))
+_CAPTURES = tuple(record(CAPTURE, piece) for piece in range(engine.NUM_PIECES))
+_FINISHES = tuple(
+    tuple(record(FINISH, piece | won << 4) for won in (0, 1))
+    for piece in range(engine.NUM_PIECES)
+)
+
+
+class GameLog:
+    """Records of one game, handed to ``writer`` as they happen if given."""
+
+    __slots__ = ("records", "game", "writer", "sent")
+
+    def __init__(self, first_player=0, game=0, seed=None, writer=None):
+        self.records = bytearray(header(first_player, game, seed))
+        self.game = game
+        self.writer = writer
+        # Bytes of ``records`` the writer already has
+        self.sent = 0
+
+    def __len__(self):
+        """Number of records, the GAME record included."""
+        return (len(self.records) - HEADER.size) // RECORD_SIZE + 1
+
+    def roll(self, player, die):
+        self.records += _ROLLS[player][die]
+        if self.writer is not None:
+            self.writer.write(self)
+
+    def move(self, index, start, end, captured, won=False):
+        """Record piece ``index`` going from ``start`` to ``end``."""
+        records = self.records
+        if start == BASE:
+            records += _ACTIVATES[index]
+        else:
+            records += _MOVES[index][end]
+            for other in captured:
+                records += _CAPTURES[other]
+            if end == PATH_LEN:
+                records += _FINISHES[index][won]
+        if self.writer is not None:
+            self.writer.write(self)
+
+    def pass_turn(self, player):
+        self.records += _PASSES[player]
+        if self.writer is not None:
+            self.writer.write(self)
+
+
+def apply_roll(state, value, log):
+    """``engine.apply_roll`` that also records the roll."""
+    player = state.current_player
+    engine.apply_roll(state, value)
+    log.roll(player, value)
+
+
+def apply_move(state, piece, log):
+    """``engine.apply_move`` that also records the move; returns the captures."""
+    player = state.current_player
+    if piece is None:
+        captured = engine.apply_move(state, None)
+        log.pass_turn(player)
+        return captured
+    index = player * PIECES_PER_PLAYER + piece
+    start = state.progress[index]
+    captured = engine.apply_move(state, piece)
+    log.move(index, start, state.progress[index], captured, state.winner == player)
+    return captured
+
+
+class LogWriter:
+    """Appends game logs to a file in ``buffer_size`` chunks."""
+
+    def __init__(self, path, buffer_size=BUFFER_SIZE):
+        self.file = open(path, "ab")
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.games = 0
+        # Game id the records at the end of the file belong to
+        self.table = None
+
+    def write(self, log):
+        """Append the records of ``log`` not written yet.
+
+        A game's first write brings its GAME record; a later one after
+        another game's records is preceded by a TABLE record.
+        """
+        buffer = self.buffer
+        if not log.sent:
+            self.games += 1
+        elif self.table != log.game:
+            buffer += SWITCH.pack(TABLE, log.game)
+        buffer += log.records[log.sent:]
+        log.sent = len(log.records)
+        self.table = log.game
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def decode(value):
+    """``Event`` of one record value."""
+    kind = value & 7
+    payload = value >> 3
+    if kind == ROLL:
+        return Event(kind, payload & 3, -1, payload >> 2)
+    if kind in (ACTIVATE, CAPTURE):
+        return Event(kind, payload // PIECES_PER_PLAYER, payload, 0)
+    if kind == MOVE:
+        piece = payload & 15
+        return Event(kind, piece // PIECES_PER_PLAYER, piece, payload >> 4)
+    if kind == FINISH:
+        piece = payload & 15
+        return Event(kind, piece // PIECES_PER_PLAYER, piece, payload >> 4)
+    if kind == PASS:
+        return Event(kind, payload, -1, 0)
+    raise ValueError(f"kind {kind} is not a single record")
+
+
+def _scan(data):
+    """``(offset, size, value)`` of every record in ``data``."""
+    if len(data) % RECORD_SIZE:
+        raise ValueError("log is cut in the middle of a record")
+    offset = 0
+    end = len(data)
+    while offset < end:
+        (value,) = RECORD.unpack_from(data, offset)
+        kind = value & 7
+        size = HEADER.size if kind == GAME else SWITCH.size if kind == TABLE else RECORD_SIZE
+        if offset + size > end:
+            raise ValueError("log is cut in the middle of a record")
+        yield offset, size, value
+        offset += size
+
+
+def events(data):
+    """``Event`` of every record in ``data``."""
+    for offset, size, value in _scan(data):
+        kind = value & 7
+        if kind == GAME:
+            game = HEADER.unpack_from(data, offset)[1]
+            yield Event(GAME, value >> 3 & 3, -1, game)
+        elif kind == TABLE:
+            yield Event(TABLE, -1, -1, SWITCH.unpack_from(data, offset)[1])
+        else:
+            yield decode(value)
+
+
+def games(data):
+    """``(Header, records)`` of every game in ``data``, in the order they start.
+
+    ``records`` are the bytes of the game's own records after its GAME
+    record, without the TABLE records that interleave it with others.
+    Raises ValueError for records of no game or of an unknown one, and
+    for a GAME record reusing the id of an earlier game.
+    """
+    found = []
+    tables = {}
+    records = None
+    for offset, size, value in _scan(data):
+        kind = value & 7
+        if kind == GAME:
+            payload, game, seed = HEADER.unpack_from(data, offset)
+            payload >>= 3
+            seed = seed if payload & SEEDED else None
+            if game in tables:
+                raise ValueError(f"game {game} starts twice")
+            records = tables[game] = bytearray()
+            found.append((Header(game, seed, payload & 3), records))
+        elif kind == TABLE:
+            game = SWITCH.unpack_from(data, offset)[1]
+            if game not in tables:
+                raise ValueError(f"game {game} has no GAME record")
+            records = tables[game]
+        elif records is None:
+            raise ValueError("log does not start with a GAME record")
+        else:
+            records += data[offset:offset + size]
+    return found
+
+
+def read_log(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def rebuild(data):
+    """Final ``GameState`` of every game in the log ``data``.
+
+    Raises ValueError if a record does not follow from the rules.
+    """
+    return [_rebuild_game(head.first_player, records) for head, records in games(data)]
+
+
+def _rebuild_game(first_player, records):
+    """Final state of one game from the records after its GAME record."""
+    state = engine.new_game(first_player)
+    pending = []
+    for (value,) in RECORD.iter_unpack(records):
+        event = decode(value)
+        kind = event.kind
+        if kind == CAPTURE:
+            if event.piece not in pending:
+                raise ValueError(f"piece {event.piece} was not captured")
+            pending.remove(event.piece)
+            continue
+        if pending:
+            raise ValueError(f"captures not logged: {pending}")
+        if kind == FINISH:
+            if state.progress[event.piece] != PATH_LEN or event.value != (
+                state.winner == event.player
+            ):
+                raise ValueError(f"piece {event.piece} did not finish that way")
+        else:
+            player = state.current_player
+            if event.player != player:
+                raise ValueError(f"player {event.player} acted out of turn")
+            if kind == ROLL:
+                engine.apply_roll(state, event.value)
+            elif kind == PASS:
+                engine.apply_move(state, None)
+            else:
+                expected = START if kind == ACTIVATE else event.value
+                if kind == ACTIVATE and state.progress[event.piece] != BASE:
+                    raise ValueError(f"piece {event.piece} is not in its base")
+                pending = engine.apply_move(state, event.piece % PIECES_PER_PLAYER)
+                if state.progress[event.piece] != expected:
+                    raise ValueError(f"piece {event.piece} did not reach {expected}")
+    if pending:
+        raise ValueError(f"captures not logged: {pending}")
+    return state
@@ -0,0 +1,38 @@
+"""
+Deferred construction of turtle objects.
+
+Creating a ``Turtle`` opens the Tk root window, so module-level singletons
+such as ``player.p`` are ``Lazy`` stand-ins: the real object is built the
+first time one of its attributes is used, or when ``game.create_game``
+asks for it. Importing a module therefore never opens a window.
+"""
+
+
+class Lazy:
+    """Proxy that calls ``factory()`` on first use and forwards to the result."""
+
+    __slots__ = ("_factory", "_instance")
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+
+    @property
+    def created(self):
+        return self._instance is not None
+
+    def get(self):
+        if self._instance is None:
+            self._instance = self._factory()
+        return self._instance
+
+    def reset(self):
+        """Forget the built object; the next use builds a new one."""
+        self._instance = None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def __repr__(self):
+        state = repr(self._instance) if self._instance is not None else "not created"
+        return f"Lazy({state})"
@@ -0,0 +1,216 @@
+"""
+Load test for the game server.
+
+Starts a ``server.GameServer`` in a child process (or uses one given by
+``--connect``), then runs N scripted bot clients on one asyncio loop.
+Every bot connects, joins the first open table and plays random legal
+moves from ``movegen.legal_moves`` until its game ends. A command the
+server refuses is not sent again until the game has moved on: refusals
+because the table has not started or it is not the bot's turn are
+expected, and any other error is counted in the report.
+
+The report gives the round-trip time of each command, from sending
+``ROLL`` or ``MOVE`` to receiving the matching ``ROLLED`` or ``MOVED``
+broadcast, as p50/p95/p99; moves applied per second over the whole run;
+and the server's event-loop lag sampled by ``server.LagMonitor``, which
+is only available when the harness started the server itself.
+
+    python -m loadtest --clients 2000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import random
+import sys
+import time
+
+import movegen
+from client import GameClient
+from engine import NUM_PLAYERS, ROLL as ROLL_PHASE
+from protocol import NOT_STARTED, NOT_YOUR_TURN, Error, Moved, Rolled
+from server import DEFAULT_HOST, GameServer, LagMonitor
+
+CONNECT_BATCH = 500
+
+
+def percentile(values, q):
+    """Nearest-rank ``q``-th percentile of ``values``; 0.0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+class Report:
+    """Measurements of one load test run."""
+
+    def __init__(self):
+        self.roll_rtt = []
+        self.move_rtt = []
+        self.moves = 0
+        self.games = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self.lag = []
+
+    @property
+    def moves_per_second(self):
+        return self.moves / self.elapsed if self.elapsed else 0.0
+
+
+async def bot(host, port, rng, report):
+    """Play one game as one client, recording round-trip times."""
+    await play(await GameClient.connect(host, port), rng, report)
+
+
+async def play(client, rng, report):
+    """Play one game on a connected ``client``, then close it."""
+    try:
+        seat = await client.join()
+        clock = time.perf_counter
+        sent = 0.0
+        # False after a refusal, until the next message about the game
+        ready = True
+        while not client.state.is_over:
+            state = client.state
+            if ready and not sent and state.current_player == seat and state.phase == ROLL_PHASE:
+                client.roll()
+                sent = clock()
+            message = await client.receive()
+            kind = type(message)
+            if kind is Error:
+                if message.code not in (NOT_STARTED, NOT_YOUR_TURN):
+                    report.errors += 1
+                ready = False
+                sent = 0.0
+                continue
+            ready = True
+            if kind is Rolled and message.player == seat:
+                now = clock()
+                report.roll_rtt.append(now - sent)
+                sent = 0.0
+                moves = movegen.legal_moves(client.state)
+                if moves:
+                    client.move(rng.choice(moves)[0])
+                    sent = now
+            elif kind is Moved:
+                report.moves += 1
+                if message.player == seat and sent:
+                    report.move_rtt.append(clock() - sent)
+                    sent = 0.0
+        if seat == 0:
+            report.games += 1
+    finally:
+        await client.close()
+
+
+async def load(host, port, clients, seed=0):
+    """Run ``clients`` bots against ``host``:``port``; return a Report."""
+    if clients <= 0 or clients % NUM_PLAYERS:
+        raise ValueError(f"clients must be a positive multiple of {NUM_PLAYERS}")
+    report = Report()
+    start = time.perf_counter()
+    tasks = []
+    for first in range(0, clients, CONNECT_BATCH):
+        batch = range(first, min(clients, first + CONNECT_BATCH))
+        # Wait for a batch to connect before starting the next, so no more
+        # than CONNECT_BATCH connections wait in the listen backlog.
+        connected = await asyncio.gather(*(GameClient.connect(host, port) for _ in batch))
+        tasks += [
+            asyncio.ensure_future(play(client, random.Random(seed * clients + i), report))
+            for i, client in zip(batch, connected)
+        ]
+    await asyncio.gather(*tasks)
+    report.elapsed = time.perf_counter() - start
+    # Every seat counted each broadcast move; keep one count per move.
+    report.moves //= NUM_PLAYERS
+    return report
+
+
+async def _serve(pipe, seed):
+    server = GameServer(seed)
+    await server.start(DEFAULT_HOST, 0)
+    monitor = LagMonitor()
+    monitor.start()
+    pipe.send(server.address)
+    await asyncio.get_running_loop().run_in_executor(None, pipe.recv)
+    monitor.stop()
+    pipe.send(monitor.samples)
+    await server.close()
+
+
+def _server_process(pipe, seed):
+    asyncio.run(_serve(pipe, seed))
+
+
+def run(clients, seed=0, address=None):
+    """Load test a server at ``address``, or one started in a child process."""
+    if address is not None:
+        return asyncio.run(load(*address, clients, seed))
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=_server_process, args=(child, seed), daemon=True
+    )
+    process.start()
+    try:
+        host, port = parent.recv()
+        report = asyncio.run(load(host, port, clients, seed))
+        parent.send("stop")
+        report.lag = parent.recv()
+    finally:
+        process.join(timeout=10)
+        if process.is_alive():
+            process.terminate()
+    return report
+
+
+def format_report(report, clients):
+    def ms(values, q):
+        return f"{1000 * percentile(values, q):>9.2f}"
+
+    lines = [
+        f"clients: {clients}  games: {report.games}  errors: {report.errors}",
+        f"elapsed: {report.elapsed:.2f} s  moves: {report.moves}"
+        f"  moves/s: {report.moves_per_second:.0f}",
+        f"{'ms':<12}{'p50':>9}{'p95':>9}{'p99':>9}",
+    ]
+    for name, values in (("roll", report.roll_rtt), ("move", report.move_rtt)):
+        lines.append(f"{name:<12}{ms(values, 50)}{ms(values, 95)}{ms(values, 99)}")
+    if report.lag:
+        lines.append(
+            f"{'loop lag':<12}{ms(report.lag, 50)}{ms(report.lag, 95)}"
+            f"{ms(report.lag, 99)}  max {1000 * max(report.lag):.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m loadtest", description="Load test the game server."
+    )
+    parser.add_argument("--clients", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--connect",
+        metavar="HOST:PORT",
+        default=None,
+        help="test a running server instead of starting one",
+    )
+    args = parser.parse_args(argv)
+
+    address = None
+    if args.connect is not None:
+        host, _, port = args.connect.rpartition(":")
+        address = (host or DEFAULT_HOST, int(port))
+    try:
+        report = run(args.clients, args.seed, address)
+    except ValueError as error:
+        parser.error(str(error))
+    print(format_report(report, args.clients))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,11 @@
 import turtle
 # from board import Board
-from piece import Piece
+from game import create_game
 from turtle import Screen
-from dice import Dice
-from player import p
-from action import action_writer
+from rng import CryptoDiceRNG
+from table import Table
+import render
+from board_image import board_image
 
 game_is_on = True
 
@@ -12,8 +13,9 @@ screen = Screen()
 screen.setup(width=750, height=750)
 screen.title("Dice")
 screen.listen()
+renderer = render.install(screen)
 # screen.bgpic("./resources/dice_bg.gif")
-screen.bgpic("./resources/bg_color.gif")
+screen.bgpic(str(board_image(750, 750)))
 screen.addshape("./resources/dice_2.gif")
 screen.addshape("./resources/dice_1.gif")
 screen.addshape("./resources/dice_3.gif")
@@ -26,22 +28,26 @@ screen.addshape("./resources/dice_blank.gif")
 # board = Board() 
 
 
-# Dice
-dice = Dice()
+# Player and action labels, dice and pieces
+table = Table()
+game = create_game(rng=CryptoDiceRNG(), table=table)
+dice = game.dice
+p = game.player
+action_writer = game.action
 
 def handle_dice_roll():
-    if not Dice.allow_rolling:
-        # Piece.allow_moving = False
+    if not table.allow_rolling:
+        # table.allow_moving = False
         return
-    Dice.allow_rolling = False
+    table.allow_rolling = False
     dice.roll()
-    Piece.allow_moving = True
+    table.allow_moving = True
     action_writer.update_action(1)
-    if Dice.current_value != 6:
+    if table.current_value != 6:
         p.handle_player_change
 
     
-screen.onkeypress(handle_dice_roll, " ")
+screen.onkeypress(renderer.batched(handle_dice_roll), " ")
 
 # test
 # p1 = Piece(1,path_1, inactive_pos_1[0])
@@ -58,4 +64,5 @@ def handle_click(x,y):
 # screen.onkeypress(lambda: p3.move(1), "Right")
 # screen.onkeypress(lambda: p4.move(1), "Down")
 
+renderer.flush()
 turtle.mainloop()
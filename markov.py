@@ -0,0 +1,316 @@
+"""
+Exact solutions of races as absorbing Markov chains.
+
+A piece moved only by its own dice is a Markov chain over its progress
+and the six streak of ``engine.apply_roll``; a roll moves it ``die``
+squares when that does not overshoot ``PATH_LEN``, a six brings it out
+of base and after two sixes the die shows 1-5. ``piece_chain`` builds
+that chain and ``race_chain`` the race of one piece each for two seats,
+which alternate turns, keep the turn on a six and capture each other on
+the squares of the compiled ``track.TRACK`` paths.
+
+A ``Chain`` stores its transient-to-transient transitions as sparse
+triplets and, per state, the probability of being absorbed into each
+outcome in one roll. ``solve`` gives exact expectations from the linear
+system (I - Q) x = b, and ``distribution`` pushes a probability vector
+forward one roll at a time to give the full distribution of the number
+of rolls. NumPy solves small chains densely and iterates on larger
+ones until nothing changes in double precision.
+
+Results are cached on disk under ``cache.CACHE_DIR``, keyed like
+``board_image`` by everything they depend on, so repeated runs only
+load a file.
+
+    python -m markov piece
+    python -m markov race --seats 0,2
+"""
+
+import argparse
+import hashlib
+import os
+import struct
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from cache import CACHE_DIR
+from engine import CELLS, MAX_SIX_STREAK, ROLL_FACES
+from track import PATH_LEN, TRACK
+
+# Bump when the chains change so old cached results are not reused.
+VERSION = 1
+
+# Progress BASE (-2) .. PATH_LEN - 1 as 0 .. POSITIONS - 1; PATH_LEN absorbs
+POSITIONS = PATH_LEN + 2
+STREAKS = MAX_SIX_STREAK + 1
+DENSE_LIMIT = 2000
+TOLERANCE = 1e-15
+MAX_ROLLS = 1 << 16
+
+Race = namedtuple("Race", "seats win_probability expected_rolls distribution")
+
+
+def _advance(pos, die):
+    """Progress after rolling ``die`` at ``pos``; unchanged when the move is illegal."""
+    if pos == -2:
+        return -1 if die == 6 else pos
+    return pos + die if pos + die <= PATH_LEN else pos
+
+
+def _rolls(streak):
+    """``(die, probability, next streak)`` of every face after ``streak`` sixes."""
+    faces = ROLL_FACES[streak]
+    return [
+        (die, 1.0 / faces, streak + 1 if die == 6 else 0) for die in range(1, faces + 1)
+    ]
+
+
+class Chain:
+    """Absorbing Markov chain: sparse transitions plus one-roll exits."""
+
+    def __init__(self, size, rows, cols, probs, exits):
+        self.size = size
+        self.rows = np.asarray(rows, np.int64)
+        self.cols = np.asarray(cols, np.int64)
+        self.probs = np.asarray(probs, np.float64)
+        # exits[state, outcome]: probability of ending in ``outcome`` next roll
+        self.exits = np.asarray(exits, np.float64)
+
+    @property
+    def outcomes(self):
+        return self.exits.shape[1]
+
+    def forward(self, p):
+        """Distribution over transient states one roll after ``p``."""
+        return np.bincount(self.cols, self.probs * p[self.rows], self.size)
+
+    def backward(self, x):
+        """``Q @ x``: expected value of ``x`` one roll later, from each state."""
+        return np.bincount(self.rows, self.probs * x[self.cols], self.size)
+
+    def solve(self, b):
+        """``x`` with ``x = b + Q x``, the total of ``b`` collected before absorption."""
+        b = np.asarray(b, np.float64)
+        if self.size <= DENSE_LIMIT:
+            q = np.zeros((self.size, self.size))
+            np.add.at(q, (self.rows, self.cols), self.probs)
+            return np.linalg.solve(np.eye(self.size) - q, b)
+        x = b.copy()
+        for _ in range(MAX_ROLLS):
+            following = b + self.backward(x)
+            if np.array_equal(following, x):
+                return x
+            x = following
+        raise ArithmeticError("the chain did not converge")
+
+    def expected_rolls(self):
+        """Expected rolls to absorption from every state."""
+        return self.solve(np.ones(self.size))
+
+    def absorption(self):
+        """Probability of ending in each outcome, per state and outcome."""
+        if self.outcomes == 1:
+            return np.ones((self.size, 1))
+        return np.column_stack(
+            [self.solve(self.exits[:, outcome]) for outcome in range(self.outcomes)]
+        )
+
+    def distribution(self, start, tolerance=TOLERANCE):
+        """``d[t, outcome]``: probability of ending in ``outcome`` on roll ``t + 1``.
+
+        Stops once less than ``tolerance`` of the probability is left.
+        """
+        p = np.zeros(self.size)
+        p[start] = 1.0
+        steps = []
+        for _ in range(MAX_ROLLS):
+            steps.append(p @ self.exits)
+            p = self.forward(p)
+            if p.sum() < tolerance:
+                return np.array(steps)
+        raise ArithmeticError("the chain did not converge")
+
+
+def piece_index(pos, streak):
+    """State of a lone piece at progress ``pos`` after ``streak`` sixes."""
+    return (pos + 2) * STREAKS + streak
+
+
+def piece_chain():
+    """One piece alone, rolled until it reaches the centre."""
+    rows, cols, probs = [], [], []
+    size = POSITIONS * STREAKS
+    exits = np.zeros((size, 1))
+    for pos in range(-2, PATH_LEN):
+        for streak in range(STREAKS):
+            state = piece_index(pos, streak)
+            for die, p, following in _rolls(streak):
+                moved = _advance(pos, die)
+                if moved == PATH_LEN:
+                    exits[state, 0] += p
+                else:
+                    rows.append(state)
+                    cols.append(piece_index(moved, following))
+                    probs.append(p)
+    return Chain(size, rows, cols, probs, exits)
+
+
+def race_index(first, second, mover, streak):
+    """State of a race: both progresses, whose turn (0 or 1) and the six streak."""
+    return ((((first + 2) * POSITIONS) + second + 2) * 2 + mover) * STREAKS + streak
+
+
+def _captures(seats):
+    """``hits[a + 2, b + 2]``: the seats' pieces at ``a`` and ``b`` share a square."""
+    hits = np.zeros((POSITIONS, POSITIONS), bool)
+    for a in range(PATH_LEN):
+        for b in range(PATH_LEN):
+            hits[a + 2, b + 2] = CELLS[seats[0]][a] == CELLS[seats[1]][b]
+    return hits
+
+
+def race_chain(seats=(0, 2)):
+    """One piece each for two seats; outcome ``i`` is a win for ``seats[i]``."""
+    if len(seats) != 2 or seats[0] == seats[1]:
+        raise ValueError("a race needs two different seats")
+    hits = _captures(seats)
+    rows, cols, probs = [], [], []
+    size = POSITIONS * POSITIONS * 2 * STREAKS
+    exits = np.zeros((size, 2))
+    for first in range(-2, PATH_LEN):
+        for second in range(-2, PATH_LEN):
+            for mover in (0, 1):
+                for streak in range(STREAKS):
+                    state = race_index(first, second, mover, streak)
+                    own = (first, second)[mover]
+                    for die, p, following in _rolls(streak):
+                        moved = _advance(own, die)
+                        if moved == PATH_LEN:
+                            exits[state, mover] += p
+                            continue
+                        pieces = [first, second]
+                        pieces[mover] = moved
+                        if moved != own and hits[pieces[0] + 2, pieces[1] + 2]:
+                            pieces[1 - mover] = -2
+                        rows.append(state)
+                        cols.append(
+                            race_index(*pieces, mover if die == 6 else 1 - mover, following)
+                        )
+                        probs.append(p)
+    return Chain(size, rows, cols, probs, exits)
+
+
+def cache_key(name, params, track=TRACK):
+    """Hex digest of everything a cached result depends on."""
+    digest = hashlib.sha1()
+    digest.update(struct.pack("<2i", VERSION, PATH_LEN))
+    digest.update(repr((name, params, ROLL_FACES)).encode())
+    for table in (track.ring, track.starts, track.homes):
+        digest.update(table.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _cached(name, params, compute, cache_dir=None):
+    """Arrays returned by ``compute()``, from the cache when present."""
+    cache_dir = Path(cache_dir) if cache_dir is not None else CACHE_DIR
+    path = cache_dir / f"markov-{name}-{cache_key(name, params)}.npz"
+    if path.exists():
+        with np.load(path) as stored:
+            return {key: stored[key] for key in stored.files}
+    arrays = compute()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(partial, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(partial, path)
+    return arrays
+
+
+Solo = namedtuple("Solo", "expected_rolls distribution")
+
+
+def solo(cache_dir=None):
+    """Rolls for one piece to get from base to the centre.
+
+    ``expected_rolls[pos + 2]`` is the expectation from progress ``pos``
+    at the start of a turn, base included; ``distribution[t]`` is the
+    probability that a piece starting in base arrives on roll ``t + 1``.
+    """
+
+    def compute():
+        chain = piece_chain()
+        expected = chain.expected_rolls()
+        return {
+            "expected": expected[[piece_index(pos, 0) for pos in range(-2, PATH_LEN)]],
+            "distribution": chain.distribution(piece_index(-2, 0))[:, 0],
+        }
+
+    arrays = _cached("solo", (), compute, cache_dir)
+    return Solo(arrays["expected"], arrays["distribution"])
+
+
+def race(seats=(0, 2), cache_dir=None):
+    """Race of one piece each from base, ``seats[0]`` rolling first.
+
+    ``distribution[t, i]`` is the probability that ``seats[i]`` wins on
+    roll ``t + 1`` of the race, counting both players' rolls.
+    """
+    seats = tuple(seats)
+
+    def compute():
+        chain = race_chain(seats)
+        start = race_index(-2, -2, 0, 0)
+        return {
+            "win": chain.absorption()[start],
+            "expected": np.array([chain.expected_rolls()[start]]),
+            "distribution": chain.distribution(start),
+        }
+
+    arrays = _cached("race", seats, compute, cache_dir)
+    return Race(seats, arrays["win"], float(arrays["expected"][0]), arrays["distribution"])
+
+
+def quantile(distribution, q):
+    """Smallest number of rolls that ends at least ``q`` of the games."""
+    total = np.cumsum(distribution)
+    return int(np.searchsorted(total, q * total[-1])) + 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m markov", description="Exact race statistics from Markov chains."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("piece", help="one piece from base to the centre")
+    race_parser = commands.add_parser("race", help="one piece each for two seats")
+    race_parser.add_argument("--seats", default="0,2", help="the first seat rolls first")
+    for command in commands.choices.values():
+        command.add_argument("--cache-dir", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "piece":
+        result = solo(args.cache_dir)
+        distribution = result.distribution
+        print(f"expected rolls from base: {result.expected_rolls[0]:.6f}")
+        print(f"from the start square: {result.expected_rolls[1]:.6f}")
+    else:
+        try:
+            seats = tuple(int(seat) for seat in args.seats.split(","))
+            result = race(seats, args.cache_dir)
+        except ValueError as error:
+            parser.error(str(error))
+        distribution = result.distribution.sum(axis=1)
+        for seat, share in zip(seats, result.win_probability):
+            print(f"seat {seat} wins: {share:.6f}")
+        print(f"expected rolls: {result.expected_rolls:.6f}")
+    print(
+        "rolls p50/p90/p99: "
+        + "/".join(str(quantile(distribution, q)) for q in (0.5, 0.9, 0.99))
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Monte Carlo tree search bot.
+
+``MCTSBot`` chooses a move by playing random games to the end on the
+``engine`` rules. The tree alternates decision nodes, where the player to
+move picks a piece by UCT on its own win rate, and chance nodes, where the
+die is sampled and each value gets its own child. Every node keeps win
+counts for all four players, so each player is credited with its own
+results.
+
+Search is root-parallel: every worker process grows an independent tree
+for its share of the playouts and returns the visit and win counts its
+playouts added to the root moves, which are summed to pick the most
+visited move. Each share always runs in the same single-process pool,
+so it keeps its last tree there, one per worker; when the next search
+starts from a position that tree already reached (after the rolls and
+moves played since), that subtree becomes the new root instead of
+starting over. Nothing here imports ``turtle``.
+"""
+
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import engine
+import statecode
+from engine import MOVE, NUM_PLAYERS, ROLL_FACES
+
+EXPLORATION = 1.4
+
+# Subtrees kept between searches, per (bot, share), in every process.
+_TREES = {}
+_bot_ids = itertools.count()
+
+
+class Node:
+    """A position in the tree; decision nodes have a ``code``, chance nodes do not."""
+
+    __slots__ = ("code", "children", "untried", "visits", "wins")
+
+    def __init__(self, code=None, untried=None):
+        self.code = code
+        self.children = {}
+        self.untried = untried
+        self.visits = 0
+        self.wins = [0] * NUM_PLAYERS
+
+
+def _decision_node(state):
+    moves = engine.legal_moves(state) if not state.is_over else []
+    return Node(statecode.encode(state), moves or [None])
+
+
+def _select(node, player):
+    log_visits = math.log(node.visits)
+    best = None
+    best_score = -1.0
+    for move, child in node.children.items():
+        score = child.wins[player] / child.visits + EXPLORATION * math.sqrt(
+            log_visits / child.visits
+        )
+        if score > best_score:
+            best, best_score = move, score
+    return best
+
+
+def playout(state, rng):
+    """Finish ``state`` with random rolls and moves; return the winner."""
+    while not state.is_over:
+        if state.phase != MOVE:
+            engine.apply_roll(state, rng.randrange(ROLL_FACES[state.six_streak]) + 1)
+        moves = engine.legal_moves(state)
+        engine.apply_move(state, rng.choice(moves) if moves else None)
+    return state.winner
+
+
+def grow(root, state, playouts, rng, deadline=None):
+    """Run up to ``playouts`` iterations from ``root``, whose position is ``state``."""
+    for done in range(playouts):
+        if deadline is not None and not done & 15 and time.perf_counter() > deadline:
+            break
+        node = root
+        current = state.copy()
+        path = [node]
+        while not current.is_over:
+            if current.phase == MOVE:
+                if node.untried:
+                    move = node.untried.pop(rng.randrange(len(node.untried)))
+                    engine.apply_move(current, move)
+                    child = node.children[move] = Node()
+                    path.append(child)
+                    break
+                move = _select(node, current.current_player)
+                engine.apply_move(current, move)
+                node = node.children[move]
+            else:
+                value = rng.randrange(ROLL_FACES[current.six_streak]) + 1
+                engine.apply_roll(current, value)
+                child = node.children.get(value)
+                if child is None:
+                    child = node.children[value] = _decision_node(current)
+                node = child
+            path.append(node)
+        winner = playout(current, rng)
+        for visited in path:
+            visited.visits += 1
+            visited.wins[winner] += 1
+    return root
+
+
+def find(node, code, limit=20_000):
+    """Decision node under ``node`` whose position is ``code``, or None."""
+    frontier = [node]
+    seen = 0
+    while frontier and seen < limit:
+        next_frontier = []
+        for candidate in frontier:
+            if candidate.code == code:
+                return candidate
+            next_frontier.extend(candidate.children.values())
+            seen += 1
+        frontier = next_frontier
+    return None
+
+
+def root_counts(bot_id, share, code, playouts, seed, time_budget=None):
+    """Grow this process's tree for ``share`` of ``bot_id``; return ``{move: (visits, wins)}``.
+
+    Counts are what this search added, not what a reused subtree held
+    before it, and ``wins`` are the wins of the player to move at ``code``.
+    """
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    state = statecode.decode(code)
+    key = (bot_id, share)
+    previous = _TREES.get(key)
+    root = find(previous, code) if previous is not None else None
+    if root is None:
+        root = _decision_node(state)
+    _TREES[key] = root
+    player = state.current_player
+    before = {move: (child.visits, child.wins[player]) for move, child in root.children.items()}
+    grow(root, state, playouts, random.Random(seed), deadline)
+    counts = {}
+    for move, child in root.children.items():
+        visits, wins = before.get(move, (0, 0))
+        if child.visits > visits:
+            counts[move] = (child.visits - visits, child.wins[player] - wins)
+    return counts
+
+
+def forget(bot_id):
+    """Drop the trees kept for ``bot_id`` in this process."""
+    for key in [key for key in _TREES if key[0] == bot_id]:
+        del _TREES[key]
+
+
+class MCTSBot:
+    """Root-parallel MCTS with one worker process per share.
+
+    ``playouts`` is the total per move, split evenly across ``workers``;
+    with ``time_budget`` (seconds) a search also stops when time runs out,
+    so ``playouts / time_budget`` caps the playout rate a bot may use.
+    ``workers=1`` searches in the calling process.
+    """
+
+    def __init__(self, playouts=2000, workers=None, time_budget=None, seed=0):
+        self.playouts = playouts
+        self.workers = workers or os.cpu_count() or 1
+        self.time_budget = time_budget
+        self.seed = seed
+        self.id = (os.getpid(), next(_bot_ids))
+        self.searches = 0
+        self.counts = {}
+        self._pools = None
+
+    def __call__(self, state, moves, rng):
+        """Policy signature used by ``simulate``."""
+        return self.choose(state)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        forget(self.id)
+        if self._pools is not None:
+            for pool in self._pools:
+                pool.shutdown()
+            self._pools = None
+
+    def choose(self, state):
+        """Piece (0-3) to move after the die was rolled, or None to pass."""
+        if state.phase != MOVE or state.is_over:
+            raise ValueError("choose() needs a rolled die")
+        moves = engine.legal_moves(state)
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+        code = statecode.encode(state)
+        self.searches += 1
+        shares = [
+            self.playouts // self.workers + (worker < self.playouts % self.workers)
+            for worker in range(self.workers)
+        ]
+        seeds = [f"{self.seed}:{self.searches}:{worker}" for worker in range(self.workers)]
+        if self.workers == 1:
+            results = [root_counts(self.id, 0, code, shares[0], seeds[0], self.time_budget)]
+        else:
+            if self._pools is None:
+                # One process per share, so a share always finds its own tree
+                self._pools = [ProcessPoolExecutor(max_workers=1) for _ in range(self.workers)]
+            futures = [
+                pool.submit(root_counts, self.id, worker, code, share, seed, self.time_budget)
+                for worker, (pool, share, seed) in enumerate(zip(self._pools, shares, seeds))
+            ]
+            results = [future.result() for future in futures]
+        counts = {}
+        for result in results:
+            for move, (visits, wins) in result.items():
+                total = counts.get(move, (0, 0))
+                counts[move] = (total[0] + visits, total[1] + wins)
+        self.counts = counts
+        return max(moves, key=lambda move: counts.get(move, (0, 0)))
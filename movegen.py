@@ -0,0 +1,94 @@
+"""
+Table-driven move generation.
+
+Every rule ``Piece.move`` checks on a click depends only on a piece's
+progress and the die value, so the outcome of every (progress, die) pair
+is computed once at import and stored in two flat ``array`` tables
+indexed by ``(progress - BASE) * 7 + die``:
+
+    DESTINATIONS  progress after the move (unchanged when illegal)
+    FLAGS         LEGAL | FINISHES | ENTERS_HOME | LEAVES_BASE
+
+``legal_moves(state, die)`` reads those tables for the four pieces of
+the player to move, so bots, hints and the batch simulator share one
+copy of the rules instead of re-deriving them.
+"""
+
+from array import array
+
+from engine import BASE, PATH_LEN, PIECES_PER_PLAYER, START
+from track import HOME_ENTRY
+
+LEGAL = 1
+FINISHES = 2
+ENTERS_HOME = 4
+LEAVES_BASE = 8
+
+DIE_FACES = 7
+PROGRESS_VALUES = PATH_LEN - BASE + 1
+
+
+def _entry(pos, die):
+    if pos == BASE:
+        if die == 6:
+            return START, LEGAL | LEAVES_BASE
+        return pos, 0
+    if die == 0 or pos == PATH_LEN or pos + die > PATH_LEN:
+        return pos, 0
+    dest = pos + die
+    flags = LEGAL
+    if dest == PATH_LEN:
+        flags |= FINISHES
+    if pos <= HOME_ENTRY < dest:
+        flags |= ENTERS_HOME
+    return dest, flags
+
+
+def _build():
+    destinations = array("b")
+    flags = array("B")
+    for pos in range(BASE, PATH_LEN + 1):
+        for die in range(DIE_FACES):
+            dest, flag = _entry(pos, die)
+            destinations.append(dest)
+            flags.append(flag)
+    return destinations, flags
+
+
+DESTINATIONS, FLAGS = _build()
+
+
+def move_entry(pos, die):
+    """``(destination, flags)`` for a piece at ``pos`` rolling ``die``."""
+    index = (pos - BASE) * DIE_FACES + die
+    return DESTINATIONS[index], FLAGS[index]
+
+
+def legal_moves(state, die=None):
+    """``(piece, destination, flags)`` for each legal move of the player to move.
+
+    ``die`` defaults to the rolled value in ``state``; passing another
+    value asks what that roll would allow, e.g. for hints or search.
+    """
+    if die is None:
+        die = state.die
+    first = state.current_player * PIECES_PER_PLAYER
+    moves = []
+    for piece in range(PIECES_PER_PLAYER):
+        index = (state.progress[first + piece] - BASE) * DIE_FACES + die
+        flags = FLAGS[index]
+        if flags:
+            moves.append((piece, DESTINATIONS[index], flags))
+    return moves
+
+
+def legal_mask(state, die=None):
+    """Bit ``piece`` is set when the player to move may move that piece."""
+    if die is None:
+        die = state.die
+    first = state.current_player * PIECES_PER_PLAYER
+    mask = 0
+    for piece in range(PIECES_PER_PLAYER):
+        if FLAGS[(state.progress[first + piece] - BASE) * DIE_FACES + die]:
+            mask |= 1 << piece
+    return mask
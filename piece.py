@@ -4,6 +4,22 @@ from player import p
 from action import action_writer
 
 from player import Player
+from cells import NO_CELL, track_cell
+from render import request_frame
+
+# Pieces standing on each board cell, kept up to date as pieces move
+board_cells = {}
+
+
+def _class_attribute(owner, name):
+    return property(
+        lambda self: getattr(owner, name),
+        lambda self, value: setattr(owner, name, value),
+    )
+
+
+def _module_global(name):
+    return property(lambda self: globals()[name])
 
 
 class Piece(Turtle):
@@ -16,7 +32,8 @@ class Piece(Turtle):
     }
     next_player = True
 
-    def __init__(self, player, path, inactive_pos, active_pos):
+    def __init__(self, player, path, inactive_pos, active_pos, table=None):
+        self.table = table if table is not None else CLASS_TABLE
         super().__init__()
         self.shape("circle")
         self.pensize(15)
@@ -32,6 +49,7 @@ class Piece(Turtle):
         self.penup()
         self.path_len = 56
         self.is_finished = False
+        self.cell = NO_CELL
         if player == 0:
             self.fillcolor("green")
         if player == 1:
@@ -47,65 +65,100 @@ class Piece(Turtle):
 
     def handle_click(self, x, y):
         self.move()
+        request_frame()
 
     def move(self):
+        table = self.table
         if self.is_active:
-            if Player.current_player == self.player and Piece.allow_moving:
-                next_idx = self.current_pos + Dice.current_value
+            if table.current_player == self.player and table.allow_moving:
+                next_idx = self.current_pos + table.current_value
                 if next_idx <= self.path_len:
                     self.goto(self.path[next_idx])
                     self.current_pos = next_idx
+                    self.set_cell(track_cell(self.path[next_idx]))
                     check_overlap(self)
-                    if Dice.current_value != 6:
-                        Piece.next_player = True
+                    if table.current_value != 6:
+                        table.next_player = True
                     else:
-                        Piece.next_player = False
+                        table.next_player = False
                 else:
-                    if Piece.piece_status[self.player]["available"] > 1:
-                        Piece.next_player = True
+                    if table.piece_status[self.player]["available"] > 1:
+                        table.next_player = True
                         return
-                    Piece.next_player = False
+                    table.next_player = False
 
                 if next_idx == self.path_len:
                     self.is_finished = True
-                    Piece.piece_status[self.player]["available"] = (
-                        Piece.piece_status[self.player]["available"] - 1
+                    table.piece_status[self.player]["available"] = (
+                        table.piece_status[self.player]["available"] - 1
                     )
 
-                Piece.allow_moving = False
-                Dice.allow_rolling = True
+                table.allow_moving = False
+                table.allow_rolling = True
                 if self.is_finished:
-                    Piece.allow_moving = True
-            if Piece.next_player:
-                if Dice.current_value != 6:
-                    p.handle_player_change()
-                action_writer.update_action(0)
-                Piece.next_player = False
-
-        elif self.player == Player.current_player and (
-            not self.is_active and Dice.current_value == 6
+                    table.allow_moving = True
+            if table.next_player:
+                if table.current_value != 6:
+                    table.player.handle_player_change()
+                table.action.update_action(0)
+                table.next_player = False
+
+        elif self.player == table.current_player and (
+            not self.is_active and table.current_value == 6
         ):
             self.is_active = True
             self.goto(self.active_pos)
-            Dice.allow_rolling = True
-            action_writer.update_action(0)
-            Piece.piece_status[self.player]["active"] += 1
+            table.allow_rolling = True
+            table.action.update_action(0)
+            table.piece_status[self.player]["active"] += 1
+
+        elif self.player == table.current_player and not self.is_active:
+            if table.piece_status[self.player]["active"] == 0:
+                table.player.handle_player_change()
+                table.allow_rolling = True
+                table.action.update_action(0)
 
-        elif self.player == Player.current_player and not self.is_active:
-            if Piece.piece_status[self.player]["active"] == 0:
-                p.handle_player_change()
-                Dice.allow_rolling = True
-                action_writer.update_action(0)
 
+    def set_cell(self, cell):
+        cells = self.table.board_cells
+        if self.cell != NO_CELL:
+            cells[self.cell].discard(self)
+        self.cell = cell
+        if cell != NO_CELL:
+            cells.setdefault(cell, set()).add(self)
 
     def set_inactive(self):
         self.is_active = False
+        self.set_cell(NO_CELL)
         self.goto(self.inactive_pos)
         
     
     
+class ClassTable:
+    """The class attributes and module globals, seen as a ``table.Table``."""
+
+    current_player = _class_attribute(Player, "current_player")
+    prev_value = _class_attribute(Dice, "prev_value")
+    current_value = _class_attribute(Dice, "current_value")
+    consecutive_six = _class_attribute(Dice, "consecutive_six")
+    allow_rolling = _class_attribute(Dice, "allow_rolling")
+    rng = _class_attribute(Dice, "rng")
+    allow_moving = _class_attribute(Piece, "allow_moving")
+    piece_status = _class_attribute(Piece, "piece_status")
+    next_player = _class_attribute(Piece, "next_player")
+    board_cells = _module_global("board_cells")
+    player = _module_global("p")
+    action = _module_global("action_writer")
+    pieces = _module_global("players")
+
+
+CLASS_TABLE = ClassTable()
+
+
 from piece_path import *
+from track import TRACK
 
+# Pieces per player, filled by create_pieces()
 players = {
     0:[],
     1:[],
@@ -113,26 +166,31 @@ players = {
     3:[],
 }
 
+INACTIVE_POSITIONS = [inactive_pos_1, inactive_pos_2, inactive_pos_3, inactive_pos_4]
+ACTIVE_POSITIONS = [active_pos_1, active_pos_2, active_pos_3, active_pos_4]
+
+
+def create_pieces(table=None):
+    """Build the 16 piece turtles of a game once; later calls return the same pieces."""
+    pieces = (table if table is not None else CLASS_TABLE).pieces
+    for i in range(4):
+        if pieces[i]:
+            continue
+        for j in range(4):
+            pieces[i].append(
+                Piece(
+                    i,
+                    TRACK.path(i),
+                    INACTIVE_POSITIONS[i][j],
+                    ACTIVE_POSITIONS[i][j],
+                    table,
+                )
+            )
+    return pieces
+
 
-for i in range(4):
-    from piece import Piece
-    for j in range(4):
-        if i == 0:
-            _ = Piece(i,path_1, inactive_pos_1[j], active_pos_1[j])
-            players[0].append(_)
-        elif i == 1:
-            _ = Piece(i,path_2, inactive_pos_2[j], active_pos_2[j])
-            players[1].append(_)
-        elif i == 2:
-            _ = Piece(i,path_3, inactive_pos_3[j], active_pos_3[j])
-            players[2].append(_)
-        elif i == 3 :
-            _ = Piece(i,path_4, inactive_pos_4[j], active_pos_4[j])
-            players[3].append(_)
-    
 def check_overlap(moved_piece):
-    for (idx, pieces) in players.items():
-        if idx != Player.current_player:
-            for item in pieces:
-                if moved_piece.pos() == item.pos():
-                    item.set_inactive()
+    # Only the pieces on the landing cell need checking
+    for item in list(moved_piece.table.board_cells.get(moved_piece.cell, ())):
+        if item.player != moved_piece.player:
+            item.set_inactive()
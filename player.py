@@ -1,5 +1,7 @@
 from turtle import Turtle
 
+from lazy import Lazy
+
 class Player(Turtle):
     current_player = -1
     player_color = {
@@ -9,7 +11,8 @@ class Player(Turtle):
         2:"Blue",
         3:"Red",
     }
-    def __init__(self):
+    def __init__(self, table=None):
+        self.table = table if table is not None else Player
         super().__init__()
         self.penup()
         self.hideturtle()
@@ -17,15 +20,19 @@ class Player(Turtle):
         self.handle_player_change()
 
     def handle_player_change(self):
-        Player.current_player = (Player.current_player + 1) % 4
+        self.show_player((self.table.current_player + 1) % 4)
+
+    def show_player(self, player):
+        table = self.table
+        table.current_player = player
         self.clear()
         self.goto(-300,320)
         self.color("black")
         self.write(f"Player : ", font=("Arial", 24, "normal"))
-        self.color(Player.player_color[Player.current_player])
+        self.color(Player.player_color[table.current_player])
         self.forward(120)
-        self.write(f"{Player.player_color[Player.current_player]}", font=("Arial", 24, "normal"))
+        self.write(f"{Player.player_color[table.current_player]}", font=("Arial", 24, "normal"))
 
     
 
-p = Player()
\ No newline at end of file
+p = Lazy(Player)
@@ -0,0 +1,196 @@
+"""
+Wire protocol between the game server and its clients.
+
+Every message is one frame: a length byte followed by that many payload
+bytes. The first payload byte is the message type and the rest are
+fixed-width little-endian fields, so the largest frame is 16 bytes.
+
+Client to server:
+
+    JOIN      u32 game            take a seat; game 0 means any open table
+    ROLL                          roll the die for your seat
+    MOVE      u8 piece            move piece 0-3 by the rolled die
+    WATCH     u32 game            follow a table as a spectator
+
+Server to client:
+
+    SEATED    u32 game, u8 seat   answer to JOIN
+    SNAPSHOT  14-byte state code  whole state, see statecode.encode
+    ROLLED    u8 player, u8 die
+    MOVED     u8 player, u8 piece, i8 from, i8 to, u16 captured
+    TURN      5 bytes, see below
+    ERROR     u8 code
+
+``MOVED`` carries the progress of the piece before and after the move
+and a bit mask of the global piece indices sent back to base. A player
+without a legal move passes, which is sent as piece ``PASS``.
+
+Spectators get one ``TURN`` per turn instead of ``ROLLED`` and ``MOVED``:
+the same fields plus the die, bit-packed into 36 bits (player 2, die 3,
+piece 3 with 7 for a pass, from + 2 and to + 2 six each, captured 16).
+
+``encode`` turns a message tuple into frame bytes and ``FrameReader``
+cuts a byte stream back into payloads for ``decode``.
+"""
+
+import struct
+from collections import namedtuple
+
+import engine
+import statecode
+
+JOIN = 0x01
+ROLL = 0x02
+MOVE = 0x03
+WATCH = 0x04
+SEATED = 0x11
+SNAPSHOT = 0x12
+ROLLED = 0x13
+MOVED = 0x14
+ERROR = 0x15
+TURN = 0x16
+
+PASS = 0xFF
+ANY_GAME = 0
+CODE_BYTES = (statecode.CODE_BITS + 7) // 8
+
+# ERROR codes
+BAD_FRAME = 1
+NOT_SEATED = 2
+NOT_STARTED = 3
+NOT_YOUR_TURN = 4
+ILLEGAL = 5
+GAME_FULL = 6
+GAME_OVER = 7
+ALREADY_SEATED = 8
+NO_GAME = 9
+
+Join = namedtuple("Join", "game")
+Roll = namedtuple("Roll", "")
+Move = namedtuple("Move", "piece")
+Watch = namedtuple("Watch", "game")
+Seated = namedtuple("Seated", "game seat")
+Snapshot = namedtuple("Snapshot", "code")
+Rolled = namedtuple("Rolled", "player die")
+Moved = namedtuple("Moved", "player piece start end captured")
+Error = namedtuple("Error", "code")
+Turn = namedtuple("Turn", "player die piece start end captured")
+
+# message class -> (type byte, field layout)
+_LAYOUTS = {
+    Join: (JOIN, struct.Struct("<I")),
+    Roll: (ROLL, struct.Struct("<")),
+    Move: (MOVE, struct.Struct("<B")),
+    Watch: (WATCH, struct.Struct("<I")),
+    Seated: (SEATED, struct.Struct("<IB")),
+    Rolled: (ROLLED, struct.Struct("<BB")),
+    Moved: (MOVED, struct.Struct("<BBbbH")),
+    Error: (ERROR, struct.Struct("<B")),
+}
+_TYPES = {kind: (cls, layout) for cls, (kind, layout) in _LAYOUTS.items()}
+
+ROLL_FRAME = bytes((1, ROLL))
+TURN_BYTES = 5
+_TURN_PASS = 7
+
+
+def _pack_turn(turn):
+    piece = _TURN_PASS if turn.piece == PASS else turn.piece
+    return (
+        turn.player
+        | turn.die << 2
+        | piece << 5
+        | (turn.start - engine.BASE) << 8
+        | (turn.end - engine.BASE) << 14
+        | turn.captured << 20
+    ).to_bytes(TURN_BYTES, "little")
+
+
+def _unpack_turn(data):
+    bits = int.from_bytes(data, "little")
+    piece = bits >> 5 & 7
+    return Turn(
+        bits & 3,
+        bits >> 2 & 7,
+        PASS if piece == _TURN_PASS else piece,
+        (bits >> 8 & 63) + engine.BASE,
+        (bits >> 14 & 63) + engine.BASE,
+        bits >> 20,
+    )
+
+
+def encode(message):
+    """Frame bytes of ``message``."""
+    kind = type(message)
+    if kind is Turn:
+        body = bytes((TURN,)) + _pack_turn(message)
+    elif kind is Snapshot:
+        body = bytes((SNAPSHOT,)) + message.code.to_bytes(CODE_BYTES, "little")
+    else:
+        kind, layout = _LAYOUTS[kind]
+        body = bytes((kind,)) + layout.pack(*message)
+    return bytes((len(body),)) + body
+
+
+def decode(payload):
+    """Message tuple of one frame payload; ValueError if it is malformed."""
+    if not payload:
+        raise ValueError("empty frame")
+    kind = payload[0]
+    if kind == TURN:
+        if len(payload) != 1 + TURN_BYTES:
+            raise ValueError("bad turn length")
+        return _unpack_turn(payload[1:])
+    if kind == SNAPSHOT:
+        if len(payload) != 1 + CODE_BYTES:
+            raise ValueError("bad snapshot length")
+        return Snapshot(int.from_bytes(payload[1:], "little"))
+    try:
+        cls, layout = _TYPES[kind]
+    except KeyError:
+        raise ValueError(f"unknown message type {kind:#x}") from None
+    if len(payload) != 1 + layout.size:
+        raise ValueError(f"bad length for message type {kind:#x}")
+    return cls(*layout.unpack_from(payload, 1))
+
+
+def snapshot(state):
+    return Snapshot(statecode.encode(state))
+
+
+def captured_mask(captured):
+    """Bit mask of the global piece indices in ``captured``."""
+    mask = 0
+    for index in captured:
+        mask |= 1 << index
+    return mask
+
+
+def captured_pieces(mask):
+    return [index for index in range(engine.NUM_PIECES) if mask >> index & 1]
+
+
+class FrameReader:
+    """Collects stream bytes and yields complete frame payloads."""
+
+    __slots__ = ("_buffer",)
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """Payloads of the frames completed by ``data``."""
+        buffer = self._buffer
+        buffer += data
+        payloads = []
+        offset = 0
+        end = len(buffer)
+        while offset < end:
+            size = buffer[offset]
+            stop = offset + 1 + size
+            if stop > end:
+                break
+            payloads.append(bytes(buffer[offset + 1:stop]))
+            offset = stop
+        del buffer[:offset]
+        return payloads
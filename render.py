@@ -0,0 +1,83 @@
+"""
+Frame batching for the turtle front end.
+
+With turtle's default tracer every ``goto``, ``write`` and ``clear``
+repaints the canvas, so one roll-and-move redraws it dozens of times.
+``FrameBatcher`` turns automatic tracing off and paints once per frame
+instead: input handlers change turtles freely, then ask for a frame, and
+all changes made since the last paint go out in a single
+``screen.update()``.
+
+A frame requested after a quiet spell is painted straight away, so input
+shows up as soon as its handler returns. Requests that arrive faster
+than ``fps`` are merged into one frame scheduled with ``ontimer`` at the
+end of the current frame interval.
+
+Modules that draw but do not own the screen call ``request_frame()``,
+which is a no-op until ``main`` installs a batcher.
+"""
+
+import time
+
+FPS = 60
+
+_installed = None
+
+
+class FrameBatcher:
+    """Coalesces redraws of one ``TurtleScreen`` into capped frames."""
+
+    def __init__(self, screen, fps=FPS, clock=time.perf_counter):
+        self.screen = screen
+        self.interval = 1.0 / fps
+        self.clock = clock
+        self.frames = 0
+        self._last_frame = None
+        self._scheduled = False
+        screen.tracer(0)
+
+    def request(self):
+        """Paint pending changes now, or at the next frame if one just went out."""
+        if self._scheduled:
+            return
+        now = self.clock()
+        if self._last_frame is None or now - self._last_frame >= self.interval:
+            self.flush()
+            return
+        self._scheduled = True
+        wait = self.interval - (now - self._last_frame)
+        self.screen.ontimer(self.flush, max(1, int(wait * 1000)))
+
+    def flush(self):
+        self._scheduled = False
+        self.screen.update()
+        self._last_frame = self.clock()
+        self.frames += 1
+
+    def batched(self, handler):
+        """Wrap an input handler so its changes are painted as one frame."""
+
+        def run(*args):
+            try:
+                return handler(*args)
+            finally:
+                self.request()
+
+        return run
+
+
+def install(screen, fps=FPS):
+    """Create the batcher for ``screen`` that ``request_frame`` reports to."""
+    global _installed
+    _installed = FrameBatcher(screen, fps)
+    return _installed
+
+
+def uninstall():
+    global _installed
+    _installed = None
+
+
+def request_frame():
+    if _installed is not None:
+        _installed.request()
@@ -0,0 +1,322 @@
+"""
+Replay of logged games with snapshot seeking.
+
+A ``Replay`` holds the records of one game from a ``gamelog`` file, led
+by a bare two-byte GAME record with the first player, and
+the state code (``statecode.encode``) after every ``every``-th record.
+``state_at(turn)`` decodes the nearest snapshot at or before the turn
+and applies only the records after it, so a seek costs one decode plus
+at most ``every`` engine calls however long the game is.
+
+Snapshots are stored next to the log in ``<log>.snap``:
+
+    header   magic "DTSN", u16 every, u32 games
+    firsts   u32 per game + 1: index of the game's first snapshot
+    codes    14 bytes per snapshot
+
+``Playback`` shows a replay on the turtles through
+``client.TurtleAdapter``. The screen draws with ``tracer(0)``, so each
+turn appears at once on the next update; the speed sets how long
+``ontimer`` waits before the next turn.
+
+    python -m replay games.log --index
+    python -m replay games.log --game 3 --speed 4
+"""
+
+import argparse
+import struct
+import sys
+from array import array
+
+import engine
+import statecode
+from engine import BASE, PIECES_PER_PLAYER
+from gamelog import (
+    ACTIVATE,
+    CAPTURE,
+    GAME,
+    MOVE,
+    PASS,
+    RECORD_SIZE,
+    ROLL,
+    games,
+    read_log,
+    record,
+)
+from protocol import PASS as PASS_PIECE, Snapshot, Turn
+
+SNAPSHOT_EVERY = 32
+CODE_BYTES = (statecode.CODE_BITS + 7) // 8
+SNAP_HEADER = struct.Struct("<4sHI")
+SNAP_MAGIC = b"DTSN"
+
+
+def records(data):
+    """Record values of a log as an ``array('H')``."""
+    if len(data) % RECORD_SIZE:
+        raise ValueError("log is cut in the middle of a record")
+    values = array("H")
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def game_records(head, body):
+    """Record values of one game from ``gamelog.games``."""
+    return records(record(GAME, head.first_player) + body)
+
+
+def apply_record(state, value):
+    """Apply one record to ``state`` without checking it."""
+    kind = value & 7
+    if kind == ROLL:
+        engine.apply_roll(state, value >> 5)
+    elif kind == MOVE or kind == ACTIVATE:
+        engine.apply_move(state, (value >> 3) % PIECES_PER_PLAYER)
+    elif kind == PASS:
+        engine.apply_move(state, None)
+
+
+class Replay:
+    """One logged game, seekable by turn."""
+
+    def __init__(self, values, snapshots=None, every=SNAPSHOT_EVERY):
+        if not values or values[0] & 7 != GAME:
+            raise ValueError("a game starts with a GAME record")
+        self.values = values
+        self.first_player = values[0] >> 3
+        self.every = every
+        # Index of the ROLL record that starts each turn
+        self.turn_starts = array(
+            "I", (index for index, value in enumerate(values) if value & 7 == ROLL)
+        )
+        self.snapshots = snapshots if snapshots is not None else self._snapshots()
+
+    @classmethod
+    def from_log(cls, data, game=0, every=SNAPSHOT_EVERY, snapshots=None):
+        logged = games(data)
+        if not 0 <= game < len(logged):
+            raise IndexError(f"the log has {len(logged)} games, not {game + 1}")
+        return cls(game_records(*logged[game]), snapshots, every)
+
+    def _snapshots(self):
+        state = engine.new_game(self.first_player)
+        codes = [statecode.encode(state)]
+        values = self.values
+        every = self.every
+        for index in range(1, len(values)):
+            apply_record(state, values[index])
+            if index % every == 0:
+                codes.append(statecode.encode(state))
+        return codes
+
+    @property
+    def turns(self):
+        return len(self.turn_starts)
+
+    def _position(self, turn):
+        """Record index where ``turn`` starts; the end for ``turns``."""
+        if not 0 <= turn <= self.turns:
+            raise IndexError(f"turn {turn} is outside 0..{self.turns}")
+        return self.turn_starts[turn] if turn < self.turns else len(self.values)
+
+    def state_at(self, turn):
+        """State before ``turn`` is played; ``turns`` gives the final state."""
+        position = self._position(turn)
+        # Snapshot k holds the state after records 0..k*every
+        slot = (position - 1) // self.every
+        state = statecode.decode(self.snapshots[slot])
+        values = self.values
+        for index in range(slot * self.every + 1, position):
+            apply_record(state, values[index])
+        return state
+
+    def turn(self, turn):
+        """``protocol.Turn`` describing what happened in ``turn``."""
+        state = self.state_at(turn)
+        start = self._position(turn)
+        stop = self._position(turn + 1)
+        values = self.values
+        player = state.current_player
+        die = values[start] >> 5
+        piece = PASS_PIECE
+        begin = end = 0
+        captured = 0
+        for index in range(start + 1, stop):
+            value = values[index]
+            kind = value & 7
+            if kind == ACTIVATE:
+                piece = (value >> 3) % PIECES_PER_PLAYER
+                begin, end = BASE, engine.START
+            elif kind == MOVE:
+                global_piece = value >> 3 & 15
+                piece = global_piece % PIECES_PER_PLAYER
+                begin = state.progress[global_piece]
+                end = value >> 7
+            elif kind == CAPTURE:
+                captured |= 1 << (value >> 3)
+        return Turn(player, die, piece, begin, end, captured)
+
+    def states(self):
+        """State after each turn, in order, as one mutated object."""
+        state = engine.new_game(self.first_player)
+        values = self.values
+        starts = list(self.turn_starts) + [len(values)]
+        for turn in range(self.turns):
+            for index in range(starts[turn], starts[turn + 1]):
+                apply_record(state, values[index])
+            yield state
+
+
+def snap_path(log_path):
+    return f"{log_path}.snap"
+
+
+def write_snapshots(log_path, every=SNAPSHOT_EVERY):
+    """Build the snapshot file for every game in the log; return the game count."""
+    logged = games(read_log(log_path))
+    firsts = array("I", [0])
+    codes = bytearray()
+    for head, body in logged:
+        replay = Replay(game_records(head, body), every=every)
+        for code in replay.snapshots:
+            codes += code.to_bytes(CODE_BYTES, "little")
+        firsts.append(firsts[-1] + len(replay.snapshots))
+    if sys.byteorder != "little":
+        firsts.byteswap()
+    with open(snap_path(log_path), "wb") as f:
+        f.write(SNAP_HEADER.pack(SNAP_MAGIC, every, len(logged)))
+        f.write(firsts.tobytes())
+        f.write(codes)
+    return len(logged)
+
+
+def read_snapshots(log_path, game):
+    """``(every, codes)`` of one game from the snapshot file, or None."""
+    try:
+        with open(snap_path(log_path), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    magic, every, games = SNAP_HEADER.unpack_from(data)
+    if magic != SNAP_MAGIC or game >= games:
+        return None
+    firsts = struct.unpack_from(f"<{games + 1}I", data, SNAP_HEADER.size)
+    base = SNAP_HEADER.size + 4 * (games + 1)
+    codes = [
+        int.from_bytes(data[offset:offset + CODE_BYTES], "little")
+        for offset in range(
+            base + firsts[game] * CODE_BYTES,
+            base + firsts[game + 1] * CODE_BYTES,
+            CODE_BYTES,
+        )
+    ]
+    return every, codes
+
+
+def load(log_path, game=0):
+    """Replay of ``game``, with stored snapshots when the snapshot file has them."""
+    stored = read_snapshots(log_path, game)
+    data = read_log(log_path)
+    if stored is None:
+        return Replay.from_log(data, game)
+    every, codes = stored
+    return Replay.from_log(data, game, every, codes)
+
+
+class Playback:
+    """Steps a replay on the turtles of a ``client.TurtleAdapter``."""
+
+    def __init__(self, replay, adapter, screen, speed=1.0):
+        self.replay = replay
+        self.adapter = adapter
+        self.screen = screen
+        self.position = 0
+        self.playing = False
+        self.set_speed(speed)
+        self.seek(0)
+
+    def set_speed(self, turns_per_second):
+        """Change the pace: the milliseconds ``ontimer`` waits between turns."""
+        if turns_per_second <= 0:
+            raise ValueError("speed must be positive")
+        self.speed = turns_per_second
+        self.interval = max(1, round(1000 / turns_per_second))
+
+    def seek(self, turn):
+        """Show the position before ``turn`` at once."""
+        state = self.replay.state_at(turn)
+        self.adapter.show(Snapshot(statecode.encode(state)))
+        self.position = turn
+        self.screen.update()
+
+    def step(self):
+        """Show the next turn; False at the end of the game."""
+        if self.position >= self.replay.turns:
+            return False
+        self.adapter.show(self.replay.turn(self.position))
+        self.position += 1
+        self.screen.update()
+        return True
+
+    def play(self):
+        self.playing = True
+        self._tick()
+
+    def pause(self):
+        self.playing = False
+
+    def _tick(self):
+        if self.playing and self.step():
+            self.screen.ontimer(self._tick, self.interval)
+        else:
+            self.playing = False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m replay", description="Replay logged Dice-Turtle games."
+    )
+    parser.add_argument("log")
+    parser.add_argument("--index", action="store_true", help="write <log>.snap and exit")
+    parser.add_argument("--game", type=int, default=0)
+    parser.add_argument("--turn", type=int, default=0)
+    parser.add_argument("--speed", type=float, default=1.0, help="turns per second")
+    args = parser.parse_args(argv)
+
+    if args.index:
+        print(f"{write_snapshots(args.log)} games indexed")
+        return 0
+
+    import turtle
+
+    from board_image import board_image
+    from client import TurtleAdapter
+    from game import create_game
+    from table import Table
+
+    replay = load(args.log, args.game)
+    screen = turtle.Screen()
+    screen.setup(width=750, height=750)
+    screen.title(f"Dice - replay of game {args.game}")
+    screen.bgpic(str(board_image(750, 750)))
+    for name in ("1", "2", "3", "4", "5", "6", "blank"):
+        screen.addshape(f"./resources/dice_{name}.gif")
+    screen.tracer(0)
+    adapter = TurtleAdapter(create_game(table=Table()), client=None)
+    playback = Playback(replay, adapter, screen, args.speed)
+    playback.seek(args.turn)
+    screen.onkeypress(lambda: playback.pause() if playback.playing else playback.play(), " ")
+    screen.onkeypress(playback.step, "Right")
+    screen.onkeypress(lambda: playback.seek(max(0, playback.position - 1)), "Left")
+    screen.onkeypress(lambda: playback.set_speed(playback.speed * 2), "Up")
+    screen.onkeypress(lambda: playback.set_speed(playback.speed / 2), "Down")
+    screen.listen()
+    playback.play()
+    turtle.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
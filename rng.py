@@ -0,0 +1,90 @@
+"""
+Random sources for dice rolls.
+
+Both generators expose ``randbelow(n)`` like the ``secrets`` module, so they
+can stand in for ``secrets.randbelow`` in ``Dice.roll`` and ``engine.roll``.
+Random bytes are fetched in blocks and turned into rolls in bulk: bytes
+that would bias the result are dropped with ``bytes.translate`` and the
+rest are reduced modulo ``n`` through the same lookup table.
+
+``CryptoDiceRNG``  operating system CSPRNG, one ``os.urandom`` call per block
+``SeededDiceRNG``  reproducible; block ``i`` of stream ``s`` under seed ``k``
+                   is SHAKE-256 of ``(k, s, i)``, so every game can get its
+                   own independent stream and any block can be recomputed
+"""
+
+import hashlib
+import os
+import struct
+
+BLOCK_SIZE = 4096
+
+_TABLES = {}
+
+
+def _table(n):
+    """Translate table and rejected bytes for uniform values below ``n``."""
+    if n not in _TABLES:
+        if not 1 <= n <= 256:
+            raise ValueError(f"n must be between 1 and 256, got {n}")
+        limit = 256 - 256 % n
+        _TABLES[n] = (
+            bytes(value % n for value in range(256)),
+            bytes(range(limit, 256)),
+        )
+    return _TABLES[n]
+
+
+class _BufferedRNG:
+    """Turns blocks of random bytes into buffered values below ``n``."""
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self._buffers = {}
+
+    def _next_block(self):
+        raise NotImplementedError
+
+    def randbelow(self, n):
+        buffer = self._buffers.get(n)
+        if buffer is not None:
+            for value in buffer:
+                return value
+        table, rejected = _table(n)
+        while True:
+            buffer = iter(self._next_block().translate(table, rejected))
+            self._buffers[n] = buffer
+            for value in buffer:
+                return value
+
+    def roll(self):
+        return self.randbelow(6) + 1
+
+
+class CryptoDiceRNG(_BufferedRNG):
+    """Cryptographically secure rolls for live play."""
+
+    def _next_block(self):
+        return os.urandom(self.block_size)
+
+
+class SeededDiceRNG(_BufferedRNG):
+    """Reproducible counter-based rolls, one independent stream per game."""
+
+    def __init__(self, seed=0, stream=0, block_size=BLOCK_SIZE):
+        super().__init__(block_size)
+        self.seed = seed
+        self.stream = stream
+        self.counter = 0
+        self._key = struct.pack("<QQ", seed & (2**64 - 1), stream & (2**64 - 1))
+
+    def spawn(self, stream):
+        """A fresh generator for another stream under the same seed."""
+        return SeededDiceRNG(self.seed, stream, self.block_size)
+
+    def _next_block(self):
+        block = hashlib.shake_256(
+            self._key + self.counter.to_bytes(8, "little")
+        ).digest(self.block_size)
+        self.counter += 1
+        return block
@@ -0,0 +1,477 @@
+"""
+asyncio game server.
+
+Hosts any number of games over the headless ``engine`` on one event loop.
+Clients speak the framed protocol of ``protocol.py``: they ``JOIN`` a
+table, and the seated player whose turn it is sends ``ROLL`` and
+``MOVE``. The server rolls the dice, checks each command against the
+engine rules and broadcasts the result to the table as ``ROLLED`` and
+``MOVED`` deltas. A roll with no legal move is passed automatically.
+
+A table starts once all four seats are taken; everyone then gets a
+``SNAPSHOT``. A player who disconnects frees their seat, and anyone
+joining that table by number takes it over. Table ids are never reused
+in a run, since a seeded server picks each table's dice stream by its
+id: once a table is released, joining its number gets ``NO_GAME``.
+
+Spectators ``WATCH`` a table. Each turn is encoded once as a ``TURN``
+delta and the same bytes are written to every watcher. A table keeps a
+snapshot and the delta frames since it; a late joiner gets both in one
+write, and every ``SNAPSHOT_EVERY`` turns the snapshot is renewed and
+the backlog dropped.
+
+Given a ``gamelog.LogWriter``, every table hands its events to the log
+as they happen, with the game id and the server's seed in the GAME
+record. The log is flushed every ``LOG_FLUSH_EVERY`` seconds, so a
+crash loses at most that much of the games in play.
+
+Each connection is a bare ``asyncio.Protocol``, and pushes are plain
+``transport.write`` calls that never wait on the client. A client that
+stops reading is dropped once ``max_buffer`` bytes are queued for it,
+so a slow peer cannot stall the loop or grow memory without bound.
+
+    python -m server --port 8765
+"""
+
+import argparse
+import asyncio
+import sys
+from collections import deque
+
+import engine
+from engine import MOVE as MOVE_PHASE, NUM_PLAYERS, PIECES_PER_PLAYER, ROLL as ROLL_PHASE
+from protocol import (
+    ALREADY_SEATED,
+    ANY_GAME,
+    BAD_FRAME,
+    GAME_FULL,
+    GAME_OVER,
+    ILLEGAL,
+    NOT_SEATED,
+    NOT_STARTED,
+    NOT_YOUR_TURN,
+    NO_GAME,
+    PASS,
+    Error,
+    FrameReader,
+    Join,
+    Move,
+    Moved,
+    Roll,
+    Rolled,
+    Seated,
+    Turn,
+    Watch,
+    captured_mask,
+    decode,
+    encode,
+    snapshot,
+)
+from gamelog import GameLog, LogWriter
+from rng import CryptoDiceRNG, SeededDiceRNG
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Bytes queued for one client before it is considered stuck and dropped
+MAX_BUFFER = 64 * 1024
+BACKLOG = 4096
+# Turns between the snapshots sent to late spectators
+SNAPSHOT_EVERY = 64
+# Seconds between flushes of the game log
+LOG_FLUSH_EVERY = 1.0
+
+_ERRORS = {code: encode(Error(code)) for code in range(1, 10)}
+
+
+class ServerGame:
+    """One table: the engine state and the connections in its seats."""
+
+    __slots__ = (
+        "id",
+        "state",
+        "seats",
+        "randbelow",
+        "watchers",
+        "base",
+        "backlog",
+        "events",
+    )
+
+    def __init__(self, game_id, randbelow):
+        self.id = game_id
+        self.state = engine.new_game()
+        self.seats = [None] * NUM_PLAYERS
+        self.randbelow = randbelow
+        self.watchers = set()
+        # Snapshot frame for late spectators and the TURN frames since
+        self.base = encode(snapshot(self.state))
+        self.backlog = bytearray()
+        # gamelog.GameLog while the server keeps a log and the game is on
+        self.events = None
+
+    @property
+    def full(self):
+        return None not in self.seats
+
+    @property
+    def empty(self):
+        return self.seats.count(None) == NUM_PLAYERS
+
+    def free_seat(self):
+        """First empty seat, -1 if the table is full."""
+        for seat, conn in enumerate(self.seats):
+            if conn is None:
+                return seat
+        return -1
+
+    def broadcast(self, frame):
+        """Send the same frame bytes to everyone seated."""
+        for conn in self.seats:
+            if conn is not None:
+                conn.send(frame)
+
+    def publish(self, frame):
+        """Send one encoded ``TURN`` to every watcher and keep it for late ones."""
+        for conn in self.watchers:
+            conn.send(frame)
+        backlog = self.backlog
+        backlog += frame
+        if len(backlog) >= SNAPSHOT_EVERY * len(frame):
+            self.base = encode(snapshot(self.state))
+            backlog.clear()
+
+    def catch_up(self):
+        """Bytes that bring a new watcher to the current state."""
+        return self.base + self.backlog
+
+
+class Connection(asyncio.Protocol):
+    """Server end of one client connection."""
+
+    __slots__ = ("server", "transport", "reader", "game", "seat", "watching")
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.reader = FrameReader()
+        self.game = None
+        self.seat = -1
+        self.watching = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.connections.add(self)
+
+    def data_received(self, data):
+        server = self.server
+        for payload in self.reader.feed(data):
+            try:
+                message = decode(payload)
+            except ValueError:
+                self.send(_ERRORS[BAD_FRAME])
+                continue
+            server.handle(self, message)
+
+    def connection_lost(self, exc):
+        self.server.leave(self)
+
+    def send(self, frame):
+        transport = self.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > self.server.max_buffer:
+            transport.abort()
+            return
+        transport.write(frame)
+
+
+class GameServer:
+    """All tables of one server and the command handlers."""
+
+    def __init__(self, seed=None, max_buffer=MAX_BUFFER, log=None):
+        self.games = {}
+        self.log = log
+        self.connections = set()
+        self.max_buffer = max_buffer
+        self.seed = seed
+        self._rng = CryptoDiceRNG() if seed is None else SeededDiceRNG(seed)
+        self._open = deque()
+        # Ids only go up, so no two tables of a run share a dice stream;
+        # ``_taken`` holds ids at or above ``_next_id`` already joined by number
+        self._next_id = 1
+        self._taken = set()
+        self._server = None
+        self._flusher = None
+        self._handlers = {
+            Join: self._join,
+            Roll: self._roll,
+            Move: self._move,
+            Watch: self._watch,
+        }
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Listen on ``host``:``port``; port 0 picks a free one."""
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(
+            lambda: Connection(self), host, port, backlog=BACKLOG
+        )
+        if self.log is not None:
+            self._flusher = loop.call_later(LOG_FLUSH_EVERY, self._flush_log)
+        return self._server
+
+    def _flush_log(self):
+        self.log.flush()
+        self._flusher = asyncio.get_running_loop().call_later(
+            LOG_FLUSH_EVERY, self._flush_log
+        )
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        self._server.close()
+        for conn in list(self.connections):
+            conn.transport.abort()
+        await self._server.wait_closed()
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        if self.log is not None:
+            self.log.flush()
+
+    # Tables
+
+    def game(self, game_id):
+        """Table ``game_id``, created on first use; None once it has been released."""
+        game = self.games.get(game_id)
+        if game is None:
+            if game_id < self._next_id or game_id in self._taken:
+                return None
+            self._taken.add(game_id)
+            game = self._create(game_id)
+        return game
+
+    def _create(self, game_id):
+        randbelow = (
+            self._rng.randbelow
+            if self.seed is None
+            else self._rng.spawn(game_id).randbelow
+        )
+        game = self.games[game_id] = ServerGame(game_id, randbelow)
+        if self.log is not None:
+            game.events = GameLog(game.state.current_player, game_id, self.seed, self.log)
+        return game
+
+    def _open_game(self):
+        """A table with a free seat, a new one if there is none."""
+        open_ids = self._open
+        while open_ids:
+            game = self.games.get(open_ids[0])
+            if game is not None and not game.state.is_over and not game.full:
+                return game
+            open_ids.popleft()
+        game_id = self._next_id
+        while game_id in self._taken:
+            self._taken.remove(game_id)
+            game_id += 1
+        self._next_id = game_id + 1
+        game = self._create(game_id)
+        open_ids.append(game.id)
+        return game
+
+    # Commands
+
+    def handle(self, conn, message):
+        handler = self._handlers.get(type(message))
+        if handler is None:
+            conn.send(_ERRORS[BAD_FRAME])
+        else:
+            handler(conn, message)
+
+    def _join(self, conn, message):
+        if conn.game is not None:
+            conn.send(_ERRORS[ALREADY_SEATED])
+            return
+        if message.game == ANY_GAME:
+            game = self._open_game()
+        else:
+            game = self.game(message.game)
+            if game is None:
+                conn.send(_ERRORS[NO_GAME])
+                return
+        seat = game.free_seat()
+        if seat < 0:
+            conn.send(_ERRORS[GAME_FULL])
+            return
+        game.seats[seat] = conn
+        conn.game = game
+        conn.seat = seat
+        conn.send(encode(Seated(game.id, seat)))
+        frame = encode(snapshot(game.state))
+        if game.full:
+            game.broadcast(frame)
+        else:
+            conn.send(frame)
+
+    def _watch(self, conn, message):
+        game = self.games.get(message.game)
+        if game is None:
+            conn.send(_ERRORS[NO_GAME])
+            return
+        if conn.watching is not None:
+            conn.watching.watchers.discard(conn)
+        conn.watching = game
+        game.watchers.add(conn)
+        conn.send(game.catch_up())
+
+    def _turn(self, conn):
+        """``conn``'s table if it may act now, else None after an error."""
+        game = conn.game
+        if game is None:
+            error = NOT_SEATED
+        elif game.state.is_over:
+            error = GAME_OVER
+        elif not game.full:
+            error = NOT_STARTED
+        elif game.state.current_player != conn.seat:
+            error = NOT_YOUR_TURN
+        else:
+            return game
+        conn.send(_ERRORS[error])
+        return None
+
+    def _roll(self, conn, message):
+        game = self._turn(conn)
+        if game is None:
+            return
+        state = game.state
+        if state.phase != ROLL_PHASE:
+            conn.send(_ERRORS[ILLEGAL])
+            return
+        die = engine.roll(state, game.randbelow)
+        if game.events is not None:
+            game.events.roll(state.current_player, die)
+        game.broadcast(encode(Rolled(state.current_player, die)))
+        if not engine.legal_moves(state):
+            self._apply(game, None)
+
+    def _move(self, conn, message):
+        game = self._turn(conn)
+        if game is None:
+            return
+        state = game.state
+        if state.phase != MOVE_PHASE or not (
+            message.piece < PIECES_PER_PLAYER and engine.can_move(state, message.piece)
+        ):
+            conn.send(_ERRORS[ILLEGAL])
+            return
+        self._apply(game, message.piece)
+
+    def _apply(self, game, piece):
+        state = game.state
+        player = state.current_player
+        events = game.events
+        if piece is None:
+            start = end = 0
+            captured = engine.apply_move(state, None)
+            piece = PASS
+            if events is not None:
+                events.pass_turn(player)
+        else:
+            index = player * PIECES_PER_PLAYER + piece
+            start = state.progress[index]
+            captured = engine.apply_move(state, piece)
+            end = state.progress[index]
+            if events is not None:
+                events.move(index, start, end, captured, state.winner == player)
+        if state.is_over:
+            game.events = None
+        mask = captured_mask(captured)
+        game.broadcast(encode(Moved(player, piece, start, end, mask)))
+        game.publish(encode(Turn(player, state.die, piece, start, end, mask)))
+
+    def leave(self, conn):
+        self.connections.discard(conn)
+        watched = conn.watching
+        if watched is not None:
+            conn.watching = None
+            watched.watchers.discard(conn)
+            self._release(watched)
+        game = conn.game
+        if game is None:
+            return
+        conn.game = None
+        game.seats[conn.seat] = None
+        if not game.empty and not game.state.is_over:
+            self._open.append(game.id)
+        self._release(game)
+
+    def _release(self, game):
+        """Forget a table nobody plays at or watches."""
+        if game.empty and not game.watchers and self.games.get(game.id) is game:
+            del self.games[game.id]
+
+
+class LagMonitor:
+    """Samples event-loop lag: how late a short sleep wakes up.
+
+    A loop kept busy by callbacks wakes its sleepers late, so the samples
+    show how long commands waited behind other work.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        interval = self.interval
+        samples = self.samples
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            samples.append(max(0.0, loop.time() - start - interval))
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, seed=None, log_path=None):
+    """Run a server until cancelled, logging games to ``log_path`` if given."""
+    log = LogWriter(log_path) if log_path is not None else None
+    server = GameServer(seed, log=log)
+    listener = await server.start(host, port)
+    print(f"serving on {server.address[0]}:{server.address[1]}")
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+        if log is not None:
+            log.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m server", description="Host networked Dice-Turtle games."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--log", default=None, help="append game events to this file")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.seed, args.log))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Headless tournament runner for Dice-Turtle.
+
+Plays many games between move policies on the ``engine`` rules, spread
+over a process pool, and prints per-seat results:
+
+    python -m simulate --games 100000 --seats random,furthest,capture,first
+
+Game ``g`` rolls from its own ``SeededDiceRNG`` stream ``g`` under
+``--seed`` and seeds its policies from the same pair, so every game can be
+replayed on its own and totals do not depend on the number of workers.
+Shard results are merged as they complete. Nothing here imports ``turtle``.
+"""
+
+import argparse
+import os
+import random
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import engine
+from engine import NUM_PLAYERS
+from expectimax import ExpectimaxBot
+from rng import SeededDiceRNG
+
+
+def random_policy(state, moves, rng):
+    return rng.choice(moves)
+
+
+def first_policy(state, moves, rng):
+    return moves[0]
+
+
+def furthest_policy(state, moves, rng):
+    """Advance the piece closest to the centre."""
+    progress = state.player_progress(state.current_player)
+    return max(moves, key=lambda piece: progress[piece])
+
+
+def capture_policy(state, moves, rng):
+    """Prefer a move that captures, then one that leaves base, then the furthest."""
+    for piece in moves:
+        trial = state.copy()
+        if engine.apply_move(trial, piece):
+            return piece
+    progress = state.player_progress(state.current_player)
+    for piece in moves:
+        if progress[piece] == engine.BASE:
+            return piece
+    return furthest_policy(state, moves, rng)
+
+
+POLICIES = {
+    "random": random_policy,
+    "first": first_policy,
+    "furthest": furthest_policy,
+    "capture": capture_policy,
+    # Fixed depth instead of a time budget, so games replay exactly.
+    "expectimax": ExpectimaxBot(time_budget=None, max_depth=2),
+}
+
+
+class Tally:
+    """Mergeable totals over a set of games."""
+
+    def __init__(self):
+        self.games = 0
+        self.wins = [0] * NUM_PLAYERS
+        self.captures = [0] * NUM_PLAYERS
+        self.turns = 0
+        self.turns_sq = 0
+        self.shortest = None
+        self.longest = 0
+        self.unfinished = 0
+
+    def add_game(self, winner, turns, captures):
+        self.games += 1
+        if winner == -1:
+            self.unfinished += 1
+        else:
+            self.wins[winner] += 1
+        for seat in range(NUM_PLAYERS):
+            self.captures[seat] += captures[seat]
+        self.turns += turns
+        self.turns_sq += turns * turns
+        self.longest = max(self.longest, turns)
+        self.shortest = turns if self.shortest is None else min(self.shortest, turns)
+
+    def merge(self, other):
+        self.games += other.games
+        self.unfinished += other.unfinished
+        for seat in range(NUM_PLAYERS):
+            self.wins[seat] += other.wins[seat]
+            self.captures[seat] += other.captures[seat]
+        self.turns += other.turns
+        self.turns_sq += other.turns_sq
+        self.longest = max(self.longest, other.longest)
+        if other.shortest is not None:
+            self.shortest = (
+                other.shortest
+                if self.shortest is None
+                else min(self.shortest, other.shortest)
+            )
+        return self
+
+    @property
+    def mean_turns(self):
+        return self.turns / self.games if self.games else 0.0
+
+    def __eq__(self, other):
+        return isinstance(other, Tally) and vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"Tally(games={self.games}, wins={self.wins})"
+
+
+def play_game(policies, rng, dice, max_turns=20_000):
+    """Play one game; return ``(winner, turns, captures per seat)``.
+
+    ``dice`` supplies ``randbelow`` for the rolls, ``rng`` is handed to
+    the policies.
+    """
+    state = engine.new_game()
+    captures = [0] * NUM_PLAYERS
+    turns = 0
+    while not state.is_over and turns < max_turns:
+        engine.roll(state, dice.randbelow)
+        moves = engine.legal_moves(state)
+        player = state.current_player
+        piece = policies[player](state, moves, rng) if moves else None
+        captures[player] += len(engine.apply_move(state, piece))
+        turns += 1
+    return state.winner, turns, captures
+
+
+def game_seed(seed, game):
+    return (seed << 32) | game
+
+
+def replay_game(seat_names, seed, game):
+    """Play game number ``game`` of a run again, with the same dice and choices."""
+    policies = [POLICIES[name] for name in seat_names]
+    return play_game(
+        policies, random.Random(game_seed(seed, game)), SeededDiceRNG(seed, game)
+    )
+
+
+def run_shard(seat_names, seed, first_game, games):
+    """Play games ``first_game`` onwards in one worker and return their ``Tally``."""
+    tally = Tally()
+    for game in range(first_game, first_game + games):
+        tally.add_game(*replay_game(seat_names, seed, game))
+    return tally
+
+
+def _shards(games, shard_size):
+    for first_game in range(0, games, shard_size):
+        yield first_game, min(shard_size, games - first_game)
+
+
+def simulate(seat_names, games, workers=None, seed=0, shard_size=1000):
+    """Play ``games`` games across ``workers`` processes and merge the tallies.
+
+    At most two shards per worker are in flight, so memory stays flat no
+    matter how many games are requested.
+    """
+    for name in seat_names:
+        if name not in POLICIES:
+            raise ValueError(f"unknown policy {name!r}")
+    if len(seat_names) != NUM_PLAYERS:
+        raise ValueError(f"expected {NUM_PLAYERS} seats, got {len(seat_names)}")
+    workers = workers or os.cpu_count() or 1
+    total = Tally()
+    shards = _shards(games, shard_size)
+    if workers == 1:
+        for first_game, size in shards:
+            total.merge(run_shard(seat_names, seed, first_game, size))
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for first_game, size in shards:
+            pending.add(pool.submit(run_shard, seat_names, seed, first_game, size))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total.merge(future.result())
+        for future in pending:
+            total.merge(future.result())
+    return total
+
+
+def format_tally(tally, seat_names):
+    lines = [
+        f"games: {tally.games}  turns: mean {tally.mean_turns:.1f}, "
+        f"min {tally.shortest}, max {tally.longest}",
+        f"{'seat':<6}{'policy':<10}{'wins':>10}{'win %':>9}{'captures':>10}",
+    ]
+    for seat, name in enumerate(seat_names):
+        share = 100 * tally.wins[seat] / tally.games if tally.games else 0.0
+        lines.append(
+            f"{seat:<6}{name:<10}{tally.wins[seat]:>10}{share:>8.2f}%"
+            f"{tally.captures[seat]:>10}"
+        )
+    if tally.unfinished:
+        lines.append(f"unfinished: {tally.unfinished}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m simulate", description="Play headless Dice-Turtle games."
+    )
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument(
+        "--seats",
+        default="random,random,random,random",
+        help="comma separated policies for seats 0-3: " + ", ".join(POLICIES),
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--shard-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    seat_names = args.seats.split(",")
+    try:
+        tally = simulate(
+            seat_names, args.games, args.workers, args.seed, args.shard_size
+        )
+    except ValueError as error:
+        parser.error(str(error))
+    print(format_tally(tally, seat_names))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Compact game state codes and Zobrist hashes.
+
+``encode`` packs a ``GameState`` into one integer of at most 110 bits,
+which ``split`` cuts into two 64-bit words for NumPy or ``struct``
+storage:
+
+    bits   0-95   progress + 2 of piece i in bits 6i .. 6i+5
+    bits  96-97   current_player
+    bits  98-99   six_streak
+    bits 100-102  die
+    bits 103-105  prev_die
+    bit  106      phase
+    bits 107-109  winner + 1
+
+Codes are lossless (``decode(encode(state)) == state``) and equal states
+have equal codes, so they can key dicts and sets directly.
+
+``zobrist`` hashes the part of a state that matters for play: piece
+positions, side to move, six streak, die and phase. ``apply_roll`` and
+``apply_move`` run the engine rules and update a hash incrementally by
+XOR-ing out the keys that changed and XOR-ing in the new ones.
+"""
+
+import random
+
+import engine
+from engine import NUM_PIECES, NUM_PLAYERS, PATH_LEN, BASE
+
+PROGRESS_BITS = 6
+PROGRESS_VALUES = PATH_LEN - BASE + 1
+PROGRESS_MASK = (1 << PROGRESS_BITS) - 1
+SIDE_SHIFT = NUM_PIECES * PROGRESS_BITS
+WORD_MASK = (1 << 64) - 1
+
+_PLAYER_SHIFT = SIDE_SHIFT
+_STREAK_SHIFT = SIDE_SHIFT + 2
+_DIE_SHIFT = SIDE_SHIFT + 4
+_PREV_DIE_SHIFT = SIDE_SHIFT + 7
+_PHASE_SHIFT = SIDE_SHIFT + 10
+_WINNER_SHIFT = SIDE_SHIFT + 11
+CODE_BITS = _WINNER_SHIFT + 3
+
+
+def encode(state):
+    """Pack ``state`` into a single integer."""
+    code = 0
+    shift = 0
+    for pos in state.progress:
+        code |= (pos - BASE) << shift
+        shift += PROGRESS_BITS
+    return (
+        code
+        | state.current_player << _PLAYER_SHIFT
+        | state.six_streak << _STREAK_SHIFT
+        | state.die << _DIE_SHIFT
+        | state.prev_die << _PREV_DIE_SHIFT
+        | state.phase << _PHASE_SHIFT
+        | (state.winner + 1) << _WINNER_SHIFT
+    )
+
+
+def decode(code):
+    """Rebuild the ``GameState`` packed by ``encode``."""
+    state = engine.GameState()
+    state.progress = [
+        ((code >> (index * PROGRESS_BITS)) & PROGRESS_MASK) + BASE
+        for index in range(NUM_PIECES)
+    ]
+    state.current_player = (code >> _PLAYER_SHIFT) & 3
+    state.six_streak = (code >> _STREAK_SHIFT) & 3
+    state.die = (code >> _DIE_SHIFT) & 7
+    state.prev_die = (code >> _PREV_DIE_SHIFT) & 7
+    state.phase = (code >> _PHASE_SHIFT) & 1
+    state.winner = ((code >> _WINNER_SHIFT) & 7) - 1
+    return state
+
+
+def with_progress(code, index, pos):
+    """``code`` with piece ``index`` moved to ``pos``, in constant time."""
+    shift = index * PROGRESS_BITS
+    return (code & ~(PROGRESS_MASK << shift)) | (pos - BASE) << shift
+
+
+def progress_of(code, index):
+    return ((code >> (index * PROGRESS_BITS)) & PROGRESS_MASK) + BASE
+
+
+def split(code):
+    """``(low, high)`` 64-bit words of ``code``."""
+    return code & WORD_MASK, code >> 64
+
+
+def join(low, high):
+    return int(low) | int(high) << 64
+
+
+# Keys come from a fixed seed so hashes are the same in every process.
+_keys = random.Random(0x5A0B2157)
+PIECE_KEYS = tuple(
+    tuple(_keys.getrandbits(64) for _ in range(PROGRESS_VALUES))
+    for _ in range(NUM_PIECES)
+)
+# SIDE_KEYS[player][six_streak][die][phase]
+SIDE_KEYS = tuple(
+    tuple(
+        tuple(
+            tuple(_keys.getrandbits(64) for _ in range(2))
+            for _ in range(7)
+        )
+        for _ in range(engine.MAX_SIX_STREAK + 1)
+    )
+    for _ in range(NUM_PLAYERS)
+)
+del _keys
+
+
+def piece_key(index, pos):
+    return PIECE_KEYS[index][pos - BASE]
+
+
+def side_key(state):
+    """Key for everything in ``state`` except piece positions."""
+    return SIDE_KEYS[state.current_player][state.six_streak][state.die][state.phase]
+
+
+def zobrist(state):
+    """Full Zobrist hash of ``state``; later updates can be incremental."""
+    h = side_key(state)
+    for index, pos in enumerate(state.progress):
+        h ^= PIECE_KEYS[index][pos - BASE]
+    return h
+
+
+def apply_roll(state, value, h):
+    """``engine.apply_roll`` that returns the updated hash ``h``."""
+    before = side_key(state)
+    engine.apply_roll(state, value)
+    return h ^ before ^ side_key(state)
+
+
+def apply_move(state, piece, h):
+    """``engine.apply_move`` that returns ``(captured, updated hash)``."""
+    before = side_key(state)
+    player = state.current_player
+    progress = state.progress[:]
+    captured = engine.apply_move(state, piece)
+    h ^= before ^ side_key(state)
+    if piece is not None:
+        index = player * engine.PIECES_PER_PLAYER + piece
+        keys = PIECE_KEYS[index]
+        h ^= keys[progress[index] - BASE] ^ keys[state.progress[index] - BASE]
+        for other in captured:
+            keys = PIECE_KEYS[other]
+            h ^= keys[progress[other] - BASE] ^ keys[0]
+    return captured, h
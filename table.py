@@ -0,0 +1,77 @@
+"""
+Per-game state for the turtle front end.
+
+``Piece``, ``Dice``, ``Player`` and ``Action`` used to keep the state of
+the one running game in class attributes, so a process could hold only
+one game. A ``Table`` holds that state for one game instead; every turtle
+built with ``table=`` reads and writes its own table, and any number of
+tables can live side by side.
+
+The per-game state is everything in ``Table.__slots__``; a turtle keeps
+it in ``self.table``. Turtles built without a table keep using the class
+attributes, which is what the single-window ``main`` did before and what
+existing code that sets ``Dice.current_value`` or ``Player.current_player``
+still expects.
+
+``footprint`` measures the memory of objects such as a ``Table``. That
+is the game's state alone, about 1.6 KB; the 19 turtles each game draws
+with are not counted.
+"""
+
+import tracemalloc
+
+NUM_PLAYERS = 4
+
+
+class Table:
+    """Mutable state of one game, shared by its turtles."""
+
+    __slots__ = (
+        "current_player",
+        "prev_value",
+        "current_value",
+        "consecutive_six",
+        "allow_rolling",
+        "rng",
+        "allow_moving",
+        "piece_status",
+        "next_player",
+        "board_cells",
+        "player",
+        "action",
+        "pieces",
+    )
+
+    def __init__(self, rng=None):
+        # Player
+        self.current_player = -1
+        # Dice
+        self.prev_value = 0
+        self.current_value = 0
+        self.consecutive_six = 0
+        self.allow_rolling = True
+        self.rng = rng
+        # Piece
+        self.allow_moving = False
+        self.piece_status = {
+            player: {"available": 4, "active": 0} for player in range(NUM_PLAYERS)
+        }
+        self.next_player = True
+        self.board_cells = {}
+        # Turtles of this game, set by game.create_game
+        self.player = None
+        self.action = None
+        self.pieces = {player: [] for player in range(NUM_PLAYERS)}
+
+
+def footprint(factory, count=1000):
+    """Average bytes allocated per object when ``count`` of them are alive."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [factory() for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del objects
+    return (after - before) / count
@@ -0,0 +1,443 @@
+"""
+Endgame tablebase for the race home.
+
+The game ends as soon as one player brings all four pieces home, so
+every position of a game in progress has at least one unfinished piece
+for each of the four players. The tablebase solves the endgames a game
+runs into once every unfinished piece is in its player's home column
+(progress ``HOME_FIRST`` .. PATH_LEN - 1): at most ``pieces``
+unfinished pieces over all four seats, any seat to roll and any six
+streak. Home squares cannot be captured, so pieces only move forward
+and such a position only leads to others like it; the pieces still
+have to land exactly on ``PATH_LEN``, so with two or more in a column
+which one to move matters. Out on the ring a capture sends a piece back
+to base and every square of the board becomes reachable again, which no
+table of this kind could hold.
+
+Seats are numbered from the seat to roll, in turn order, which is the
+same for every seat because the home columns are alike. Pieces of one
+seat are interchangeable, so a seat's unfinished pieces are a multiset
+of home squares and are numbered by their colex rank. Positions are
+grouped in layers by how many pieces each seat has left, and layers by
+their total. Finishing a piece only leads to a smaller total, so totals
+are solved from the fewest pieces up (retrograde), each by value
+iteration over its passes until no value moves by more than
+``TOLERANCE``. Every seat plays to maximize its own chance to win.
+
+The table holds one ``RECORD`` per position, indexed by ``index``:
+
+    win     chance of each seat to win, times 65535, from the seat to roll
+    moves   best move for each die 1-6, two bits each: which of the
+            seat's sorted pieces to move
+
+File layout:
+
+    header   magic "DTTB", u16 version, u8 pieces, u8 totals, one done
+             flag per total
+    records  ``RECORD`` per position, from offset ``ALIGN``
+
+Generation writes each total into the mapped file and then sets its
+done flag, so an interrupted run picks up at the first total not done.
+Successors of a layer are built in worker processes.
+
+    python -m tablebase generate endgame.dtb --pieces 6
+    python -m tablebase probe endgame.dtb --seat0=53,55 --seat1=51 --seat2=54 --seat3=52
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import combinations_with_replacement, product
+from math import comb
+
+import numpy as np
+
+import engine
+from engine import MOVE, NUM_PLAYERS, PATH_LEN, PIECES_PER_PLAYER, ROLL
+from track import HOME_ENTRY
+
+MAGIC = b"DTTB"
+VERSION = 2
+HEADER = struct.Struct("<4sHBB")
+ALIGN = 64
+RECORD = np.dtype([("win", "<u2", (NUM_PLAYERS,)), ("moves", "<u2")])
+
+# Home squares HOME_FIRST .. PATH_LEN - 1 as 0 .. POSITIONS - 1
+HOME_FIRST = HOME_ENTRY + 1
+POSITIONS = PATH_LEN - HOME_FIRST
+MIN_PIECES = NUM_PLAYERS
+MAX_PIECES = NUM_PLAYERS * PIECES_PER_PLAYER
+STREAKS = engine.MAX_SIX_STREAK + 1
+DICE = 6
+WIN = -1
+NONE = -2
+SCALE = 65535
+TOLERANCE = 1e-9
+MAX_SWEEPS = 100_000
+CHUNK_CONFIGS = 4096
+
+
+def multisets(count):
+    """Multisets of ``count`` home squares; ``rank`` numbers them 0 .. multisets - 1."""
+    return comb(POSITIONS + count - 1, count)
+
+
+def rank(positions):
+    """Colex rank of sorted ``positions`` (each in 0 .. POSITIONS - 1)."""
+    return sum(comb(x + i, i + 1) for i, x in enumerate(positions))
+
+
+@lru_cache(maxsize=None)
+def unranked(count):
+    """Every multiset of ``count`` home squares as sorted tuples, by rank."""
+    table = [None] * multisets(count)
+    for positions in combinations_with_replacement(range(POSITIONS), count):
+        table[rank(positions)] = positions
+    return table
+
+
+def layers(pieces):
+    """Piece counts of the four seats, from the seat to roll, fewest pieces first."""
+    counts = range(1, PIECES_PER_PLAYER + 1)
+    return sorted(
+        (layer for layer in product(counts, repeat=NUM_PLAYERS) if sum(layer) <= pieces),
+        key=lambda layer: (sum(layer), layer),
+    )
+
+
+def layer_configs(layer):
+    """Positions of the four seats in ``layer``."""
+    size = 1
+    for count in layer:
+        size *= multisets(count)
+    return size
+
+
+class Layout:
+    """Where each layer's and each total's positions start in the table."""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.layers = layers(pieces)
+        self.totals = list(range(MIN_PIECES, pieces + 1))
+        self.offsets = {}
+        self.spans = {}
+        offset = 0
+        for layer in self.layers:
+            total = sum(layer)
+            first, _ = self.spans.get(total, (offset, offset))
+            self.offsets[layer] = offset
+            offset += layer_configs(layer)
+            self.spans[total] = (first, offset)
+        # Offsets count configs; a config holds STREAKS records
+        self.configs = offset
+        self.records = offset * STREAKS
+
+    def config(self, seats):
+        """Config number of four sorted position tuples, the seat to roll first."""
+        number = 0
+        for positions in seats:
+            number = number * multisets(len(positions)) + rank(positions)
+        return self.offsets[tuple(len(positions) for positions in seats)] + number
+
+
+def successors(pieces, layer, first_rank, last_rank):
+    """Successor configs of a range of multisets of the seat to roll in ``layer``.
+
+    Returns int32 ``[config, die - 1, option]``, with one option per
+    piece of the seat to roll: the config after moving its
+    ``option``-th sorted piece, ``WIN`` when that move wins and ``NONE``
+    when it is illegal or repeats an equal piece. A roll with no legal
+    move has the pass in option 0. A six keeps the turn; any other die
+    renumbers the seats from the next one.
+    """
+    layout = Layout(pieces)
+    others = list(product(*(unranked(count) for count in layer[1:])))
+    out = np.full(
+        ((last_rank - first_rank) * len(others), DICE, layer[0]), NONE, np.int32
+    )
+    row = 0
+    for own in unranked(layer[0])[first_rank:last_rank]:
+        for rest in others:
+            for die in range(1, DICE + 1):
+                keeps = die == 6
+                moves = out[row, die - 1]
+                for option, pos in enumerate(own):
+                    if option and own[option - 1] == pos:
+                        continue
+                    moved = pos + die
+                    if moved > POSITIONS:
+                        continue
+                    left = own[:option] + own[option + 1:]
+                    if moved < POSITIONS:
+                        left = tuple(sorted(left + (moved,)))
+                    elif not left:
+                        moves[option] = WIN
+                        continue
+                    seats = (left,) + rest if keeps else rest + (left,)
+                    moves[option] = layout.config(seats)
+                if (moves == NONE).all():
+                    moves[0] = layout.config((own,) + rest if keeps else rest + (own,))
+            row += 1
+    return out
+
+
+def _layer_successors(pieces, layer, workers):
+    count = multisets(layer[0])
+    step = max(1, CHUNK_CONFIGS * count // layer_configs(layer))
+    ranges = [(start, min(count, start + step)) for start in range(0, count, step)]
+    args = [(pieces, layer, start, stop) for start, stop in ranges]
+    if workers > 1 and len(ranges) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(successors, *zip(*args)))
+    else:
+        parts = [successors(*arg) for arg in args]
+    return np.concatenate(parts)
+
+
+def _total_successors(layout, total, workers):
+    """Successors of every layer of ``total``, padded to four options."""
+    parts = []
+    for layer in layout.layers:
+        if sum(layer) == total:
+            targets = _layer_successors(layout.pieces, layer, workers)
+            padded = np.full(targets.shape[:2] + (PIECES_PER_PLAYER,), NONE, np.int32)
+            padded[:, :, :layer[0]] = targets
+            parts.append(padded)
+    return np.concatenate(parts)
+
+
+# Probability of each die after 0, 1 and 2 sixes in a row
+_DIE_WEIGHTS = np.array(
+    [[1.0 / faces if die <= faces else 0.0 for die in range(1, DICE + 1)] for faces in engine.ROLL_FACES]
+)
+# Streak after rolling each die, from each streak; the impossible third
+# six points at streak 0 and has weight 0
+_NEXT_STREAK = np.array(
+    [[streak + 1 if die == 6 and streak + 1 < STREAKS else 0 for die in range(1, DICE + 1)]
+     for streak in range(STREAKS)]
+)
+# Win chances of the next seat's numbering seen from the seat before it
+_PASSED = np.roll(np.arange(NUM_PLAYERS), 1)
+_WON = np.eye(NUM_PLAYERS)[0]
+
+
+def _option_values(values, targets, streak):
+    """Win chances of every option ``[config, die - 1, option, seat]``, and their scores."""
+    index = np.maximum(targets, 0).astype(np.int64) * STREAKS
+    index += _NEXT_STREAK[streak][None, :, None]
+    options = values[index]
+    options[:, :DICE - 1] = options[:, :DICE - 1][..., _PASSED]
+    options[targets == WIN] = _WON
+    scores = np.where(targets == NONE, -1.0, options[..., 0])
+    return options, scores
+
+
+def solve_total(values, targets, start):
+    """Value-iterate one total in ``values`` (records from ``start``); return best options."""
+    configs = len(targets)
+    current = values[start:start + configs * STREAKS].reshape(configs, STREAKS, NUM_PLAYERS)
+    rows = np.arange(configs)[:, None]
+    dice = np.arange(DICE)[None, :]
+    for _ in range(MAX_SWEEPS):
+        change = 0.0
+        for streak in range(STREAKS):
+            for first in range(0, configs, CHUNK_CONFIGS):
+                chunk = slice(first, first + CHUNK_CONFIGS)
+                options, scores = _option_values(values, targets[chunk], streak)
+                best = options[rows[:len(options)], dice, scores.argmax(axis=2)]
+                updated = np.einsum("cds,d->cs", best, _DIE_WEIGHTS[streak])
+                change = max(change, float(np.abs(updated - current[chunk, streak]).max()))
+                current[chunk, streak] = updated
+        if change < TOLERANCE:
+            break
+    else:
+        raise ArithmeticError("the total did not converge")
+    moves = np.zeros((configs, STREAKS), np.uint16)
+    for streak in range(STREAKS):
+        for first in range(0, configs, CHUNK_CONFIGS):
+            chunk = slice(first, first + CHUNK_CONFIGS)
+            choice = _option_values(values, targets[chunk], streak)[1].argmax(axis=2)
+            for die in range(DICE):
+                moves[chunk, streak] |= choice[:, die].astype(np.uint16) << (2 * die)
+    return moves.ravel()
+
+
+def _records_offset(total_count):
+    return -(-(HEADER.size + total_count) // ALIGN) * ALIGN
+
+
+def generate(path, pieces=6, workers=None, log=None):
+    """Solve every total not yet done in the table at ``path``; return the Layout."""
+    if not MIN_PIECES <= pieces <= MAX_PIECES:
+        raise ValueError(f"pieces must be between {MIN_PIECES} and {MAX_PIECES}")
+    workers = workers or os.cpu_count() or 1
+    layout = Layout(pieces)
+    count = len(layout.totals)
+    offset = _records_offset(count)
+    header = HEADER.pack(MAGIC, VERSION, pieces, count)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read(HEADER.size) != header:
+                raise ValueError(f"{path} holds a different tablebase")
+    else:
+        with open(path, "wb") as f:
+            f.write(header + bytes(count))
+            f.truncate(offset + RECORD.itemsize * layout.records)
+    flags = np.memmap(path, np.uint8, "r+", HEADER.size, (count,))
+    records = np.memmap(path, RECORD, "r+", offset, (layout.records,))
+    values = records["win"].astype(np.float64) / SCALE
+    for number, total in enumerate(layout.totals):
+        if flags[number]:
+            continue
+        started = time.perf_counter()
+        targets = _total_successors(layout, total, workers)
+        first, _ = layout.spans[total]
+        start = first * STREAKS
+        moves = solve_total(values, targets, start)
+        stop = start + len(moves)
+        quantized = np.rint(values[start:stop] * SCALE).astype(np.uint16)
+        records["win"][start:stop] = quantized
+        records["moves"][start:stop] = moves
+        # Later totals see exactly what a resumed run would read back
+        values[start:stop] = quantized / SCALE
+        records.flush()
+        flags[number] = 1
+        flags.flush()
+        if log is not None:
+            log(f"{total} pieces: {len(moves)} positions in {time.perf_counter() - started:.1f} s")
+    del flags, records
+    return layout
+
+
+class Tablebase:
+    """A generated table, memory-mapped for lookups."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{path} is not a tablebase")
+            magic, version, pieces, count = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} tablebase")
+            flags = f.read(count)
+        self.layout = Layout(pieces)
+        self.pieces = pieces
+        self.done = {total for total, flag in zip(self.layout.totals, flags) if flag}
+        self.records = np.memmap(path, RECORD, "r", _records_offset(count), (self.layout.records,))
+
+    def index(self, state, streak=None):
+        """Record of ``state`` before its roll, or None when the table does not cover it."""
+        if state.is_over:
+            return None
+        seats = []
+        progress = state.progress
+        for turn in range(NUM_PLAYERS):
+            first = (state.current_player + turn) % NUM_PLAYERS * PIECES_PER_PLAYER
+            mine = []
+            for pos in progress[first:first + PIECES_PER_PLAYER]:
+                if pos == PATH_LEN:
+                    continue
+                if pos < HOME_FIRST:
+                    return None
+                mine.append(pos - HOME_FIRST)
+            if not mine:
+                return None
+            seats.append(tuple(sorted(mine)))
+        if sum(len(mine) for mine in seats) not in self.done:
+            return None
+        streak = state.six_streak if streak is None else streak
+        return self.layout.config(seats) * STREAKS + streak
+
+    def win_probabilities(self, state):
+        """Chance of each seat 0-3 to win, or None outside the table."""
+        if state.phase != ROLL:
+            raise ValueError("win_probabilities() needs a state before the roll")
+        index = self.index(state)
+        if index is None:
+            return None
+        shares = self.records[index]["win"] / SCALE
+        return [float(shares[(seat - state.current_player) % NUM_PLAYERS]) for seat in range(NUM_PLAYERS)]
+
+    def win_probability(self, state):
+        """Chance that the seat to roll wins, or None outside the table."""
+        shares = self.win_probabilities(state)
+        return None if shares is None else shares[state.current_player]
+
+    def best_move(self, state):
+        """Piece (0-3) to move after the roll, or None outside the table or on a pass."""
+        if state.phase != MOVE:
+            raise ValueError("best_move() needs a rolled die")
+        die = state.die
+        index = self.index(state, state.six_streak - 1 if die == 6 else 0)
+        if index is None or not engine.legal_moves(state):
+            return None
+        option = int(self.records[index]["moves"]) >> (2 * (die - 1)) & 3
+        first = state.current_player * PIECES_PER_PLAYER
+        mine = sorted(
+            (pos, slot)
+            for slot, pos in enumerate(state.progress[first:first + PIECES_PER_PLAYER])
+            if pos != PATH_LEN
+        )
+        return mine[option][1]
+
+
+def _positions(text):
+    return [int(pos) for pos in text.split(",")] if text else []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m tablebase", description="Generate or probe an endgame tablebase."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate_parser = commands.add_parser("generate", help="solve, or resume solving, a table")
+    generate_parser.add_argument("path")
+    generate_parser.add_argument("--pieces", type=int, default=6)
+    generate_parser.add_argument("--workers", type=int, default=None)
+    probe_parser = commands.add_parser("probe", help="look up one position")
+    probe_parser.add_argument("path")
+    for seat in range(NUM_PLAYERS):
+        probe_parser.add_argument(
+            f"--seat{seat}", default=str(HOME_FIRST),
+            help=f"progress of seat {seat}'s unfinished pieces",
+        )
+    probe_parser.add_argument("--mover", type=int, default=0, choices=range(NUM_PLAYERS))
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        try:
+            layout = generate(args.path, args.pieces, args.workers, log=print)
+        except ValueError as error:
+            parser.error(str(error))
+        print(f"{layout.records} positions, {RECORD.itemsize * layout.records / 1e6:.1f} MB")
+        return 0
+
+    table = Tablebase(args.path)
+    state = engine.new_game(args.mover)
+    for index in range(engine.NUM_PIECES):
+        state.place(index, PATH_LEN)
+    for seat in range(NUM_PLAYERS):
+        for slot, pos in enumerate(_positions(getattr(args, f"seat{seat}"))):
+            state.place(seat * PIECES_PER_PLAYER + slot, pos)
+    shares = None if state.is_over else table.win_probabilities(state)
+    if shares is None:
+        parser.error("the table does not cover that position")
+    print(f"seat {state.current_player} to roll")
+    for seat, share in enumerate(shares):
+        print(f"  seat {seat} wins with probability {share:.5f}")
+    for die in range(1, DICE + 1):
+        after = state.copy()
+        engine.apply_roll(after, die)
+        piece = table.best_move(after)
+        print(f"  die {die}: " + ("pass" if piece is None else f"move piece {piece}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ fixtures used across all test modules.
 """
 
 import pytest
+from contextlib import ExitStack
 from unittest.mock import MagicMock, patch
 import sys
 from pathlib import Path
@@ -38,6 +39,25 @@ def mock_screen():
         yield mock_instance
 
 
+@pytest.fixture
+def headless_turtles():
+    """
+    Fixture that replaces the Turtle drawing methods with mocks, so real
+    Piece, Dice, Player and Action objects can be built without a window.
+    """
+    from turtle import Turtle
+    names = (
+        "clear", "color", "fillcolor", "forward", "goto", "hideturtle",
+        "onclick", "pencolor", "pensize", "penup", "shape", "showturtle",
+        "speed", "write",
+    )
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(Turtle, "__init__", return_value=None))
+        for name in names:
+            stack.enter_context(patch.object(Turtle, name, MagicMock()))
+        yield
+
+
 @pytest.fixture
 def reset_class_variables():
     """
@@ -52,6 +72,7 @@ def reset_class_variables():
         Dice.current_value = 0
         Dice.consecutive_six = 0
         Dice.allow_rolling = True
+        Dice.rng = None
     except ImportError:
         pass
     
@@ -71,6 +92,8 @@ def reset_class_variables():
             3: {"available": 4, "active": 0},
         }
         Piece.next_player = True
+        from piece import board_cells
+        board_cells.clear()
     except ImportError:
         pass
 
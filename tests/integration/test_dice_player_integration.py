@@ -135,11 +135,12 @@ class TestDicePlayerIntegration:
         
         assert Dice.consecutive_six == 2
         
-        # Third six should trigger reroll - mock to return 4 on the reroll
-        with patch('secrets.randbelow', side_effect=[5, 3]):  # Roll 6, then 4 on reroll
+        # Third roll is drawn from 1-5 only - mock to return 4
+        with patch('secrets.randbelow', side_effect=[3]) as mock_random:
             dice.roll()
         
-        # Should have automatically rerolled
+        # A six cannot come up, so no reroll is needed
+        mock_random.assert_called_once_with(5)
         assert Dice.current_value == 4
         assert Dice.consecutive_six == 0
         
@@ -265,6 +265,12 @@ class TestActionGlobalInstance:
                                              mock_color, mock_goto, mock_clear, 
                                              mock_speed, mock_hide, mock_penup, 
                                              mock_init):
-        """Test that action_writer is an instance of Action."""
+        """Test that action_writer builds an Action on first use."""
         from action import action_writer, Action
-        assert isinstance(action_writer, Action)
+        action_writer.reset()
+        try:
+            assert not action_writer.created
+            assert isinstance(action_writer.get(), Action)
+            assert action_writer.get() is action_writer.get()
+        finally:
+            action_writer.reset()
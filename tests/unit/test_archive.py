@@ -0,0 +1,198 @@
+"""
+Unit tests for the compact game archive.
+
+Tests cover turn code packing, per-game headers, blocks and the index,
+random access by game id, replaying archived games through the rules
+and the size of the archive on disk.
+"""
+
+import os
+import random
+
+import numpy as np
+import pytest
+
+import archive
+import engine
+from archive import (
+    ArchiveReader,
+    ArchiveWriter,
+    pack_codes,
+    packed_size,
+    record_game,
+    replay_codes,
+    turn_code,
+    unpack_codes,
+    write_run,
+)
+from rng import SeededDiceRNG
+from simulate import POLICIES, game_seed, replay_game
+
+
+class TestCodes:
+    """Test suite for turn codes and their packing."""
+
+    def test_code_fields(self):
+        """Test die, piece and pass read back from a code."""
+        codes = np.array([turn_code(6, 3), turn_code(1, 0), turn_code(4, None)], np.uint8)
+        assert archive.dice(codes).tolist() == [6, 1, 4]
+        assert archive.pieces(codes).tolist() == [3, 0, 0]
+        assert archive.passes(codes).tolist() == [False, False, True]
+
+    @pytest.mark.parametrize("count", [0, 1, 3, 4, 5, 1001])
+    def test_pack_round_trip(self, count):
+        """Test packing and unpacking returns the same codes."""
+        codes = np.random.default_rng(count).integers(0, 64, count, dtype=np.uint8)
+        data = pack_codes(codes)
+        assert len(data) == packed_size(count)
+        assert unpack_codes(data, count).tolist() == codes.tolist()
+
+    def test_three_bytes_per_four_turns(self):
+        """Test four codes take three bytes."""
+        assert packed_size(4) == 3
+        assert packed_size(400) == 300
+
+
+def write_games(path, games, block_games=archive.BLOCK_GAMES, seed=0):
+    return write_run(path, ["random", "capture", "first", "furthest"], games, seed, block_games)
+
+
+class TestArchive:
+    """Test suite for writing and reading archives."""
+
+    def test_headers_round_trip(self, tmp_path):
+        """Test seeds, seats, winners and first players read back."""
+        path = tmp_path / "a.dta"
+        with ArchiveWriter(path, ["a", "b"], block_games=2) as writer:
+            writer.add(1 << 40, [0, 1, 1, 0], 2, [turn_code(6, 0)], first_player=3)
+            writer.add(5, [1, 1, 1, 1], -1, [], first_player=1)
+            writer.add(2**64 - 1, [0, 0, 0, 0], 0, [turn_code(2, None)] * 3)
+        with ArchiveReader(path) as reader:
+            games = list(reader)
+        assert reader.seat_names == ["a", "b"]
+        assert [game.seed for game in games] == [1 << 40, 5, 2**64 - 1]
+        assert [game.seats.tolist() for game in games] == [
+            [0, 1, 1, 0],
+            [1, 1, 1, 1],
+            [0, 0, 0, 0],
+        ]
+        assert [game.winner for game in games] == [2, -1, 0]
+        assert [game.first_player for game in games] == [3, 1, 0]
+        assert [len(game.codes) for game in games] == [1, 0, 3]
+
+    def test_matches_simulate(self, tmp_path):
+        """Test archived games are the games ``simulate`` plays."""
+        path = tmp_path / "a.dta"
+        seats = ["random", "capture", "first", "furthest"]
+        write_games(path, 6, seed=7)
+        with ArchiveReader(path) as reader:
+            for game in reader:
+                winner, turns, _ = replay_game(seats, 7, game.id)
+                assert game.seed == game_seed(7, game.id)
+                assert game.winner == winner
+                assert len(game.codes) == turns
+
+    def test_replay_reaches_winner(self, tmp_path):
+        """Test replaying the codes through the rules ends with the recorded winner."""
+        path = tmp_path / "a.dta"
+        write_games(path, 5)
+        with ArchiveReader(path) as reader:
+            for game in reader:
+                state = replay_codes(game.codes, game.first_player)
+                assert state.is_over
+                assert state.winner == game.winner
+
+    def test_random_access_across_blocks(self, tmp_path):
+        """Test any game is found by id in a file of many blocks."""
+        path = tmp_path / "a.dta"
+        write_games(path, 23, block_games=5)
+        with ArchiveReader(path) as reader:
+            assert len(reader.index) == 5
+            assert len(reader) == 23
+            every = list(reader)
+            for game_id in (0, 4, 5, 17, 22):
+                game = reader.game(game_id)
+                assert game.id == game_id
+                assert game.codes.tolist() == every[game_id].codes.tolist()
+            with pytest.raises(IndexError):
+                reader.game(23)
+
+    def test_block_read_to_its_end(self, tmp_path, monkeypatch):
+        """Test a block is read up to the next one and its headers parsed one by one."""
+        path = tmp_path / "a.dta"
+        with ArchiveWriter(path, ["a"], block_games=3) as writer:
+            for seed in (2**64 - 1, 0, 2**63, 1, 2**64 - 2):
+                writer.add(seed, [0, 0, 0, 0], 1, [turn_code(5, 1)] * 70000)
+        with ArchiveReader(path) as reader:
+            sizes = []
+            read = reader.file.read
+            monkeypatch.setattr(reader.file, "read", lambda n: sizes.append(n) or read(n))
+            games = list(reader)
+            second = reader.index[1][0]
+            assert sizes == [second - reader.index[0][0], reader._index_offset - second]
+        assert [game.seed for game in games] == [2**64 - 1, 0, 2**63, 1, 2**64 - 2]
+        assert all(len(game.codes) == 70000 for game in games)
+
+    def test_run_seed_must_fit(self, tmp_path):
+        """Test a run seed whose game seeds pass 64 bits raises ValueError before writing."""
+        path = tmp_path / "a.dta"
+        with pytest.raises(ValueError):
+            write_games(path, 1, seed=1 << 32)
+        assert not path.exists()
+        with pytest.raises(SystemExit):
+            archive.main(["write", str(path), "--games", "1", "--seed", str(1 << 32)])
+
+    def test_unknown_seat_rejected(self, tmp_path, capsys):
+        """Test an unknown seat name raises ValueError naming the valid ones."""
+        path = tmp_path / "a.dta"
+        with pytest.raises(ValueError, match="capture"):
+            write_run(path, ["random", "nobody", "first", "first"], 1)
+        assert not path.exists()
+        with pytest.raises(SystemExit):
+            archive.main(["write", str(path), "--games", "1", "--seats", "random,nobody"])
+        assert "nobody" in capsys.readouterr().err
+
+    def test_under_two_bytes_per_turn(self, tmp_path):
+        """Test the whole file, headers and index included, stays under 2 bytes a turn."""
+        path = tmp_path / "a.dta"
+        _, turns = write_games(path, 200)
+        assert os.path.getsize(path) / turns < 2
+
+    def test_unclosed_file_rejected(self, tmp_path):
+        """Test a file without its index raises ValueError."""
+        path = tmp_path / "a.dta"
+        writer = ArchiveWriter(path, ["random"])
+        writer.add(1, [0, 0, 0, 0], 0, [turn_code(6, 0)] * 40)
+        writer._write_block()
+        writer.file.close()
+        with pytest.raises(ValueError):
+            ArchiveReader(path)
+
+    def test_not_an_archive(self, tmp_path):
+        """Test another file type raises ValueError."""
+        path = tmp_path / "a.dta"
+        path.write_bytes(b"not an archive at all")
+        with pytest.raises(ValueError):
+            ArchiveReader(path)
+
+
+class TestRecordGame:
+    """Test suite for recording codes while playing."""
+
+    def test_codes_follow_the_game(self):
+        """Test each code gives the die rolled and the piece moved."""
+        policies = [POLICIES["random"]] * 4
+        winner, codes = record_game(policies, random.Random(3), SeededDiceRNG(3, 0))
+        state = replay_codes(codes)
+        assert state.winner == winner
+        assert all(code < 64 for code in codes)
+        assert engine.PATH_LEN in state.progress
+
+    def test_main_write_and_info(self, tmp_path, capsys):
+        """Test the command line writes and summarizes an archive."""
+        path = str(tmp_path / "a.dta")
+        assert archive.main(["write", path, "--games", "3"]) == 0
+        assert archive.main(["info", path]) == 0
+        out = capsys.readouterr().out
+        assert "3 games" in out
+        assert "bytes per turn" in out
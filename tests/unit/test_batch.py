@@ -0,0 +1,207 @@
+"""
+Unit tests for the vectorized batch simulator.
+
+Tests cover rolling, legal move masks, policies, captures and agreement
+with the headless engine when both are fed the same dice and moves.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import batch
+import engine
+from batch import BatchGames, PASS
+from engine import BASE, START, PATH_LEN
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(1234)
+
+
+class TestRolling:
+    """Test suite for BatchGames.roll."""
+
+    def test_rolls_are_in_range(self, rng):
+        """Test every live game rolls a value between 1 and 6."""
+        games = BatchGames(1000)
+        dice = games.roll(rng)
+        assert dice.min() >= 1
+        assert dice.max() <= 6
+
+    def test_no_six_after_two_sixes(self, rng):
+        """Test the triple-six rule: after two sixes the die never shows 6."""
+        games = BatchGames(5000)
+        games.six_streak[:] = 2
+        dice = games.roll(rng)
+        assert dice.max() <= 5
+        assert set(np.unique(dice)) == {1, 2, 3, 4, 5}
+
+    def test_only_given_players_roll(self, rng):
+        """Test games of other players roll zero and keep their six streak."""
+        games = BatchGames(8)
+        games.current_player[:] = [0, 1, 2, 3, 0, 1, 2, 3]
+        games.six_streak[:] = 1
+        dice = games.roll(rng, (1, 2))
+        assert (dice[[0, 3, 4, 7]] == 0).all()
+        assert (dice[[1, 2, 5, 6]] > 0).all()
+        assert (games.six_streak[[0, 3, 4, 7]] == 1).all()
+
+    def test_finished_games_roll_zero(self, rng):
+        """Test games with a winner are not rolled."""
+        games = BatchGames(10)
+        games.winner[3] = 0
+        assert games.roll(rng)[3] == 0
+
+
+class TestLegalMask:
+    """Test suite for BatchGames.legal_mask."""
+
+    def test_only_six_activates(self):
+        """Test base pieces are legal only on a six."""
+        games = BatchGames(2)
+        games.die[:] = [6, 5]
+        legal = games.legal_mask()
+        assert legal[:, 0].all()
+        assert not legal[:, 1].any()
+
+    def test_overshoot_not_legal(self):
+        """Test a piece cannot move past path_len."""
+        games = BatchGames(1)
+        games.progress[0, 0] = PATH_LEN - 2
+        games.die[:] = 3
+        assert not games.legal_mask()[0, 0]
+
+    def test_uses_current_player(self):
+        """Test the mask describes the pieces of the player to move."""
+        games = BatchGames(1)
+        games.current_player[:] = 2
+        games.progress[9, 0] = 10
+        games.die[:] = 1
+        assert list(games.legal_mask()[:, 0]) == [False, True, False, False]
+
+
+class TestPolicies:
+    """Test suite for the built-in policies."""
+
+    def test_random_policy_picks_legal_piece(self, rng):
+        """Test random_policy never picks an illegal piece."""
+        legal = rng.random((4, 2000)) < 0.5
+        choice = batch.random_policy(None, legal, rng)
+        has_move = legal.any(axis=0)
+        assert (choice[~has_move] == PASS).all()
+        picked = legal[choice[has_move], np.flatnonzero(has_move)]
+        assert picked.all()
+
+    def test_random_policy_is_uniform(self, rng):
+        """Test every legal piece gets picked about equally often."""
+        legal = np.ones((4, 40000), dtype=bool)
+        counts = np.bincount(batch.random_policy(None, legal, rng), minlength=4)
+        assert counts.min() > 9000
+
+    def test_first_policy_picks_lowest(self, rng):
+        """Test first_policy picks the lowest legal piece."""
+        legal = np.array([[False, False], [True, False], [True, False], [False, False]])
+        assert list(batch.first_policy(None, legal, rng)) == [1, PASS]
+
+
+class TestMoves:
+    """Test suite for BatchGames.apply_moves."""
+
+    def test_activation_and_step(self):
+        """Test a six activates a piece and the next roll moves it onto the path."""
+        games = BatchGames(1)
+        games.die[:] = 6
+        games.apply_moves(np.array([0], dtype=np.int8))
+        assert games.progress[0, 0] == START
+        assert games.current_player[0] == 0
+        games.die[:] = 4
+        games.apply_moves(np.array([0], dtype=np.int8))
+        assert games.progress[0, 0] == 3
+        assert games.current_player[0] == 1
+
+    def test_capture(self):
+        """Test landing on an opponent sends it back and is counted."""
+        games = BatchGames(1)
+        games.progress[0, 0] = 10
+        games.cells[0, 0] = batch.CELL_TABLE[0, 12]
+        games.progress[4, 0] = 0
+        games.cells[4, 0] = batch.CELL_TABLE[1, 2]
+        games.die[:] = 3
+        captured = games.apply_moves(np.array([0], dtype=np.int8))
+        assert captured[0] == 1
+        assert games.progress[4, 0] == BASE
+        assert games.captures[0, 0] == 1
+
+    def test_last_piece_wins(self):
+        """Test finishing the fourth piece sets the winner."""
+        games = BatchGames(1)
+        games.progress[0:4, 0] = [PATH_LEN, PATH_LEN, PATH_LEN, PATH_LEN - 1]
+        games.die[:] = 1
+        games.apply_moves(np.array([3], dtype=np.int8))
+        assert games.winner[0] == 0
+
+
+class TestAgreementWithEngine:
+    """Test suite comparing the batch simulator with the engine."""
+
+    def test_same_dice_and_moves_give_same_games(self, rng):
+        """Test every batch game matches the engine move for move."""
+        games = BatchGames(32)
+        states = [engine.new_game() for _ in range(32)]
+        while not all(state.is_over for state in states):
+            dice, pieces, captured = games.step(batch.random_policy, rng)
+            for i, state in enumerate(states):
+                if state.is_over:
+                    continue
+                engine.apply_roll(state, int(dice[i]))
+                piece = None if pieces[i] == PASS else int(pieces[i])
+                assert len(engine.apply_move(state, piece)) == captured[i]
+                assert list(games.progress[:, i]) == state.progress
+                assert games.current_player[i] == state.current_player
+                assert games.six_streak[i] == state.six_streak
+        assert list(games.winner) == [state.winner for state in states]
+
+    def test_rounds_give_same_games(self, rng):
+        """Test stepping two players at a time still matches the engine."""
+        games = BatchGames(32)
+        states = [engine.new_game() for _ in range(32)]
+        player = 0
+        while not all(state.is_over for state in states):
+            players = (player, (player - 1) % 4)
+            dice, pieces, captured = games.step(batch.random_policy, rng, players)
+            player = (player + 1) % 4
+            for i, state in enumerate(states):
+                if not dice[i]:
+                    assert state.is_over or state.current_player not in players
+                    continue
+                engine.apply_roll(state, int(dice[i]))
+                piece = None if pieces[i] == PASS else int(pieces[i])
+                assert len(engine.apply_move(state, piece)) == captured[i]
+                assert list(games.progress[:, i]) == state.progress
+                assert games.current_player[i] == state.current_player
+        assert list(games.winner) == [state.winner for state in states]
+
+    def test_run_finishes_every_game(self, rng):
+        """Test run() plays every game to a winner, a block at a time."""
+        games = BatchGames(500)
+        winner = games.run(batch.random_policy, rng, compact_every=4, block=64)
+        assert (winner >= 0).all()
+        finished = games.is_finished.reshape(4, 4, 500).all(axis=1)
+        assert finished[winner, np.arange(500)].all()
+
+    def test_legal_mask_matches_move_tables(self, rng):
+        """Test the vectorized mask agrees with movegen's LEGAL flags."""
+        import movegen
+
+        games = BatchGames(2000)
+        for _ in range(80):
+            games.step(batch.random_policy, rng)
+        legal = games.legal_mask()
+        player = games.current_player
+        for i in range(games.n):
+            for piece in range(4):
+                pos = int(games.progress[player[i] * 4 + piece, i])
+                flags = movegen.move_entry(pos, int(games.die[i]))[1]
+                assert legal[piece, i] == bool(flags & movegen.LEGAL)
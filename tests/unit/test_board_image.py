@@ -0,0 +1,96 @@
+"""
+Unit tests for the pre-rendered board image.
+
+Tests cover the PNG output, the colours of track, home and base squares,
+and the on-disk and in-memory caches.
+"""
+
+import struct
+import zlib
+
+import board_image
+from board_image import PLAYER_COLORS, SQUARE, board_image as cached_image
+from cells import cell_position
+from track import TRACK
+
+
+def decode(png):
+    """(width, height, rows of RGB bytes) of an 8-bit RGB PNG."""
+    width, height = struct.unpack(">2I", png[16:24])
+    data = b""
+    offset = 8
+    while offset < len(png):
+        (length,) = struct.unpack(">I", png[offset:offset + 4])
+        kind = png[offset + 4:offset + 8]
+        if kind == b"IDAT":
+            data += png[offset + 8:offset + 8 + length]
+        offset += 12 + length
+    raw = zlib.decompress(data)
+    stride = 3 * width + 1
+    rows = [raw[i * stride + 1:(i + 1) * stride] for i in range(height)]
+    return width, height, rows
+
+
+def pixel(image, x, y):
+    width, height, rows = image
+    px = x + width // 2
+    py = height // 2 - y
+    return tuple(rows[py][3 * px:3 * px + 3])
+
+
+class TestRenderBoard:
+    """Test suite for render_board."""
+
+    def test_png_of_window_size(self):
+        """Test the output is a PNG as large as the window."""
+        png = board_image.render_board(750, 700)
+        assert png.startswith(b"\x89PNG\r\n\x1a\n")
+        width, height, rows = decode(png)
+        assert (width, height) == (750, 700)
+        assert len(rows) == 700
+
+    def test_ring_squares_are_white(self):
+        """Test a plain ring square is painted white."""
+        image = decode(board_image.render_board(750, 750))
+        assert pixel(image, *cell_position(TRACK.cell(0, 5))) == SQUARE
+
+    def test_start_and_home_squares_use_player_colour(self):
+        """Test each player's start and home column squares are coloured."""
+        image = decode(board_image.render_board(750, 750))
+        for player, color in enumerate(PLAYER_COLORS):
+            assert pixel(image, *cell_position(TRACK.cell(player, 0))) == color
+            assert pixel(image, *cell_position(TRACK.cell(player, 53))) == color
+
+    def test_grid_lines(self):
+        """Test square borders are drawn in black."""
+        image = decode(board_image.render_board(750, 750))
+        x, y = cell_position(TRACK.cell(0, 5))
+        assert pixel(image, x - 20, y) == board_image.LINE
+
+
+class TestCache:
+    """Test suite for board_image caching."""
+
+    def test_key_depends_on_size(self):
+        """Test different window sizes get different cache keys."""
+        assert board_image.cache_key(750, 750) != board_image.cache_key(800, 800)
+        assert board_image.cache_key(750, 750) == board_image.cache_key(750, 750)
+
+    def test_written_once(self, tmp_path, monkeypatch):
+        """Test a cached file is reused instead of being drawn again."""
+        path = cached_image(300, 300, cache_dir=tmp_path)
+        assert path.exists()
+        assert path.parent == tmp_path
+        board_image._memory.clear()
+
+        def fail(*args):
+            raise AssertionError("board drawn again")
+
+        monkeypatch.setattr(board_image, "render_board", fail)
+        assert cached_image(300, 300, cache_dir=tmp_path) == path
+
+    def test_redrawn_when_file_is_gone(self, tmp_path):
+        """Test a deleted cache file is drawn again."""
+        path = cached_image(200, 200, cache_dir=tmp_path)
+        path.unlink()
+        assert cached_image(200, 200, cache_dir=tmp_path).exists()
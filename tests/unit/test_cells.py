@@ -0,0 +1,113 @@
+"""
+Unit tests for board cells and occupancy.
+
+Tests cover snapping path coordinates to grid squares, the per-player
+cell table and incremental occupancy updates.
+"""
+
+import pytest
+
+import cells
+from cells import NO_CELL, Occupancy
+from piece_path import path_1, path_2, path_3, path_4
+
+PATHS = [path_1, path_2, path_3, path_4]
+
+
+class TestCellOf:
+    """Test suite for cell_of."""
+
+    def test_near_duplicates_share_a_cell(self):
+        """Test coordinates a pixel apart land on one square."""
+        assert cells.cell_of([-279, -7]) == cells.cell_of([-279, -8])
+        assert cells.cell_of([-32, 73]) == cells.cell_of([-33, 73])
+
+    def test_neighbouring_boxes_differ(self):
+        """Test squares one box apart get different ids."""
+        assert cells.cell_of([-197, 33]) != cells.cell_of([-156, 33])
+
+    def test_corners(self):
+        """Test the corner squares of the 15x15 grid."""
+        assert cells.cell_of([-279, 279]) == 0
+        assert cells.cell_of([295, -295]) == 15 * 15 - 1
+
+    def test_outside_board_rejected(self):
+        """Test coordinates off the board raise ValueError."""
+        with pytest.raises(ValueError):
+            cells.cell_of([400, 0])
+
+    def test_cell_position_round_trip(self):
+        """Test the centre of a cell maps back to the same cell."""
+        for cell in range(15 * 15):
+            assert cells.cell_of(cells.cell_position(cell)) == cell
+
+
+class TestCellTable:
+    """Test suite for build_cell_table."""
+
+    def test_starting_squares_are_on_the_ring(self):
+        """Test player 1 starts on the square player 0 reaches at step 13."""
+        table = cells.build_cell_table(PATHS, 56)
+        assert table[1][0] == table[0][13]
+
+    def test_centre_and_finish_are_not_cells(self):
+        """Test nothing can be captured at the centre."""
+        table = cells.build_cell_table(PATHS, 56)
+        for row in table:
+            assert row[56] == NO_CELL
+        # path_2 is one entry shorter and reaches the centre at index 55
+        assert table[1][55] == NO_CELL
+
+    def test_home_columns_are_private(self):
+        """Test home column squares belong to one player only."""
+        table = cells.build_cell_table(PATHS, 56)
+        homes = [set(row[51:56]) - {NO_CELL} for row in table]
+        for player, home in enumerate(homes):
+            for other, row in enumerate(table):
+                if other != player:
+                    assert not home & set(row)
+
+
+class TestOccupancy:
+    """Test suite for Occupancy."""
+
+    def test_add_and_at(self):
+        """Test pieces on a cell are reported as a bitmask."""
+        occupancy = Occupancy()
+        occupancy.add(3, 10)
+        occupancy.add(5, 10)
+        assert occupancy.at(10) == (1 << 3) | (1 << 5)
+
+    def test_move_updates_both_cells(self):
+        """Test moving a piece empties the old cell."""
+        occupancy = Occupancy()
+        occupancy.add(1, 10)
+        occupancy.move(1, 10, 12)
+        assert occupancy.at(10) == 0
+        assert occupancy.at(12) == 1 << 1
+
+    def test_no_cell_is_ignored(self):
+        """Test pieces off the track are not recorded."""
+        occupancy = Occupancy()
+        occupancy.add(2, NO_CELL)
+        assert occupancy.cells == {}
+
+    def test_capture_keeps_own_pieces(self):
+        """Test capture removes only pieces outside the kept mask."""
+        occupancy = Occupancy()
+        for piece in (0, 1, 4, 9):
+            occupancy.add(piece, 20)
+        captured = occupancy.capture(20, cells.player_mask(0, 4))
+        assert cells.pieces_in(captured) == [4, 9]
+        assert occupancy.at(20) == 0b11
+
+    def test_player_mask_scales(self):
+        """Test owner masks for boards with more players."""
+        assert cells.player_mask(7, 4) == 0xF << 28
+
+    def test_copy_is_independent(self):
+        """Test copies do not share the cell dictionary."""
+        occupancy = Occupancy()
+        other = occupancy.copy()
+        other.add(0, 1)
+        assert occupancy.at(1) == 0
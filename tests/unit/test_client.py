@@ -0,0 +1,134 @@
+"""
+Unit tests for the network client.
+
+Tests cover the state mirror kept from server messages and the turtle
+adapter that shows a remote game and sends input to the server.
+"""
+
+from unittest.mock import MagicMock
+
+import engine
+from client import GameClient, TurtleAdapter, follow
+from game import create_game
+from protocol import PASS, Moved, Rolled, Seated, Turn, snapshot
+from table import Table
+
+
+def adapter():
+    return TurtleAdapter(create_game(table=Table()), MagicMock())
+
+
+class TestFollow:
+    """Test suite for following server messages."""
+
+    def test_roll_and_move(self):
+        """Test rolls and moves are applied through the engine rules."""
+        state = engine.new_game()
+        state = follow(state, Rolled(0, 6))
+        state = follow(state, Moved(0, 2, -2, -1, 0))
+        assert state.progress[2] == engine.START
+        assert state.current_player == 0
+
+    def test_pass(self):
+        """Test a pass hands the turn on."""
+        state = follow(engine.new_game(), Rolled(0, 3))
+        state = follow(state, Moved(0, PASS, 0, 0, 0))
+        assert state.current_player == 1
+
+    def test_turn(self):
+        """Test a spectator delta applies both the roll and the move."""
+        state = follow(engine.new_game(), Turn(0, 6, 1, -2, -1, 0))
+        assert state.progress[1] == engine.START
+        assert state.current_player == 0
+        state = follow(state, Turn(0, 2, 1, -1, 1, 0))
+        assert state.progress[1] == 1
+        assert state.current_player == 1
+
+    def test_snapshot_replaces_state(self):
+        """Test a snapshot returns the state it carries."""
+        other = engine.new_game(3)
+        assert follow(engine.new_game(), snapshot(other)) == other
+
+    def test_client_records_seat(self):
+        """Test SEATED sets the client's table and seat."""
+        client = GameClient(MagicMock(), MagicMock())
+        client.apply(Seated(12, 3))
+        assert (client.game, client.seat) == (12, 3)
+        assert not client.my_turn
+
+
+class TestTurtleAdapter:
+    """Test suite for TurtleAdapter."""
+
+    def test_roll_shows_die(self, headless_turtles):
+        """Test a roll updates the die picture and the action label."""
+        view = adapter()
+        view.show(Rolled(0, 4))
+        assert view.game.table.current_value == 4
+        view.game.dice.shape.assert_called_with("./resources/dice_4.gif")
+        assert view.game.action.current_action == 1
+
+    def test_moves_and_captures(self, headless_turtles):
+        """Test pieces follow moves and captured pieces go back to base."""
+        view = adapter()
+        state = engine.new_game()
+        state.place(0, 10)
+        state.place(13, 25)
+        view.show(snapshot(state))
+        mover = view.game.pieces[0][0]
+        victim = view.game.pieces[3][1]
+        assert mover.current_pos == 10 and victim.is_active
+        view.show(Rolled(0, 2))
+        view.show(Moved(0, 0, 10, 12, 1 << 13))
+        assert mover.current_pos == 12
+        mover.goto.assert_any_call(mover.path[12])
+        assert not victim.is_active
+        assert view.state.progress[13] == engine.BASE
+        assert view.game.table.current_player == 1
+        assert view.game.action.current_action == 0
+
+    def test_entering_piece(self, headless_turtles):
+        """Test a piece let out of base moves to its active spot."""
+        view = adapter()
+        view.show(Rolled(0, 6))
+        view.show(Moved(0, 3, -2, -1, 0))
+        piece = view.game.pieces[0][3]
+        assert piece.is_active
+        piece.goto.assert_any_call(piece.active_pos)
+
+    def test_turn_shows_die_and_move(self, headless_turtles):
+        """Test a spectator delta updates the die and the piece."""
+        view = adapter()
+        view.show(Turn(0, 6, 3, -2, -1, 0))
+        view.game.dice.shape.assert_any_call("./resources/dice_6.gif")
+        assert view.game.pieces[0][3].is_active
+        assert view.game.action.current_action == 0
+
+    def test_input_goes_to_server(self, headless_turtles):
+        """Test space and piece clicks send commands instead of moving."""
+        view = adapter()
+        view.client.seat = 2
+        piece = view.game.pieces[2][1]
+        piece.onclick = MagicMock()
+        screen = MagicMock()
+        sent = []
+        view.bind(screen, lambda command, *args: sent.append((command, args)))
+        roll = screen.onkeypress.call_args[0][0]
+        roll()
+        click = piece.onclick.call_args[0][0]
+        click(0, 0)
+        assert sent == [(view.client.roll, ()), (view.client.move, (1,))]
+
+    def test_clicks_on_other_seats_ignored(self, headless_turtles):
+        """Test clicking another player's piece sends nothing."""
+        view = adapter()
+        view.client.seat = 2
+        other = view.game.pieces[0][1]
+        other.onclick = MagicMock()
+        sent = []
+        view.bind(MagicMock(), lambda command, *args: sent.append((command, args)))
+        click = other.onclick.call_args[0][0]
+        click(0, 0)
+        view.client.seat = -1
+        view.game.pieces[2][1].onclick.call_args[0][0](0, 0)
+        assert sent == []
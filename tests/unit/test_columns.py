@@ -0,0 +1,193 @@
+"""
+Unit tests for the column store and queries over game archives.
+
+Tests cover replaying an archive into columns, the memory-mapped views,
+zone maps skipping chunks, filters and aggregates checked against plain
+NumPy over whole columns, and the command line.
+"""
+
+import numpy as np
+import pytest
+
+import columns
+import engine
+from archive import write_run
+from columns import COLUMNS, ColumnStore, build, parse_condition
+from engine import BASE, START
+from simulate import replay_game
+
+SEATS = ["random", "capture", "first", "furthest"]
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    """Column store of 12 games in blocks of 5, chunked every 256 turns."""
+    path = tmp_path_factory.mktemp("columns") / "games.dta"
+    write_run(path, SEATS, 12, seed=3, block_games=5)
+    build(path, chunk_turns=256)
+    return ColumnStore(columns.column_path(path))
+
+
+def brute_force(store, conditions):
+    mask = np.ones(len(store), bool)
+    for column, op, value in conditions:
+        mask &= columns.OPERATORS[op](store[column], value)
+    return mask
+
+
+class TestBuild:
+    """Test suite for replaying archives into columns."""
+
+    def test_sizes(self, store):
+        """Test every column has one value per turn and games tile the turns."""
+        assert store.games == 12
+        assert all(len(store[name]) == len(store) for name in COLUMNS)
+        assert store.starts[0] == 0
+        assert store.starts[-1] == len(store)
+        assert store.chunks == -(-len(store) // 256)
+
+    def test_views_are_zero_copy(self, store):
+        """Test columns are read-only views of the mapped file."""
+        column = store["die"]
+        assert not column.flags.owndata
+        assert not column.flags.writeable
+        assert isinstance(column.base, np.memmap)
+
+    def test_games_match_simulate(self, store):
+        """Test turns, winners and captures per seat agree with ``simulate``."""
+        for game in range(store.games):
+            winner, turns, captures = replay_game(SEATS, 3, game)
+            columns_of = store.game(game)
+            assert store.winners[game] == winner
+            assert len(columns_of["die"]) == turns
+            for seat in range(4):
+                mine = columns_of["player"] == seat
+                assert columns_of["captures"][mine].sum() == captures[seat]
+
+    def test_moves_follow_the_die(self, store):
+        """Test before, after and die agree for every kind of turn."""
+        moved = store["piece"] >= 0
+        activated = moved & (store["before"] == BASE)
+        assert (store["after"][activated] == START).all()
+        walked = moved & ~activated
+        step = store["after"][walked] - store["before"][walked]
+        assert (step == store["die"][walked]).all()
+        passed = ~moved
+        assert (store["captures"][passed] == 0).all()
+
+    def test_victims(self, store):
+        """Test a victim progress is on the track exactly when something was captured."""
+        captured = store["captures"] > 0
+        assert captured.any()
+        assert (store["victim"][captured] >= 0).all()
+        assert (store["victim"][~captured] == BASE).all()
+
+    def test_victims_stood_there(self, store):
+        """Test each victim is the furthest progress a captured piece had before the move."""
+        for game in range(store.games):
+            turns = slice(store.starts[game], store.starts[game + 1])
+            player, die, piece, victim = (
+                store[name][turns].tolist() for name in ("player", "die", "piece", "victim")
+            )
+            state = engine.new_game(player[0])
+            for turn in range(len(die)):
+                engine.apply_roll(state, die[turn])
+                standing = state.progress[:]
+                captured = engine.apply_move(state, None if piece[turn] < 0 else piece[turn])
+                assert victim[turn] == max((standing[other] for other in captured), default=BASE)
+
+    def test_workers_write_the_same_file(self, store, tmp_path):
+        """Test replaying blocks in worker processes gives identical bytes."""
+        archive_path = str(store.path)[: -len(".cols")]
+        path = tmp_path / "parallel.cols"
+        build(archive_path, path, workers=2, chunk_turns=256)
+        with open(store.path, "rb") as a, open(path, "rb") as b:
+            assert a.read() == b.read()
+
+    def test_not_a_column_file(self, tmp_path):
+        """Test other files raise ValueError."""
+        path = tmp_path / "x.cols"
+        path.write_bytes(b"DTAR" + bytes(40))
+        with pytest.raises(ValueError):
+            ColumnStore(path)
+
+
+class TestQuery:
+    """Test suite for filters, aggregates and zone maps."""
+
+    @pytest.mark.parametrize(
+        "conditions",
+        [
+            [],
+            [("captures", ">", 0)],
+            [("victim", ">=", 49)],
+            [("die", "==", 6), ("player", "!=", 2)],
+            [("piece", "<", 0)],
+            [("after", ">=", 50), ("before", "<=", 50)],
+        ],
+    )
+    def test_matches_brute_force(self, store, conditions):
+        """Test count, turns, games and values equal a full-column scan."""
+        query = store.query()
+        for condition in conditions:
+            query = query.where(*condition)
+        mask = brute_force(store, conditions)
+        assert query.count() == mask.sum()
+        assert query.turns().tolist() == np.flatnonzero(mask).tolist()
+        assert query.games().tolist() == sorted(set(store.game_of(np.flatnonzero(mask))))
+        assert query.values("die").tolist() == store["die"][mask].tolist()
+
+    def test_aggregates(self, store):
+        """Test sum, min, max, mean and histogram of the matching turns."""
+        query = store.query().where("piece", ">=", 0)
+        dice = store["die"][store["piece"] >= 0].astype(np.int64)
+        assert query.aggregate("die") == len(dice)
+        assert query.aggregate("die", "sum") == dice.sum()
+        assert query.aggregate("die", "min") == dice.min()
+        assert query.aggregate("die", "max") == dice.max()
+        assert query.aggregate("die", "mean") == pytest.approx(dice.mean())
+        assert query.histogram("die") == {
+            value: int((dice == value).sum()) for value in np.unique(dice).tolist()
+        }
+        assert store.query().where("die", ">", 6).aggregate("die", "mean") is None
+
+    def test_zone_map_skips_chunks(self, store):
+        """Test chunks that cannot match are never read and full chunks need no mask."""
+        rare = store.query().where("captures", ">=", 2)
+        assert len(list(rare.chunks())) < store.chunks
+        every = list(store.query().where("die", ">=", 1).chunks())
+        assert len(every) == store.chunks
+        assert all(mask is None for _, _, mask in every)
+
+    def test_where_is_immutable(self, store):
+        """Test narrowing a query leaves the original alone."""
+        base = store.query().where("die", "==", 6)
+        base.where("player", "==", 0)
+        assert base.count() == (store["die"] == 6).sum()
+
+    def test_bad_conditions(self, store):
+        """Test unknown columns, operators and out of range values raise ValueError."""
+        with pytest.raises(ValueError):
+            store.query().where("seat", "==", 1)
+        with pytest.raises(ValueError):
+            store.query().where("die", "=>", 1)
+        with pytest.raises(ValueError):
+            store.query().where("die", "<", 300)
+        with pytest.raises(ValueError):
+            store.query().aggregate("die", "median")
+
+    def test_parse_condition(self):
+        """Test command line conditions are read into tuples."""
+        assert parse_condition("victim>=49") == ("victim", ">=", 49)
+        assert parse_condition(" piece == -1 ") == ("piece", "==", -1)
+        with pytest.raises(ValueError):
+            parse_condition("piece is 1")
+
+    def test_main(self, store, capsys):
+        """Test the query command prints counts and aggregates."""
+        path = str(store.path)
+        assert columns.main(["query", path, "--where", "captures>0"]) == 0
+        assert columns.main(["query", path, "--aggregate", "mean:die"]) == 0
+        out = capsys.readouterr().out
+        assert f"of {len(store)} turns" in out
+        assert "mean die" in out
@@ -135,23 +135,39 @@ class TestDiceRolling:
     def test_three_consecutive_sixes_triggers_reroll(self, mock_shape, mock_show, 
                                                      mock_goto, mock_hide, mock_penup, 
                                                      mock_init, reset_class_variables):
-        """Test that three consecutive 6s triggers a re-roll."""
+        """Test that the roll after two 6s is drawn from 1-5 in a single draw."""
         from dice import Dice
         dice = Dice()
         
         with patch('dice.secrets.randbelow') as mock_random:
-            # First three rolls return 6, fourth returns 4
-            mock_random.side_effect = [5, 5, 5, 3]  # randbelow returns 0-5, so 5 = dice 6
+            # Two sixes, then the third roll returns 4
+            mock_random.side_effect = [5, 5, 3]  # randbelow returns 0-5, so 5 = dice 6
             
             dice.roll()
             dice.roll()
-            dice.roll()  # This should trigger re-roll
+            dice.roll()  # Drawn below 5, so a six is impossible
             
-            # Should have rolled 4 times (3 sixes + 1 reroll)
-            assert mock_random.call_count == 4
-            # After rerolling a non-6, consecutive_six resets to 0
+            # No re-rolls: one draw per roll
+            assert mock_random.call_count == 3
+            assert mock_random.call_args_list[2] == ((5,),)
+            assert Dice.current_value == 4
+            # After a non-6, consecutive_six resets to 0
             assert Dice.consecutive_six == 0
             
+    def test_shape_set_once_per_roll(self, mock_shape, mock_show, mock_goto, 
+                                     mock_hide, mock_penup, mock_init, 
+                                     reset_class_variables):
+        """Test the roll after two 6s changes the dice image only once."""
+        from dice import Dice
+        dice = Dice()
+        Dice.consecutive_six = 2
+        mock_shape.reset_mock()
+        
+        with patch('dice.secrets.randbelow', return_value=4):
+            dice.roll()
+        
+        mock_shape.assert_called_once_with("./resources/dice_5.gif")
+            
     def test_shape_changes_after_roll(self, mock_shape, mock_show, mock_goto, 
                                      mock_hide, mock_penup, mock_init, 
                                      mock_dice_roll, reset_class_variables):
@@ -201,3 +217,44 @@ class TestDiceClassVariables:
         dice = Dice()
         assert hasattr(Dice, 'allow_rolling')
         assert Dice.allow_rolling == True
+
+
+@patch('dice.Turtle.__init__', return_value=None)
+@patch('dice.Turtle.penup')
+@patch('dice.Turtle.hideturtle')
+@patch('dice.Turtle.goto')
+@patch('dice.Turtle.showturtle')
+@patch('dice.Turtle.shape')
+class TestDiceRNG:
+    """Test suite for plugging a generator from rng.py into Dice."""
+
+    def test_roll_uses_configured_rng(self, mock_shape, mock_show, mock_goto,
+                                      mock_hide, mock_penup, mock_init,
+                                      reset_class_variables):
+        """Test Dice.roll draws from Dice.rng when one is set."""
+        from dice import Dice
+        rng = MagicMock()
+        rng.randbelow.return_value = 2
+        Dice.rng = rng
+        dice = Dice()
+        dice.roll()
+        rng.randbelow.assert_called_with(6)
+        assert Dice.current_value == 3
+
+    def test_seeded_rng_replays_rolls(self, mock_shape, mock_show, mock_goto,
+                                      mock_hide, mock_penup, mock_init,
+                                      reset_class_variables):
+        """Test the same seed gives the same sequence of dice values."""
+        from dice import Dice
+        from rng import SeededDiceRNG
+        dice = Dice()
+        sequences = []
+        for _ in range(2):
+            Dice.rng = SeededDiceRNG(42)
+            Dice.consecutive_six = 0
+            values = []
+            for _ in range(30):
+                dice.roll()
+                values.append(Dice.current_value)
+            sequences.append(values)
+        assert sequences[0] == sequences[1]
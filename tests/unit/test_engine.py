@@ -0,0 +1,246 @@
+"""
+Unit tests for the headless rules engine.
+
+Tests cover rolling, activation, movement, captures, finishing and the
+triple-six rule without creating any turtle objects.
+"""
+
+import random
+import subprocess
+import sys
+from fractions import Fraction
+from pathlib import Path
+
+import pytest
+
+import engine
+from engine import BASE, START, PATH_LEN, ROLL, MOVE
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+
+def play(state, value, piece):
+    engine.apply_roll(state, value)
+    return engine.apply_move(state, piece)
+
+
+class TestRolling:
+    """Test suite for apply_roll."""
+
+    def test_new_game_waits_for_roll(self):
+        """Test a new game starts with player 0 rolling and all pieces in base."""
+        state = engine.new_game()
+        assert state.phase == ROLL
+        assert state.current_player == 0
+        assert state.progress == [BASE] * 16
+
+    def test_roll_sets_die_and_phase(self):
+        """Test rolling stores the value and waits for a move."""
+        state = engine.new_game()
+        engine.apply_roll(state, 4)
+        assert state.die == 4
+        assert state.phase == MOVE
+
+    def test_roll_stores_previous_value(self):
+        """Test prev_die keeps the value of the previous roll."""
+        state = engine.new_game()
+        play(state, 3, None)
+        engine.apply_roll(state, 5)
+        assert state.prev_die == 3
+
+    def test_cannot_roll_twice(self):
+        """Test a pending move blocks another roll."""
+        state = engine.new_game()
+        engine.apply_roll(state, 2)
+        with pytest.raises(ValueError):
+            engine.apply_roll(state, 2)
+
+    @pytest.mark.parametrize("value", [0, 7, -1])
+    def test_out_of_range_roll_rejected(self, value):
+        """Test die values outside 1-6 are rejected."""
+        state = engine.new_game()
+        with pytest.raises(ValueError):
+            engine.apply_roll(state, value)
+
+    def test_third_six_rejected(self):
+        """Test a third consecutive six cannot be applied."""
+        state = engine.new_game()
+        play(state, 6, 0)
+        play(state, 6, 1)
+        assert state.six_streak == 2
+        with pytest.raises(ValueError):
+            engine.apply_roll(state, 6)
+
+    def test_roll_after_two_sixes_draws_below_five(self):
+        """Test roll() makes one draw from 1-5 after two sixes."""
+        state = engine.new_game()
+        state.six_streak = 2
+        bounds = []
+        value = engine.roll(state, lambda n: bounds.append(n) or n - 1)
+        assert bounds == [5]
+        assert value == 5
+        assert state.six_streak == 0
+
+    @pytest.mark.parametrize("streak", [0, 1, 2])
+    def test_roll_distribution_sums_to_one(self, streak):
+        """Test every row of ROLL_DISTRIBUTION is a probability distribution."""
+        row = engine.ROLL_DISTRIBUTION[streak]
+        assert sum(p for _, p in row) == 1
+        assert [v for v, _ in row] == list(range(1, engine.ROLL_FACES[streak] + 1))
+
+    def test_no_six_after_two_sixes_in_distribution(self):
+        """Test the table gives a third six probability zero."""
+        assert 6 not in dict(engine.ROLL_DISTRIBUTION[2])
+        assert dict(engine.ROLL_DISTRIBUTION[2])[1] == Fraction(1, 5)
+
+
+class TestMoving:
+    """Test suite for apply_move."""
+
+    def test_six_activates_piece(self):
+        """Test a six moves a base piece to its start spot and keeps the turn."""
+        state = engine.new_game()
+        play(state, 6, 0)
+        assert state.progress[0] == START
+        assert state.current_player == 0
+
+    def test_non_six_cannot_activate(self):
+        """Test base pieces cannot move without a six."""
+        state = engine.new_game()
+        engine.apply_roll(state, 5)
+        assert engine.legal_moves(state) == []
+        with pytest.raises(ValueError):
+            engine.apply_move(state, 0)
+
+    def test_pass_hands_turn_over(self):
+        """Test passing on a non-six gives the turn to the next player."""
+        state = engine.new_game()
+        play(state, 5, None)
+        assert state.current_player == 1
+        assert state.phase == ROLL
+
+    def test_cannot_pass_with_legal_move(self):
+        """Test passing is rejected when a piece can move."""
+        state = engine.new_game()
+        engine.apply_roll(state, 6)
+        with pytest.raises(ValueError):
+            engine.apply_move(state, None)
+
+    def test_first_step_from_start(self):
+        """Test a piece on its start spot lands on path index die - 1."""
+        state = engine.new_game()
+        play(state, 6, 0)
+        play(state, 4, 0)
+        assert state.progress[0] == 3
+        assert state.current_player == 1
+
+    def test_overshoot_is_illegal(self):
+        """Test a piece cannot move past path_len."""
+        state = engine.new_game()
+        state.progress[0] = PATH_LEN - 2
+        engine.apply_roll(state, 3)
+        assert engine.legal_moves(state) == []
+
+    def test_exact_landing_finishes(self):
+        """Test landing exactly on path_len finishes the piece."""
+        state = engine.new_game()
+        state.progress[0] = PATH_LEN - 2
+        play(state, 2, 0)
+        assert state.is_finished(0)
+        assert state.available(0) == 3
+
+    def test_finished_piece_cannot_move(self):
+        """Test finished pieces are never offered as moves."""
+        state = engine.new_game()
+        state.progress[0] = PATH_LEN
+        engine.apply_roll(state, 1)
+        assert 0 not in engine.legal_moves(state)
+
+    def test_last_piece_wins(self):
+        """Test finishing the fourth piece ends the game."""
+        state = engine.new_game()
+        state.progress[0:4] = [PATH_LEN, PATH_LEN, PATH_LEN, PATH_LEN - 1]
+        play(state, 1, 3)
+        assert state.winner == 0
+        assert state.is_over
+        with pytest.raises(ValueError):
+            engine.apply_roll(state, 1)
+
+
+class TestCaptures:
+    """Test suite for captures (check_overlap)."""
+
+    def test_landing_on_opponent_sends_it_home(self):
+        """Test an opponent on the same path coordinate goes back to base."""
+        state = engine.new_game()
+        # path_2[0] is the same square as path_1[13]
+        state.progress[0] = 10
+        state.progress[4] = 0
+        captured = play(state, 3, 0)
+        assert captured == [4]
+        assert state.progress[4] == BASE
+
+    def test_own_pieces_are_not_captured(self):
+        """Test pieces of the moving player can share a square."""
+        state = engine.new_game()
+        state.progress[0] = 10
+        state.progress[1] = 13
+        assert play(state, 3, 0) == []
+        assert state.progress[1] == 13
+
+    def test_near_duplicate_coordinates_capture(self):
+        """Test [-279,-7] and [-279,-8] are the same square."""
+        state = engine.new_game()
+        # path_2[36] is [-279,-7], path_1[50] is [-279,-8]
+        state.place(0, 49)
+        state.place(4, 36)
+        assert play(state, 1, 0) == [4]
+
+    def test_occupancy_follows_moves_and_captures(self):
+        """Test the occupancy map matches one rebuilt from scratch."""
+        rng = random.Random(5)
+        state = engine.new_game()
+        for _ in range(400):
+            if state.is_over:
+                break
+            engine.roll(state, rng.randrange)
+            moves = engine.legal_moves(state)
+            engine.apply_move(state, rng.choice(moves) if moves else None)
+            fresh = state.copy()
+            fresh.place(0, fresh.progress[0])
+            assert fresh.occupancy == state.occupancy
+
+    def test_centre_never_captures(self):
+        """Test finishing does not send other finished pieces back."""
+        state = engine.new_game()
+        state.progress[0] = PATH_LEN - 1
+        state.progress[4] = PATH_LEN
+        assert play(state, 1, 0) == []
+
+
+class TestHeadless:
+    """Test suite for running whole games without turtle."""
+
+    def test_engine_does_not_import_turtle(self):
+        """Test importing the engine leaves turtle unloaded."""
+        code = "import sys, engine; sys.exit('turtle' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT)
+        assert result.returncode == 0
+
+    def test_random_game_terminates(self):
+        """Test a random game always produces a winner."""
+        rng = random.Random(7)
+        state = engine.new_game()
+        while not state.is_over:
+            engine.roll(state, rng.randrange)
+            moves = engine.legal_moves(state)
+            engine.apply_move(state, rng.choice(moves) if moves else None)
+        assert state.available(state.winner) == 0
+
+    def test_copy_is_independent(self):
+        """Test copies do not share the progress list."""
+        state = engine.new_game()
+        other = state.copy()
+        other.progress[0] = START
+        assert state.progress[0] == BASE
+        assert other != state
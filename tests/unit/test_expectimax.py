@@ -0,0 +1,151 @@
+"""
+Unit tests for the expectimax search bot.
+
+Tests cover the evaluation, forced and tactical choices, the time budget,
+the transposition table and use as a simulate policy.
+"""
+
+import time
+
+import pytest
+
+import engine
+import simulate
+from engine import BASE, MOVE, PATH_LEN, START
+from expectimax import LOSS, WIN, ExpectimaxBot, evaluate
+from rng import SeededDiceRNG
+
+
+def rolled(progress, die, player=0):
+    state = engine.new_game(first_player=player)
+    for index, pos in enumerate(progress):
+        state.place(index, pos)
+    engine.apply_roll(state, die)
+    return state
+
+
+class TestEvaluate:
+    """Test suite for evaluate."""
+
+    def test_terminal_values(self):
+        """Test a won game is WIN for the winner and LOSS for the others."""
+        state = engine.new_game()
+        state.winner = 2
+        assert evaluate(state, 2) == WIN
+        assert evaluate(state, 0) == LOSS
+
+    def test_start_is_even(self):
+        """Test the opening position is worth nothing to anyone."""
+        assert evaluate(engine.new_game(), 1) == 0
+
+    def test_progress_is_good(self):
+        """Test being further along than every opponent scores above zero."""
+        state = engine.new_game()
+        state.place(0, 20)
+        assert 0 < evaluate(state, 0) < WIN
+        assert evaluate(state, 1) < 0
+
+
+class TestChoose:
+    """Test suite for ExpectimaxBot.choose."""
+
+    def test_needs_a_roll(self):
+        """Test the bot refuses to move before the die is rolled."""
+        with pytest.raises(ValueError):
+            ExpectimaxBot().choose(engine.new_game())
+
+    def test_pass_and_forced_move(self):
+        """Test no search is done with zero or one legal move."""
+        bot = ExpectimaxBot()
+        assert bot.choose(rolled([BASE] * 16, 3)) is None
+        progress = [BASE] * 16
+        progress[2] = 10
+        assert bot.choose(rolled(progress, 3)) == 2
+        assert bot.depth == 0
+
+    def test_takes_the_capture(self):
+        """Test the bot captures an opponent when it can."""
+        progress = [BASE] * 16
+        progress[0] = 10
+        progress[1] = 30
+        progress[4] = 0  # path_2[0] is path_1[13]
+        state = rolled(progress, 3)
+        assert ExpectimaxBot(time_budget=None, max_depth=2).choose(state) == 0
+
+    def test_finishes_the_game(self):
+        """Test the bot plays the winning move."""
+        progress = [BASE] * 16
+        progress[0:4] = [PATH_LEN, PATH_LEN, PATH_LEN - 4, START]
+        state = rolled(progress, 4)
+        assert ExpectimaxBot(time_budget=None, max_depth=3).choose(state) == 2
+
+    def test_answers_within_budget(self):
+        """Test every move of a game is chosen within the time budget."""
+        bot = ExpectimaxBot(time_budget=0.05)
+        dice = SeededDiceRNG(11)
+        state = engine.new_game()
+        slowest = 0.0
+        for _ in range(200):
+            if state.is_over:
+                break
+            engine.roll(state, dice.randbelow)
+            started = time.perf_counter()
+            piece = bot.choose(state)
+            slowest = max(slowest, time.perf_counter() - started)
+            engine.apply_move(state, piece)
+        # Allow for timer and scheduler jitter on busy machines.
+        assert slowest < 0.08
+
+    def test_deepens_and_fills_table(self):
+        """Test iterative deepening reaches max_depth and caches positions."""
+        progress = [BASE] * 16
+        progress[0:3] = [5, 12, START]
+        progress[4:6] = [3, 20]
+        state = rolled(progress, 5)
+        bot = ExpectimaxBot(time_budget=None, max_depth=3)
+        bot.choose(state)
+        assert bot.depth == 3
+        assert bot.table
+
+    def test_fixed_depth_is_deterministic(self):
+        """Test the same position gives the same move without a time budget."""
+        progress = [BASE] * 16
+        progress[0:3] = [5, 12, 30]
+        progress[8] = 9
+        state = rolled(progress, 4)
+        moves = {ExpectimaxBot(time_budget=None, max_depth=3).choose(state)
+                 for _ in range(3)}
+        assert len(moves) == 1
+        assert state.phase == MOVE
+
+    def test_plays_from_a_tablebase(self):
+        """Test covered positions take the tablebase move and others are searched."""
+
+        class Table:
+            def __init__(self, piece):
+                self.piece = piece
+
+            def best_move(self, state):
+                return self.piece
+
+        progress = [BASE] * 16
+        progress[0:3] = [5, 12, 30]
+        state = rolled(progress, 4)
+        bot = ExpectimaxBot(time_budget=None, max_depth=2, tablebase=Table(1))
+        assert bot.choose(state) == 1
+        assert bot.depth == 0
+        bot = ExpectimaxBot(time_budget=None, max_depth=2, tablebase=Table(None))
+        bot.choose(state)
+        assert bot.depth == 2
+
+
+class TestAsPolicy:
+    """Test suite for the expectimax simulate policy."""
+
+    def test_registered_in_simulate(self):
+        """Test simulate can seat the bot and games are reproducible."""
+        seats = ["expectimax", "random", "random", "random"]
+        first = simulate.simulate(seats, 3, workers=1, seed=4)
+        again = simulate.simulate(seats, 3, workers=1, seed=4)
+        assert first.games == 3
+        assert first == again
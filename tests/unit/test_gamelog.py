@@ -0,0 +1,271 @@
+"""
+Unit tests for the binary game log.
+
+Tests cover record encoding, logging through the engine rules,
+rebuilding game states from a log, rejecting logs that break the rules,
+buffered file writing and the server writing its games to a log.
+"""
+
+import asyncio
+import random
+
+import pytest
+
+import engine
+import gamelog
+import loadtest
+from gamelog import (
+    ACTIVATE,
+    CAPTURE,
+    FINISH,
+    GAME,
+    MOVE,
+    PASS,
+    ROLL,
+    RECORD_SIZE,
+    TABLE,
+    Event,
+    GameLog,
+    Header,
+    LogWriter,
+    events,
+    games,
+    read_log,
+    rebuild,
+    record,
+)
+from server import GameServer
+
+
+def play(seed, log, first_player=0):
+    """Play one random game through the logging helpers."""
+    rng = random.Random(seed)
+    state = engine.new_game(first_player)
+    while not state.is_over:
+        gamelog.apply_roll(state, rng.randrange(engine.ROLL_FACES[state.six_streak]) + 1, log)
+        moves = engine.legal_moves(state)
+        gamelog.apply_move(state, rng.choice(moves) if moves else None, log)
+    return state
+
+
+class TestRecords:
+    """Test suite for record encoding."""
+
+    def test_two_bytes_per_event(self):
+        """Test every record is two bytes."""
+        assert RECORD_SIZE == 2
+        assert len(record(MOVE, 15 | 56 << 4)) == 2
+
+    def test_game_record_holds_id_and_seed(self):
+        """Test the GAME record keeps the game id and the 64-bit seed, or no seed."""
+        seeded = GameLog(3, game=70000, seed=(1 << 70) + 9)
+        unseeded = GameLog(1, game=2)
+        data = bytes(seeded.records + unseeded.records)
+        assert [head for head, records in games(data)] == [
+            Header(70000, 9, 3),
+            Header(2, None, 1),
+        ]
+        assert list(events(data)) == [Event(GAME, 3, -1, 70000), Event(GAME, 1, -1, 2)]
+
+    def test_decode(self):
+        """Test each kind of record decodes to its fields."""
+        log = GameLog(2)
+        log.roll(2, 6)
+        log.move(9, engine.BASE, engine.START, [])
+        log.move(9, 40, 46, [0, 12])
+        log.move(9, 53, 56, [], won=True)
+        log.pass_turn(3)
+        assert list(events(log.records)) == [
+            Event(GAME, 2, -1, 0),
+            Event(ROLL, 2, -1, 6),
+            Event(ACTIVATE, 2, 9, 0),
+            Event(MOVE, 2, 9, 46),
+            Event(CAPTURE, 0, 0, 0),
+            Event(CAPTURE, 3, 12, 0),
+            Event(MOVE, 2, 9, 56),
+            Event(FINISH, 2, 9, 1),
+            Event(PASS, 3, -1, 0),
+        ]
+
+    def test_cut_record(self):
+        """Test a log ending inside a record is refused."""
+        with pytest.raises(ValueError):
+            list(events(b"\x00\x00\x01"))
+        with pytest.raises(ValueError):
+            list(events(bytes(GameLog().records)[:6]))
+
+
+class TestRebuild:
+    """Test suite for rebuilding states from a log."""
+
+    def test_games_rebuilt_exactly(self):
+        """Test replaying logs of several games gives their final states."""
+        data = bytearray()
+        finals = []
+        for seed in range(5):
+            log = GameLog(seed % 4, game=seed)
+            finals.append(play(seed, log, seed % 4))
+            data += log.records
+        assert rebuild(bytes(data)) == finals
+
+    def test_few_bytes_per_turn(self):
+        """Test a game costs only a few bytes per turn."""
+        log = GameLog()
+        state = play(11, log)
+        assert state.is_over
+        turns = sum(1 for event in events(log.records) if event.kind == ROLL)
+        assert len(log.records) / turns < 5
+
+    def test_captures_and_finishes_logged(self):
+        """Test a played game logs captures and four finishes of the winner."""
+        log = GameLog()
+        state = play(3, log)
+        kinds = [event.kind for event in events(log.records)]
+        finishes = [event for event in events(log.records) if event.kind == FINISH]
+        assert CAPTURE in kinds
+        assert sum(1 for event in finishes if event.player == state.winner) == 4
+        assert finishes[-1].value == 1
+
+    def test_out_of_turn_rejected(self):
+        """Test a roll by the wrong player is refused."""
+        log = GameLog(0)
+        log.roll(1, 3)
+        with pytest.raises(ValueError):
+            rebuild(bytes(log.records))
+
+    def test_illegal_move_rejected(self):
+        """Test a move the rules do not allow is refused."""
+        log = GameLog(0)
+        log.roll(0, 3)
+        log.move(0, 0, 3, [])
+        with pytest.raises(ValueError):
+            rebuild(bytes(log.records))
+
+    def test_unknown_table_rejected(self):
+        """Test records switched to a game that never started are refused."""
+        data = bytes(GameLog(game=1).records) + gamelog.SWITCH.pack(TABLE, 2)
+        with pytest.raises(ValueError):
+            rebuild(data + record(gamelog.ROLL, 0 | 3 << 2))
+
+    def test_repeated_game_rejected(self):
+        """Test a game id starting twice is refused rather than merged."""
+        data = bytes(GameLog(game=1).records)
+        with pytest.raises(ValueError):
+            games(data + data)
+
+    def test_missing_capture_rejected(self):
+        """Test a log with a capture record removed is refused."""
+        log = GameLog()
+        play(3, log)
+        data = bytes(log.records)
+        first = next(offset for offset, size, value in gamelog._scan(data) if value & 7 == CAPTURE)
+        tampered = data[:first] + data[first + RECORD_SIZE:]
+        with pytest.raises(ValueError):
+            rebuild(tampered)
+
+
+class TestLogWriter:
+    """Test suite for LogWriter."""
+
+    def test_buffered_until_full(self, tmp_path):
+        """Test games stay in memory until the buffer fills."""
+        path = tmp_path / "games.log"
+        logs = [GameLog(game=game) for game in range(3)]
+        for log in logs:
+            play(1, log)
+        writer = LogWriter(path, buffer_size=3 * len(logs[0].records))
+        writer.write(logs[0])
+        writer.write(logs[1])
+        assert path.stat().st_size == 0
+        writer.write(logs[2])
+        assert path.stat().st_size == 3 * len(logs[0].records)
+        writer.close()
+        assert len(rebuild(read_log(path))) == writer.games == 3
+
+    def test_records_written_as_they_happen(self, tmp_path):
+        """Test games played at once interleave in the file and rebuild apart."""
+        path = tmp_path / "games.log"
+        with LogWriter(path, buffer_size=1) as writer:
+            logs = [GameLog(player, game=player + 1, writer=writer) for player in range(3)]
+            states = [engine.new_game(player) for player in range(3)]
+            rng = random.Random(5)
+            while not all(state.is_over for state in states):
+                for state, log in zip(states, logs):
+                    if state.is_over:
+                        continue
+                    gamelog.apply_roll(state, rng.randrange(engine.ROLL_FACES[state.six_streak]) + 1, log)
+                    moves = engine.legal_moves(state)
+                    gamelog.apply_move(state, rng.choice(moves) if moves else None, log)
+                    # Nothing waits in memory for the game to end
+                    assert log.sent == len(log.records)
+                    assert not writer.buffer
+            assert writer.games == 3
+        assert rebuild(read_log(path)) == states
+        assert [head.game for head, records in games(read_log(path))] == [1, 2, 3]
+
+    def test_appends(self, tmp_path):
+        """Test a second writer adds to the existing file."""
+        path = tmp_path / "games.log"
+        for seed in (1, 2):
+            with LogWriter(path) as writer:
+                log = GameLog(game=seed)
+                play(seed, log)
+                writer.write(log)
+        assert len(rebuild(read_log(path))) == 2
+
+
+class Seat:
+    """Stand-in for a seated connection that drops what it is sent."""
+
+    def __init__(self, game, seat):
+        self.game = game
+        self.seat = seat
+
+    def send(self, frame):
+        pass
+
+
+class TestServerLog:
+    """Test suite for server logging."""
+
+    def test_server_games_rebuilt(self, tmp_path):
+        """Test every game played on a logging server can be rebuilt."""
+        path = tmp_path / "server.log"
+
+        async def main():
+            with LogWriter(path) as log:
+                server = GameServer(seed=4, log=log)
+                await server.start("127.0.0.1", 0)
+                await loadtest.load(*server.address, 8)
+                await server.close()
+
+        asyncio.run(main())
+        states = rebuild(read_log(path))
+        assert len(states) == 2
+        assert all(state.is_over for state in states)
+        heads = [head for head, records in games(read_log(path))]
+        assert sorted(head.game for head in heads) == [1, 2]
+        assert {head.seed for head in heads} == {4}
+
+    def test_server_flushes_games_in_play(self, tmp_path, monkeypatch):
+        """Test the server's log reaches the file while the game still runs."""
+        import server
+
+        monkeypatch.setattr(server, "LOG_FLUSH_EVERY", 0.01)
+        path = tmp_path / "server.log"
+
+        async def main():
+            with LogWriter(path) as log:
+                game_server = GameServer(seed=4, log=log)
+                await game_server.start("127.0.0.1", 0)
+                game = game_server.game(1)
+                for seat in range(4):
+                    game.seats[seat] = Seat(game, seat)
+                game_server._roll(game.seats[0], None)
+                assert path.stat().st_size == 0
+                await asyncio.sleep(0.05)
+                size = path.stat().st_size
+                await game_server.close()
+            return size
+
+        assert asyncio.run(main()) > 0
@@ -0,0 +1,81 @@
+"""
+Unit tests for lazy construction of the turtle front end.
+
+Tests cover the Lazy proxy, imports that open no window and the
+create_game factory.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import game
+from lazy import Lazy
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+class TestLazy:
+    """Test suite for the Lazy proxy."""
+
+    def test_not_built_until_used(self):
+        """Test the factory is not called by creating the proxy."""
+        factory = MagicMock()
+        proxy = Lazy(factory)
+        factory.assert_not_called()
+        assert not proxy.created
+
+    def test_built_once_and_forwarded(self):
+        """Test attribute access builds the object once and forwards to it."""
+        factory = MagicMock()
+        proxy = Lazy(factory)
+        proxy.update_action(1)
+        proxy.update_action(0)
+        factory.assert_called_once_with()
+        assert factory.return_value.update_action.call_count == 2
+        assert proxy.get() is factory.return_value
+
+    def test_reset(self):
+        """Test reset makes the next use build a new object."""
+        proxy = Lazy(object)
+        first = proxy.get()
+        proxy.reset()
+        assert proxy.get() is not first
+
+
+class TestImports:
+    """Test suite for side-effect free imports."""
+
+    def test_importing_front_end_opens_no_window(self):
+        """Test importing the turtle modules builds no turtles."""
+        code = (
+            "import turtle, piece, player, action, game\n"
+            "assert turtle._Screen._root is None\n"
+            "assert turtle.Turtle._screen is None\n"
+            "assert not player.p.created\n"
+            "assert not action.action_writer.created\n"
+            "assert all(not pieces for pieces in piece.players.values())\n"
+        )
+        subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True)
+
+
+class TestCreateGame:
+    """Test suite for the create_game factory."""
+
+    def test_builds_in_order(self):
+        """Test the player label is built before the action label and pieces."""
+        order = []
+        player = Lazy(lambda: order.append("player") or "player")
+        action = Lazy(lambda: order.append("action") or "action")
+        rng = object()
+        with patch.object(game, "p", player), \
+                patch.object(game, "action_writer", action), \
+                patch.object(game, "Dice") as dice, \
+                patch.object(game, "create_pieces",
+                             side_effect=lambda: order.append("pieces") or {}):
+            built = game.create_game(rng=rng)
+        assert order == ["player", "action", "pieces"]
+        assert built.player == "player"
+        assert built.dice is dice.return_value
+        assert dice.rng is rng
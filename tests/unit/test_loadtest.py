@@ -0,0 +1,143 @@
+"""
+Unit tests for the server load test harness.
+
+Tests cover percentiles, bot clients playing full games against a
+localhost server, server event-loop lag sampling and the report.
+"""
+
+import asyncio
+import random
+import time
+
+import pytest
+
+import loadtest
+from loadtest import Report, format_report, percentile
+from server import GameServer, LagMonitor
+
+
+def run_load(clients):
+    async def main():
+        server = GameServer(seed=3)
+        await server.start("127.0.0.1", 0)
+        try:
+            return await asyncio.wait_for(loadtest.load(*server.address, clients), 60)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+class TestPercentile:
+    """Test suite for percentile."""
+
+    def test_nearest_rank(self):
+        """Test percentiles pick the nearest ranked value."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 99) == 99
+        assert percentile(values, 100) == 100
+
+    def test_small_and_empty(self):
+        """Test short inputs and empty inputs."""
+        assert percentile([3.0], 99) == 3.0
+        assert percentile([2, 1], 50) == 1
+        assert percentile([], 50) == 0.0
+
+
+class TestLoad:
+    """Test suite for the bot clients."""
+
+    def test_bots_finish_their_games(self):
+        """Test every table plays to the end with no errors."""
+        report = run_load(8)
+        assert report.games == 2
+        assert report.errors == 0
+        assert report.moves > 0
+        assert report.elapsed > 0
+
+    def test_round_trips_recorded(self):
+        """Test each roll gets a round-trip time, and every roll is one move."""
+        report = run_load(4)
+        assert len(report.roll_rtt) == report.moves
+        assert report.move_rtt
+        assert all(rtt >= 0 for rtt in report.roll_rtt + report.move_rtt)
+
+    def test_refused_bot_waits_for_the_table(self, monkeypatch):
+        """Test a bot refused before its table starts does not roll again until it does."""
+        rolls = []
+        roll = GameServer._roll
+
+        def counted(self, conn, message):
+            rolls.append(conn.seat)
+            roll(self, conn, message)
+
+        monkeypatch.setattr(GameServer, "_roll", counted)
+        report = Report()
+
+        async def main():
+            server = GameServer(seed=3)
+            await server.start("127.0.0.1", 0)
+            try:
+                address = server.address
+                first = asyncio.ensure_future(loadtest.bot(*address, random.Random(0), report))
+                await asyncio.sleep(0.05)
+                others = [loadtest.bot(*address, random.Random(i), report) for i in (1, 2, 3)]
+                await asyncio.wait_for(asyncio.gather(first, *others), 60)
+            finally:
+                await server.close()
+
+        asyncio.run(main())
+        assert report.games == 1
+        assert report.errors == 0
+        # One refused roll before the table filled, then one per turn
+        assert len(rolls) == len(report.roll_rtt) + 1
+
+    def test_clients_fill_tables(self):
+        """Test a client count that would leave a table short is refused."""
+        with pytest.raises(ValueError):
+            asyncio.run(loadtest.load("127.0.0.1", 1, 6))
+
+    def test_child_server_reports_lag(self):
+        """Test a run against a spawned server returns loop lag samples."""
+        report = loadtest.run(4, seed=1)
+        assert report.games == 1
+        assert report.lag
+        assert min(report.lag) >= 0
+
+
+class TestLagMonitor:
+    """Test suite for LagMonitor."""
+
+    def test_blocked_loop_shows_lag(self):
+        """Test a callback that blocks the loop shows up as lag."""
+
+        async def main():
+            monitor = LagMonitor(interval=0.005)
+            monitor.start()
+            await asyncio.sleep(0.02)
+            time.sleep(0.05)
+            await asyncio.sleep(0.02)
+            monitor.stop()
+            return monitor.samples
+
+        samples = asyncio.run(main())
+        assert max(samples) >= 0.04
+
+
+class TestFormatReport:
+    """Test suite for format_report."""
+
+    def test_lines(self):
+        """Test the report lists throughput, percentiles and lag."""
+        report = Report()
+        report.moves = 500
+        report.elapsed = 2.0
+        report.roll_rtt = [0.001] * 10
+        report.move_rtt = [0.002] * 10
+        report.lag = [0.0005, 0.003]
+        text = format_report(report, 8)
+        assert "moves/s: 250" in text
+        assert "roll" in text and "move" in text and "loop lag" in text
+        assert "2.00" in text
@@ -0,0 +1,170 @@
+"""
+Unit tests for the exact Markov-chain race solver.
+
+Tests cover the single-piece chain against a hand-solved case and
+against games played by the engine, the two-seat race, the dense and
+iterative solves agreeing with each other, and the on-disk cache.
+"""
+
+import random
+import subprocess
+import sys
+from fractions import Fraction
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import engine
+import markov
+from engine import BASE, NUM_PIECES, PATH_LEN, PIECES_PER_PLAYER
+from markov import piece_chain, piece_index, race, solo
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return tmp_path / "cache"
+
+
+def play_race(seats, rng):
+    """Rolls until one of ``seats`` brings its only piece home in the engine."""
+    state = engine.new_game(seats[0])
+    for index in range(NUM_PIECES):
+        if index % PIECES_PER_PLAYER or index // PIECES_PER_PLAYER not in seats:
+            state.place(index, PATH_LEN)
+    rolls = 0
+    while not state.is_over:
+        if state.current_player in seats:
+            rolls += 1
+        engine.roll(state, rng.randrange)
+        moves = engine.legal_moves(state)
+        engine.apply_move(state, moves[0] if moves else None)
+    return state.winner, rolls
+
+
+class TestSolo:
+    """Test suite for one piece travelling alone."""
+
+    def test_last_square_by_hand(self, cache):
+        """Test the expectation from progress 55 matches the hand-solved system."""
+        # x0 = 1 + 4/6 x0 + 1/6 x1, x1 = 1 + 4/6 x0 + 1/6 x2, x2 = 1 + 4/5 x0
+        x0 = (1 + Fraction(1, 6) + Fraction(1, 36)) / (
+            1 - Fraction(4, 6) - Fraction(4, 36) - Fraction(4, 180)
+        )
+        assert solo(cache).expected_rolls[PATH_LEN + 1] == pytest.approx(float(x0), rel=1e-12)
+
+    def test_distribution_matches_expectation(self, cache):
+        """Test the distribution sums to one and its mean is the expected rolls."""
+        result = solo(cache)
+        rolls = np.arange(1, len(result.distribution) + 1)
+        assert result.distribution.sum() == pytest.approx(1.0, abs=1e-12)
+        assert (rolls * result.distribution).sum() == pytest.approx(
+            result.expected_rolls[0], rel=1e-12
+        )
+
+    def test_matches_engine(self, cache):
+        """Test the expectation agrees with pieces moved by the engine."""
+        rng = random.Random(5)
+        games = 2000
+        mean = sum(play_race((0,), rng)[1] for _ in range(games)) / games
+        assert mean == pytest.approx(solo(cache).expected_rolls[0], abs=0.8)
+
+    def test_expectation_falls_along_the_path(self, cache):
+        """Test getting out of base costs about six rolls and pieces ahead need fewer."""
+        expected = solo(cache).expected_rolls
+        assert expected[0] - expected[1] == pytest.approx(6.0, abs=0.1)
+        assert expected[1] > expected[PATH_LEN // 2] > expected[PATH_LEN - 5]
+
+
+class TestRace:
+    """Test suite for the two-seat race."""
+
+    def test_probabilities(self, cache):
+        """Test the wins add up to one and the first to roll is ahead."""
+        result = race((0, 2), cache)
+        assert result.win_probability.sum() == pytest.approx(1.0, abs=1e-12)
+        assert result.win_probability[0] > 0.5
+        assert result.distribution.sum(axis=0) == pytest.approx(result.win_probability)
+        rolls = np.arange(1, len(result.distribution) + 1)
+        assert (rolls * result.distribution.sum(axis=1)).sum() == pytest.approx(
+            result.expected_rolls, rel=1e-9
+        )
+
+    def test_matches_engine(self, cache):
+        """Test the win share and length agree with races played by the engine."""
+        rng = random.Random(11)
+        games = 1500
+        results = [play_race((0, 2), rng) for _ in range(games)]
+        result = race((0, 2), cache)
+        wins = sum(1 for winner, _ in results if winner == 0) / games
+        assert wins == pytest.approx(result.win_probability[0], abs=0.04)
+        mean = sum(rolls for _, rolls in results) / games
+        assert mean == pytest.approx(result.expected_rolls, abs=1.5)
+
+    def test_captures_change_the_race(self):
+        """Test seats that share squares capture each other in the chain."""
+        chain = markov.race_chain((0, 1))
+        # Seat 0 one square behind a square of seat 1 captures it with a one
+        for a in range(PATH_LEN - 1):
+            for b in range(PATH_LEN):
+                if engine.CELLS[0][a + 1] == engine.CELLS[1][b]:
+                    state = markov.race_index(a, b, 0, 0)
+                    target = markov.race_index(a + 1, BASE, 1, 0)
+                    hit = (chain.rows == state) & (chain.cols == target)
+                    assert chain.probs[hit].sum() == pytest.approx(1 / 6)
+                    return
+        pytest.fail("no shared square found")
+
+    def test_bad_seats(self, cache):
+        """Test a race needs two different seats."""
+        with pytest.raises(ValueError):
+            race((1, 1), cache)
+
+
+class TestSolvers:
+    """Test suite for the solvers and the cache."""
+
+    def test_fallbacks_agree(self, monkeypatch):
+        """Test dense and iterative NumPy solves give the same expectations."""
+        chain = piece_chain()
+        dense = chain.expected_rolls()
+        monkeypatch.setattr(markov, "DENSE_LIMIT", 0)
+        iterative = chain.expected_rolls()
+        start = piece_index(BASE, 0)
+        assert iterative[start] == pytest.approx(dense[start], rel=1e-12)
+
+    def test_results_are_cached(self, cache, monkeypatch):
+        """Test a second run loads the file instead of building the chain."""
+        first = solo(cache)
+        assert len(list(cache.glob("markov-solo-*.npz"))) == 1
+
+        def fail():
+            raise AssertionError("the chain was rebuilt")
+
+        monkeypatch.setattr(markov, "piece_chain", fail)
+        second = solo(cache)
+        assert np.array_equal(first.expected_rolls, second.expected_rolls)
+
+    def test_headless(self):
+        """Test the solver loads without the board drawing or turtle."""
+        code = (
+            "import sys, markov\n"
+            "sys.exit('board_image' in sys.modules or 'turtle' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT)
+        assert result.returncode == 0
+
+    def test_cache_key(self):
+        """Test the key depends on the parameters."""
+        assert markov.cache_key("race", (0, 2)) != markov.cache_key("race", (0, 1))
+        assert markov.cache_key("race", (0, 2)) == markov.cache_key("race", (0, 2))
+
+    def test_main(self, cache, capsys):
+        """Test the command line prints expectations and win shares."""
+        assert markov.main(["piece", "--cache-dir", str(cache)]) == 0
+        assert markov.main(["race", "--seats", "0,2", "--cache-dir", str(cache)]) == 0
+        out = capsys.readouterr().out
+        assert "expected rolls from base" in out
+        assert "seat 2 wins" in out
@@ -0,0 +1,200 @@
+"""
+Unit tests for the Monte Carlo tree search bot.
+
+Tests cover random playouts, tree growth, subtree reuse between
+searches and the bot in-process and over a process pool.
+"""
+
+import os
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import engine
+import mcts
+import statecode
+from engine import BASE, MOVE, PATH_LEN, START
+from mcts import MCTSBot
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def rolled(progress, die, player=0):
+    state = engine.new_game(first_player=player)
+    for index, pos in enumerate(progress):
+        state.place(index, pos)
+    engine.apply_roll(state, die)
+    return state
+
+
+def opening():
+    progress = [BASE] * 16
+    progress[0:3] = [5, 20, START]
+    progress[4:6] = [3, 12]
+    return rolled(progress, 4)
+
+
+class TestPlayout:
+    """Test suite for playout."""
+
+    def test_finishes_the_game(self):
+        """Test a playout returns the winner of a finished game."""
+        state = engine.new_game()
+        winner = mcts.playout(state, random.Random(1))
+        assert state.is_over
+        assert winner == state.winner
+
+
+class TestGrow:
+    """Test suite for grow and find."""
+
+    def test_visits_add_up(self):
+        """Test every playout passes through the root and one root move."""
+        state = opening()
+        root = mcts.grow(mcts._decision_node(state), state, 200, random.Random(2))
+        assert root.visits == 200
+        assert sum(child.visits for child in root.children.values()) == 200
+        assert set(root.children) == set(engine.legal_moves(state))
+
+    def test_wins_sum_to_visits(self):
+        """Test every visit credits exactly one winner."""
+        state = opening()
+        root = mcts.grow(mcts._decision_node(state), state, 100, random.Random(3))
+        assert sum(root.wins) == root.visits
+
+    def test_find_reaches_later_position(self):
+        """Test a position reached after a move and a roll is found in the tree."""
+        state = opening()
+        root = mcts.grow(mcts._decision_node(state), state, 300, random.Random(4))
+        later = state.copy()
+        engine.apply_move(later, 0)
+        engine.apply_roll(later, 1)
+        node = mcts.find(root, statecode.encode(later))
+        assert node is not None
+        assert node.visits > 0
+
+
+class TestRootCounts:
+    """Test suite for root_counts and tree reuse."""
+
+    def test_reuses_subtree(self):
+        """Test the next search starts from the matching node of the last tree."""
+        bot_id = ("test", 1)
+        state = opening()
+        try:
+            mcts.root_counts(bot_id, 0, statecode.encode(state), 300, "a")
+            later = state.copy()
+            engine.apply_move(later, 0)
+            engine.apply_roll(later, 1)
+            code = statecode.encode(later)
+            kept = mcts.find(mcts._TREES[bot_id, 0], code).visits
+            assert kept > 0
+            counts = mcts.root_counts(bot_id, 0, code, 50, "b")
+            assert mcts._TREES[bot_id, 0].visits == kept + 50
+            assert sum(visits for visits, _ in counts.values()) == 50
+        finally:
+            mcts.forget(bot_id)
+        assert (bot_id, 0) not in mcts._TREES
+
+    def test_shares_in_one_process_keep_their_own_trees(self):
+        """Test two shares run in the same process count only their own playouts."""
+        bot_id = ("test", 2)
+        code = statecode.encode(opening())
+        try:
+            for search in range(3):
+                for share in (0, 1):
+                    counts = mcts.root_counts(bot_id, share, code, 40, f"{search}:{share}")
+                    assert sum(visits for visits, _ in counts.values()) == 40
+            assert mcts._TREES[bot_id, 0].visits == mcts._TREES[bot_id, 1].visits == 120
+        finally:
+            mcts.forget(bot_id)
+        assert not any(key[0] == bot_id for key in mcts._TREES)
+
+
+class TestMCTSBot:
+    """Test suite for MCTSBot."""
+
+    def test_needs_a_roll(self):
+        """Test the bot refuses to move before the die is rolled."""
+        with pytest.raises(ValueError):
+            MCTSBot(workers=1).choose(engine.new_game())
+
+    def test_forced_move_skips_search(self):
+        """Test a single legal move is played without playouts."""
+        progress = [BASE] * 16
+        progress[1] = 10
+        bot = MCTSBot(workers=1)
+        assert bot.choose(rolled(progress, 2)) == 1
+        assert bot.searches == 0
+
+    def test_finishes_the_game(self):
+        """Test the bot plays the winning move."""
+        progress = [BASE] * 16
+        progress[0:4] = [PATH_LEN, PATH_LEN, PATH_LEN - 4, 10]
+        with MCTSBot(playouts=200, workers=1) as bot:
+            assert bot.choose(rolled(progress, 4)) == 2
+
+    def test_counts_merge_across_workers(self):
+        """Test visit counts from a process pool add up to the playouts."""
+        state = opening()
+        with MCTSBot(playouts=120, workers=2) as bot:
+            piece = bot.choose(state)
+        assert piece in engine.legal_moves(state)
+        assert sum(visits for visits, _ in bot.counts.values()) == 120
+        assert state.phase == MOVE
+
+    def test_merged_totals_match_the_budget_every_search(self):
+        """Test reused trees never add earlier searches to the merged counts."""
+        rng = random.Random(6)
+        state = opening()
+        with MCTSBot(playouts=90, workers=3, seed=1) as bot:
+            while bot.searches < 3 and not state.is_over:
+                if state.phase != MOVE:
+                    engine.roll(state, rng.randrange)
+                    continue
+                moves = engine.legal_moves(state)
+                if len(moves) > 1:
+                    piece = bot.choose(state)
+                    assert sum(visits for visits, _ in bot.counts.values()) == 90
+                else:
+                    piece = moves[0] if moves else None
+                engine.apply_move(state, piece)
+        assert bot.searches == 3
+
+    def test_seeded_pool_is_repeatable(self):
+        """Test a seeded bot reusing trees gives the same counts every run."""
+
+        def searches():
+            rng = random.Random(2)
+            state = opening()
+            counts = []
+            with MCTSBot(playouts=60, workers=2, seed=4) as bot:
+                while bot.searches < 4 and not state.is_over:
+                    if state.phase != MOVE:
+                        engine.roll(state, rng.randrange)
+                        continue
+                    moves = engine.legal_moves(state)
+                    piece = bot.choose(state) if len(moves) > 1 else (moves or [None])[0]
+                    if bot.searches > len(counts):
+                        counts.append(bot.counts)
+                    engine.apply_move(state, piece)
+                # Each share has a process of its own to keep its tree in
+                pids = {pool.submit(os.getpid).result() for pool in bot._pools}
+                assert len(pids) == 2
+            return counts
+
+        assert searches() == searches()
+
+    def test_playouts_do_not_import_turtle(self):
+        """Test a search runs in a process that never loads turtle."""
+        code = (
+            "import sys, engine, mcts\n"
+            "state = engine.new_game()\n"
+            "engine.apply_roll(state, 6)\n"
+            "mcts.MCTSBot(playouts=20, workers=1).choose(state)\n"
+            "assert 'turtle' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True)
@@ -0,0 +1,87 @@
+"""
+Unit tests for the table-driven move generator.
+
+Tests cover the (progress, die) tables, their flags and agreement of
+legal_moves with the engine rules.
+"""
+
+import random
+
+import engine
+import movegen
+from engine import BASE, PATH_LEN, START
+from movegen import ENTERS_HOME, FINISHES, LEAVES_BASE, LEGAL
+from rng import SeededDiceRNG
+
+
+class TestMoveTable:
+    """Test suite for move_entry."""
+
+    def test_six_leaves_base(self):
+        """Test a six takes a base piece to its start spot."""
+        assert movegen.move_entry(BASE, 6) == (START, LEGAL | LEAVES_BASE)
+
+    def test_base_needs_a_six(self):
+        """Test other values leave a base piece where it is."""
+        for die in range(1, 6):
+            assert movegen.move_entry(BASE, die) == (BASE, 0)
+
+    def test_plain_step(self):
+        """Test an ordinary move adds the die to the progress."""
+        assert movegen.move_entry(START, 4) == (3, LEGAL)
+        assert movegen.move_entry(10, 6) == (16, LEGAL)
+
+    def test_overshoot_is_illegal(self):
+        """Test a piece cannot move past the centre."""
+        assert movegen.move_entry(PATH_LEN - 2, 3) == (PATH_LEN - 2, 0)
+        assert movegen.move_entry(PATH_LEN, 1) == (PATH_LEN, 0)
+
+    def test_exact_finish(self):
+        """Test landing exactly on the centre is flagged as finishing."""
+        dest, flags = movegen.move_entry(PATH_LEN - 3, 3)
+        assert dest == PATH_LEN
+        assert flags & FINISHES
+
+    def test_enters_home(self):
+        """Test crossing from the ring into the home column is flagged."""
+        assert movegen.move_entry(48, 4)[1] == LEGAL | ENTERS_HOME
+        assert movegen.move_entry(47, 3)[1] == LEGAL
+        assert not movegen.move_entry(52, 2)[1] & ENTERS_HOME
+
+
+class TestLegalMoves:
+    """Test suite for legal_moves and legal_mask."""
+
+    def test_uses_player_to_move(self):
+        """Test only the current player's pieces are listed."""
+        state = engine.new_game(first_player=1)
+        state.progress[5] = 20
+        state.die = 3
+        assert movegen.legal_moves(state) == [(1, 23, LEGAL)]
+        assert movegen.legal_mask(state) == 0b0010
+
+    def test_die_argument(self):
+        """Test a die value other than the rolled one can be asked about."""
+        state = engine.new_game()
+        assert movegen.legal_moves(state, 6) == [
+            (piece, START, LEGAL | LEAVES_BASE) for piece in range(4)
+        ]
+
+    def test_agrees_with_engine(self):
+        """Test the tables allow exactly the engine's moves along real games."""
+        choices = random.Random(3)
+        dice = SeededDiceRNG(3)
+        for _ in range(20):
+            state = engine.new_game()
+            while not state.is_over:
+                engine.roll(state, dice.randbelow)
+                moves = engine.legal_moves(state)
+                table = movegen.legal_moves(state)
+                assert [move[0] for move in table] == moves
+                for piece, dest, flags in table:
+                    trial = state.copy()
+                    engine.apply_move(trial, piece)
+                    index = state.current_player * 4 + piece
+                    assert trial.progress[index] == dest
+                    assert bool(flags & FINISHES) == (dest == PATH_LEN)
+                engine.apply_move(state, choices.choice(moves) if moves else None)
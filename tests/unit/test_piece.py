@@ -163,6 +163,8 @@ class TestPieceInitialization:
 @patch('piece.Turtle.pos')
 @patch('piece.Player.current_player', 0)
 @patch('piece.Dice.current_value', 3)
+@patch('piece.p', MagicMock())
+@patch('piece.action_writer', MagicMock())
 class TestPieceMovement:
     """Test suite for piece movement when active."""
     
@@ -390,3 +392,68 @@ class TestCheckOverlap:
         """Test that check_overlap function is defined."""
         from piece import check_overlap
         assert callable(check_overlap)
+
+
+@patch('piece.Turtle.__init__', return_value=None)
+@patch('piece.Turtle.shape')
+@patch('piece.Turtle.pensize')
+@patch('piece.Turtle.pencolor')
+@patch('piece.Turtle.speed')
+@patch('piece.Turtle.penup')
+@patch('piece.Turtle.fillcolor')
+@patch('piece.Turtle.goto')
+@patch('piece.Turtle.onclick')
+class TestBoardCells:
+    """Test suite for cell-based overlap detection."""
+    
+    def test_near_duplicate_squares_overlap(self, mock_onclick, mock_goto, 
+                                            mock_fillcolor, mock_penup, mock_speed, 
+                                            mock_pencolor, mock_pensize, mock_shape, 
+                                            mock_init, reset_class_variables):
+        """Test [-279,-7] and [-279,-8] count as the same square."""
+        from piece import Piece, check_overlap
+        from piece_path import path_1, path_2, inactive_pos_1, inactive_pos_2
+        from piece_path import active_pos_1, active_pos_2
+        from cells import track_cell
+        
+        mover = Piece(0, path_1, inactive_pos_1[0], active_pos_1[0])
+        other = Piece(1, path_2, inactive_pos_2[0], active_pos_2[0])
+        other.is_active = True
+        other.set_cell(track_cell(path_2[36]))  # [-279,-7]
+        mover.set_cell(track_cell(path_1[50]))  # [-279,-8]
+        
+        check_overlap(mover)
+        assert other.is_active == False
+        
+    def test_own_pieces_do_not_overlap(self, mock_onclick, mock_goto, 
+                                       mock_fillcolor, mock_penup, mock_speed, 
+                                       mock_pencolor, mock_pensize, mock_shape, 
+                                       mock_init, reset_class_variables):
+        """Test pieces of the same player can share a square."""
+        from piece import Piece, check_overlap
+        from piece_path import path_1, inactive_pos_1, active_pos_1
+        from cells import track_cell
+        
+        mover = Piece(0, path_1, inactive_pos_1[0], active_pos_1[0])
+        friend = Piece(0, path_1, inactive_pos_1[1], active_pos_1[1])
+        friend.is_active = True
+        friend.set_cell(track_cell(path_1[5]))
+        mover.set_cell(track_cell(path_1[5]))
+        
+        check_overlap(mover)
+        assert friend.is_active == True
+        
+    def test_set_inactive_frees_cell(self, mock_onclick, mock_goto, 
+                                     mock_fillcolor, mock_penup, mock_speed, 
+                                     mock_pencolor, mock_pensize, mock_shape, 
+                                     mock_init, reset_class_variables):
+        """Test a captured piece no longer occupies its square."""
+        from piece import Piece, board_cells
+        from piece_path import path_1, inactive_pos_1, active_pos_1
+        from cells import track_cell
+        
+        piece = Piece(0, path_1, inactive_pos_1[0], active_pos_1[0])
+        cell = track_cell(path_1[5])
+        piece.set_cell(cell)
+        piece.set_inactive()
+        assert piece not in board_cells.get(cell, set())
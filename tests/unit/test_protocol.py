@@ -0,0 +1,118 @@
+"""
+Unit tests for the network wire protocol.
+
+Tests cover encoding and decoding of every message type, frame sizes,
+rejection of malformed payloads and reassembly of split and merged
+frames.
+"""
+
+import pytest
+
+import engine
+import statecode
+from protocol import (
+    PASS,
+    Error,
+    FrameReader,
+    Join,
+    Move,
+    Moved,
+    Roll,
+    Rolled,
+    Seated,
+    Turn,
+    Watch,
+    captured_mask,
+    captured_pieces,
+    decode,
+    encode,
+    snapshot,
+)
+
+MESSAGES = [
+    Join(0),
+    Join(123456),
+    Roll(),
+    Move(3),
+    Seated(7, 2),
+    Rolled(1, 6),
+    Moved(2, 1, -2, -1, 0),
+    Moved(0, 3, 40, 46, 1 << 15 | 1 << 4),
+    Moved(1, PASS, 0, 0, 0),
+    Error(4),
+    Watch(99),
+    Turn(3, 6, 2, -2, -1, 0),
+    Turn(0, 4, 1, 52, 56, 0),
+    Turn(1, 5, 0, 49, 54, 0xFFFF),
+    Turn(2, 3, PASS, 0, 0, 0),
+]
+
+
+class TestMessages:
+    """Test suite for encode and decode."""
+
+    @pytest.mark.parametrize("message", MESSAGES)
+    def test_round_trip(self, message):
+        """Test every message decodes back to itself."""
+        frame = encode(message)
+        assert frame[0] == len(frame) - 1
+        assert decode(frame[1:]) == message
+
+    def test_snapshot_round_trip(self):
+        """Test a snapshot carries the whole state code."""
+        state = engine.new_game(2)
+        engine.apply_roll(state, 6)
+        engine.apply_move(state, 1)
+        message = snapshot(state)
+        assert decode(encode(message)[1:]) == message
+        assert statecode.decode(message.code) == state
+
+    def test_frames_are_small(self):
+        """Test the largest frame stays within 16 bytes."""
+        assert max(len(encode(message)) for message in MESSAGES) <= 8
+        assert len(encode(snapshot(engine.new_game()))) <= 16
+
+    @pytest.mark.parametrize("payload", [b"", b"\x7f", b"\x03", b"\x03\x01\x02", b"\x12\x00"])
+    def test_malformed_payload(self, payload):
+        """Test unknown types and wrong lengths raise ValueError."""
+        with pytest.raises(ValueError):
+            decode(payload)
+
+    def test_turn_is_seven_bytes(self):
+        """Test a spectator delta packs into a five-byte payload."""
+        frame = encode(Turn(1, 5, 3, 20, 25, 1 << 8))
+        assert len(frame) == 7
+
+    def test_captured_mask(self):
+        """Test capture lists survive the bit mask."""
+        assert captured_pieces(captured_mask([0, 5, 15])) == [0, 5, 15]
+        assert captured_mask([]) == 0
+
+
+class TestFrameReader:
+    """Test suite for FrameReader."""
+
+    def test_split_frames(self):
+        """Test a frame cut at every byte is reassembled."""
+        stream = encode(Moved(0, 3, 40, 46, 16)) + encode(Rolled(1, 2))
+        reader = FrameReader()
+        payloads = []
+        for byte in stream:
+            payloads += reader.feed(bytes((byte,)))
+        assert [decode(payload) for payload in payloads] == [
+            Moved(0, 3, 40, 46, 16),
+            Rolled(1, 2),
+        ]
+
+    def test_merged_frames(self):
+        """Test several frames in one chunk are all returned in order."""
+        reader = FrameReader()
+        payloads = reader.feed(b"".join(encode(message) for message in MESSAGES))
+        assert [decode(payload) for payload in payloads] == MESSAGES
+
+    def test_partial_frame_kept(self):
+        """Test an incomplete frame waits for the rest of its bytes."""
+        reader = FrameReader()
+        frame = encode(Seated(9, 1))
+        assert reader.feed(frame[:3]) == []
+        assert [decode(payload) for payload in reader.feed(frame[3:])] == [Seated(9, 1)]
@@ -0,0 +1,106 @@
+"""
+Unit tests for the frame batching layer.
+
+Tests cover switching the tracer off, painting immediately after a quiet
+spell, merging bursts of requests into one capped frame and the
+module-level request_frame hook.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+import render
+from render import FrameBatcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def screen():
+    return MagicMock()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestFrameBatcher:
+    """Test suite for FrameBatcher."""
+
+    def test_turns_tracer_off(self, screen, clock):
+        """Test automatic screen updates are disabled."""
+        FrameBatcher(screen, clock=clock)
+        screen.tracer.assert_called_once_with(0)
+
+    def test_first_request_paints_immediately(self, screen, clock):
+        """Test a request after a quiet spell updates the screen right away."""
+        batcher = FrameBatcher(screen, clock=clock)
+        batcher.request()
+        screen.update.assert_called_once()
+        screen.ontimer.assert_not_called()
+
+    def test_burst_is_one_scheduled_frame(self, screen, clock):
+        """Test requests inside one frame interval share a single timer."""
+        batcher = FrameBatcher(screen, fps=50, clock=clock)
+        batcher.request()
+        clock.now += 0.005
+        for _ in range(10):
+            batcher.request()
+        assert screen.update.call_count == 1
+        screen.ontimer.assert_called_once_with(batcher.flush, 15)
+
+    def test_scheduled_frame_paints_and_rearms(self, screen, clock):
+        """Test the timer callback paints and later requests schedule again."""
+        batcher = FrameBatcher(screen, fps=50, clock=clock)
+        batcher.request()
+        batcher.request()
+        flush = screen.ontimer.call_args[0][0]
+        clock.now += 0.02
+        flush()
+        assert screen.update.call_count == 2
+        assert batcher.frames == 2
+        batcher.request()
+        assert screen.ontimer.call_count == 2
+
+    def test_request_after_interval_paints_immediately(self, screen, clock):
+        """Test no timer is used once a full frame interval has passed."""
+        batcher = FrameBatcher(screen, fps=60, clock=clock)
+        batcher.request()
+        clock.now += 0.02
+        batcher.request()
+        assert screen.update.call_count == 2
+        screen.ontimer.assert_not_called()
+
+    def test_batched_handler(self, screen, clock):
+        """Test a wrapped handler runs, then requests one frame."""
+        batcher = FrameBatcher(screen, clock=clock)
+        handler = MagicMock(return_value="done")
+        assert batcher.batched(handler)(1, 2) == "done"
+        handler.assert_called_once_with(1, 2)
+        screen.update.assert_called_once()
+
+
+class TestRequestFrame:
+    """Test suite for install and request_frame."""
+
+    def test_no_op_without_batcher(self):
+        """Test request_frame does nothing before install."""
+        render.uninstall()
+        render.request_frame()
+
+    def test_reports_to_installed_batcher(self, screen):
+        """Test request_frame paints through the installed batcher."""
+        try:
+            batcher = render.install(screen)
+            render.request_frame()
+            assert batcher.frames == 1
+        finally:
+            render.uninstall()
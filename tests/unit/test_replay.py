@@ -0,0 +1,170 @@
+"""
+Unit tests for game replays.
+
+Tests cover seeking to any turn, per-turn deltas, the snapshot file
+next to a log, seek speed and turtle playback with its speed control.
+"""
+
+import random
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+import engine
+import gamelog
+import replay
+from client import TurtleAdapter, follow
+from game import create_game
+from protocol import PASS, Turn
+from replay import Playback, Replay
+from table import Table
+
+
+def logged_game(seed, min_turns=0, game=0):
+    """(log bytes, final state, turns) of the first long enough random game."""
+    while True:
+        log = gamelog.GameLog(game=game)
+        rng = random.Random(seed)
+        state = engine.new_game()
+        turns = 0
+        while not state.is_over:
+            gamelog.apply_roll(state, rng.randrange(engine.ROLL_FACES[state.six_streak]) + 1, log)
+            moves = engine.legal_moves(state)
+            gamelog.apply_move(state, rng.choice(moves) if moves else None, log)
+            turns += 1
+        if turns >= min_turns:
+            return bytes(log.records), state, turns
+        seed += 1
+
+
+@pytest.fixture(scope="module")
+def long_game():
+    return logged_game(0, min_turns=500)
+
+
+class TestSeek:
+    """Test suite for Replay seeking."""
+
+    def test_every_turn(self, long_game):
+        """Test seeking gives the same state as playing through."""
+        data, final, turns = long_game
+        game = Replay.from_log(data, every=16)
+        assert game.turns == turns
+        assert game.state_at(0) == engine.new_game()
+        for turn, state in enumerate(game.states(), 1):
+            assert game.state_at(turn) == state
+        assert game.state_at(turns) == final
+
+    def test_out_of_range(self, long_game):
+        """Test turns outside the game raise IndexError."""
+        game = Replay.from_log(long_game[0])
+        with pytest.raises(IndexError):
+            game.state_at(game.turns + 1)
+
+    def test_under_a_millisecond(self, long_game):
+        """Test a seek into a 500-turn game takes well under 1 ms."""
+        game = Replay.from_log(long_game[0])
+        rng = random.Random(1)
+        targets = [rng.randrange(game.turns + 1) for _ in range(200)]
+        start = time.perf_counter()
+        for turn in targets:
+            game.state_at(turn)
+        assert (time.perf_counter() - start) / len(targets) < 1e-3
+
+    def test_game_in_multi_game_log(self):
+        """Test a later game of a log is replayed from its own records."""
+        first, _, _ = logged_game(1)
+        second, final, turns = logged_game(2, game=1)
+        game = Replay.from_log(first + second, game=1)
+        assert game.state_at(turns) == final
+        with pytest.raises(IndexError):
+            Replay.from_log(first, game=1)
+
+
+class TestTurn:
+    """Test suite for per-turn deltas."""
+
+    def test_turns_rebuild_game(self, long_game):
+        """Test following every turn delta reproduces the final state."""
+        data, final, turns = long_game
+        game = Replay.from_log(data)
+        state = engine.new_game()
+        for turn in range(turns):
+            state = follow(state, game.turn(turn))
+        assert state == final
+
+    def test_first_turn(self):
+        """Test an opening roll without a six is a pass."""
+        log = gamelog.GameLog()
+        state = engine.new_game()
+        gamelog.apply_roll(state, 3, log)
+        gamelog.apply_move(state, None, log)
+        assert Replay.from_log(bytes(log.records)).turn(0) == Turn(0, 3, PASS, 0, 0, 0)
+
+
+class TestSnapshotFile:
+    """Test suite for snapshots stored next to the log."""
+
+    def test_written_and_used(self, tmp_path, long_game):
+        """Test stored snapshots are loaded and give the same seeks."""
+        path = tmp_path / "games.log"
+        first, _, _ = logged_game(5, game=1)
+        path.write_bytes(first + long_game[0])
+        assert replay.write_snapshots(path, every=8) == 2
+        every, codes = replay.read_snapshots(path, 1)
+        assert every == 8
+        game = replay.load(path, 1)
+        assert game.snapshots == codes
+        assert game.state_at(long_game[2]) == long_game[1]
+
+    def test_missing_file(self, tmp_path, long_game):
+        """Test a log without a snapshot file is still replayed."""
+        path = tmp_path / "games.log"
+        path.write_bytes(long_game[0])
+        assert replay.read_snapshots(path, 0) is None
+        assert replay.load(path).state_at(long_game[2]) == long_game[1]
+
+
+class TestPlayback:
+    """Test suite for turtle playback."""
+
+    def playback(self, data, speed=1.0):
+        adapter = TurtleAdapter(create_game(table=Table()), None)
+        return Playback(Replay.from_log(data), adapter, MagicMock(), speed)
+
+    def test_step_and_seek(self, headless_turtles, long_game):
+        """Test steps follow the game and a seek jumps straight to a turn."""
+        playback = self.playback(long_game[0])
+        for _ in range(10):
+            assert playback.step()
+        assert playback.adapter.state == playback.replay.state_at(10)
+        playback.seek(300)
+        assert playback.adapter.state == playback.replay.state_at(300)
+        playback.seek(playback.replay.turns)
+        assert not playback.step()
+
+    def test_speed_changes_the_interval(self, headless_turtles, long_game):
+        """Test a speed change sets the wait before the next turn while playing."""
+        playback = self.playback(long_game[0])
+        playback.play()
+        playback.screen.ontimer.assert_called_with(playback._tick, 1000)
+        playback.set_speed(20)
+        playback._tick()
+        playback.screen.ontimer.assert_called_with(playback._tick, 50)
+        playback.set_speed(playback.speed / 40)
+        playback._tick()
+        playback.screen.ontimer.assert_called_with(playback._tick, 2000)
+        assert playback.position == 3
+        with pytest.raises(ValueError):
+            playback.set_speed(0)
+
+    def test_play_schedules_next_turn(self, headless_turtles, long_game):
+        """Test playing shows a turn and schedules the next by the speed."""
+        playback = self.playback(long_game[0], speed=4)
+        playback.play()
+        assert playback.position == 1
+        playback.screen.ontimer.assert_called_once_with(playback._tick, 250)
+        playback.pause()
+        playback._tick()
+        assert playback.position == 1
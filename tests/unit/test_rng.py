@@ -0,0 +1,93 @@
+"""
+Unit tests for the dice random sources.
+
+Tests cover value ranges, uniformity, seeding, independent streams and
+bulk buffering.
+"""
+
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+
+from rng import BLOCK_SIZE, CryptoDiceRNG, SeededDiceRNG
+
+
+class TestRandbelow:
+    """Test suite shared by both generators."""
+
+    @pytest.mark.parametrize("make", [CryptoDiceRNG, lambda: SeededDiceRNG(3)])
+    def test_values_in_range(self, make):
+        """Test randbelow(6) only returns 0-5."""
+        rng = make()
+        assert {rng.randbelow(6) for _ in range(2000)} == set(range(6))
+
+    @pytest.mark.parametrize("make", [CryptoDiceRNG, lambda: SeededDiceRNG(3)])
+    def test_roll_is_one_to_six(self, make):
+        """Test roll() returns die faces."""
+        rng = make()
+        assert {rng.roll() for _ in range(2000)} == {1, 2, 3, 4, 5, 6}
+
+    def test_roughly_uniform(self):
+        """Test each face shows up about a sixth of the time."""
+        rng = SeededDiceRNG(11)
+        counts = Counter(rng.randbelow(6) for _ in range(60000))
+        assert all(9400 < count < 10600 for count in counts.values())
+
+    def test_other_ranges(self):
+        """Test values below other bounds, such as 5 after two sixes."""
+        rng = SeededDiceRNG(5)
+        assert {rng.randbelow(5) for _ in range(1000)} == set(range(5))
+
+    @pytest.mark.parametrize("n", [0, 257])
+    def test_invalid_bound(self, n):
+        """Test bounds outside 1-256 are rejected."""
+        with pytest.raises(ValueError):
+            SeededDiceRNG().randbelow(n)
+
+
+class TestCryptoDiceRNG:
+    """Test suite for the buffered CSPRNG."""
+
+    def test_reads_random_bytes_in_blocks(self):
+        """Test one os.urandom call serves thousands of rolls."""
+        with patch("rng.os.urandom", wraps=__import__("os").urandom) as urandom:
+            rng = CryptoDiceRNG()
+            for _ in range(3000):
+                rng.randbelow(6)
+        assert urandom.call_count == 1
+        urandom.assert_called_with(BLOCK_SIZE)
+
+
+class TestSeededDiceRNG:
+    """Test suite for the reproducible counter-based generator."""
+
+    def test_same_seed_same_rolls(self):
+        """Test two generators with the same seed and stream agree."""
+        a, b = SeededDiceRNG(7, 1), SeededDiceRNG(7, 1)
+        assert [a.roll() for _ in range(500)] == [b.roll() for _ in range(500)]
+
+    def test_streams_differ(self):
+        """Test different streams under one seed give different rolls."""
+        a, b = SeededDiceRNG(7, 1), SeededDiceRNG(7, 2)
+        assert [a.roll() for _ in range(100)] != [b.roll() for _ in range(100)]
+
+    def test_seeds_differ(self):
+        """Test different seeds give different rolls."""
+        a, b = SeededDiceRNG(1), SeededDiceRNG(2)
+        assert [a.roll() for _ in range(100)] != [b.roll() for _ in range(100)]
+
+    def test_spawn_matches_fresh_stream(self):
+        """Test spawn() is the same as constructing the stream directly."""
+        spawned = SeededDiceRNG(9).spawn(4)
+        fresh = SeededDiceRNG(9, 4)
+        assert [spawned.roll() for _ in range(50)] == [fresh.roll() for _ in range(50)]
+
+    def test_counter_advances_per_block(self):
+        """Test the block counter only moves when a block is used up."""
+        rng = SeededDiceRNG(1, block_size=64)
+        rng.roll()
+        assert rng.counter == 1
+        for _ in range(200):
+            rng.roll()
+        assert rng.counter > 3
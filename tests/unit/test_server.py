@@ -0,0 +1,361 @@
+"""
+Unit tests for the asyncio game server.
+
+Tests cover seating, command checks and errors, full games played by
+clients on localhost, seats freed by disconnects and dropping clients
+that stop reading.
+"""
+
+import asyncio
+import random
+from unittest.mock import MagicMock
+
+import pytest
+
+import engine
+from client import GameClient, ProtocolError
+from protocol import (
+    BAD_FRAME,
+    GAME_FULL,
+    NOT_SEATED,
+    NOT_STARTED,
+    NOT_YOUR_TURN,
+    NO_GAME,
+    Error,
+    Moved,
+    Rolled,
+    Snapshot,
+    Turn,
+    encode,
+)
+from server import SNAPSHOT_EVERY, Connection, GameServer
+
+
+def run(test):
+    """Run ``test(server, host, port)`` against a fresh localhost server."""
+
+    async def main():
+        server = GameServer(seed=7)
+        await server.start("127.0.0.1", 0)
+        try:
+            return await asyncio.wait_for(test(server, *server.address), 30)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+async def table(host, port, game=0):
+    """Four clients seated at one table, after the start snapshot."""
+    clients = []
+    for _ in range(4):
+        client = await GameClient.connect(host, port)
+        await client.join(game)
+        clients.append(client)
+    # The last seat's snapshot is the start broadcast; the others get
+    # their own on joining, then the broadcast.
+    for client in clients:
+        await until(client, Snapshot)
+    for client in clients[:-1]:
+        await until(client, Snapshot)
+    return clients
+
+
+async def until(client, kind, player=None):
+    """Next ``kind`` message, from ``player`` if given."""
+    while True:
+        message = await client.receive()
+        if type(message) is kind and (player is None or message.player == player):
+            return message
+
+
+async def play(client, rng):
+    """Play random legal moves for the client's seat until the game ends."""
+    while not client.state.is_over:
+        if client.my_turn and client.state.phase == engine.ROLL:
+            client.roll()
+        message = await client.receive()
+        if type(message) is Rolled and message.player == client.seat:
+            moves = engine.legal_moves(client.state)
+            if moves:
+                client.move(rng.choice(moves))
+
+
+class TestSeating:
+    """Test suite for joining tables."""
+
+    def test_four_seats_per_table(self):
+        """Test the first four clients share a table and the fifth opens another."""
+
+        async def test(server, host, port):
+            clients = [await GameClient.connect(host, port) for _ in range(5)]
+            seats = [await client.join() for client in clients]
+            assert seats == [0, 1, 2, 3, 0]
+            assert clients[0].game == clients[3].game != clients[4].game
+            assert len(server.games) == 2
+
+        run(test)
+
+    def test_table_by_number(self):
+        """Test joining a numbered table and being refused once it is full."""
+
+        async def test(server, host, port):
+            seated = await table(host, port, game=42)
+            late = await GameClient.connect(host, port)
+            try:
+                await late.join(42)
+            except ProtocolError as error:
+                return error.code, len(seated)
+
+        assert run(test) == (GAME_FULL, 4)
+
+    def test_snapshot_when_full(self):
+        """Test every seat gets the opening state when the table fills."""
+
+        async def test(server, host, port):
+            clients = await table(host, port)
+            return [client.state for client in clients]
+
+        states = run(test)
+        assert all(state == engine.new_game() for state in states)
+
+
+class TestCommands:
+    """Test suite for command checks."""
+
+    def test_errors(self):
+        """Test commands out of turn, before the start or unseated are refused."""
+
+        async def test(server, host, port):
+            loner = await GameClient.connect(host, port)
+            loner.roll()
+            codes = [(await until(loner, Error)).code]
+            await loner.join()
+            loner.roll()
+            codes.append((await until(loner, Error)).code)
+            others = [await GameClient.connect(host, port) for _ in range(3)]
+            for other in others:
+                await other.join()
+            others[0].roll()
+            codes.append((await until(others[0], Error)).code)
+            loner.writer.write(b"\x01\x7f")
+            codes.append((await until(loner, Error)).code)
+            return codes
+
+        assert run(test) == [NOT_SEATED, NOT_STARTED, NOT_YOUR_TURN, BAD_FRAME]
+
+    def test_roll_is_broadcast(self):
+        """Test a roll reaches every seat with the same die."""
+
+        async def test(server, host, port):
+            clients = await table(host, port)
+            clients[0].roll()
+            return [await until(client, Rolled) for client in clients]
+
+        rolls = run(test)
+        assert len(set(rolls)) == 1
+        assert rolls[0].player == 0
+
+    def test_full_game(self):
+        """Test four clients play to a winner and agree with the server."""
+
+        async def test(server, host, port):
+            clients = await table(host, port)
+            await asyncio.gather(
+                *(play(client, random.Random(seat)) for seat, client in enumerate(clients))
+            )
+            state = server.games[clients[0].game].state
+            return state, [client.state for client in clients]
+
+        state, mirrors = run(test)
+        assert state.is_over
+        assert all(mirror == state for mirror in mirrors)
+
+    def test_move_delta(self):
+        """Test a move is reported with its progress before and after."""
+
+        async def test(server, host, port):
+            clients = await table(host, port)
+            state = server.games[clients[0].game].state
+            while True:
+                current = clients[state.current_player]
+                current.roll()
+                rolled = await until(current, Rolled, current.seat)
+                if rolled.die == 6:
+                    break
+            piece = state.player_progress(rolled.player).index(engine.BASE)
+            current.move(piece)
+            return rolled.player, piece, await until(current, Moved)
+
+        player, piece, moved = run(test)
+        assert (moved.player, moved.piece) == (player, piece)
+        assert (moved.start, moved.end, moved.captured) == (engine.BASE, engine.START, 0)
+
+
+class TestConnections:
+    """Test suite for disconnects and slow clients."""
+
+    def test_disconnect_frees_seat(self):
+        """Test a seat left by a disconnected client can be taken over."""
+
+        async def test(server, host, port):
+            clients = await table(host, port)
+            game = clients[2].game
+            await clients[2].close()
+            while server.games[game].seats[2] is not None:
+                await asyncio.sleep(0.01)
+            newcomer = await GameClient.connect(host, port)
+            return await newcomer.join(game)
+
+        assert run(test) == 2
+
+    def test_empty_table_removed(self):
+        """Test a table is dropped when everyone has left."""
+
+        async def test(server, host, port):
+            client = await GameClient.connect(host, port)
+            await client.join(5)
+            await client.close()
+            while server.games:
+                await asyncio.sleep(0.01)
+
+        run(test)
+
+    def test_table_ids_not_reused(self):
+        """Test a released table's id goes to no later table, by number or not."""
+
+        async def test(server, host, port):
+            first = await GameClient.connect(host, port)
+            await first.join()
+            await first.close()
+            while server.games:
+                await asyncio.sleep(0.01)
+            second = await GameClient.connect(host, port)
+            await second.join()
+            late = await GameClient.connect(host, port)
+            with pytest.raises(ProtocolError) as refused:
+                await late.join(first.game)
+            await late.join(second.game + 1)
+            latest = await GameClient.connect(host, port)
+            await latest.join()
+            return first.game, second.game, late.game, latest.game, refused.value.code
+
+        assert run(test) == (1, 2, 3, 2, NO_GAME)
+
+    def test_stuck_client_dropped(self):
+        """Test a client with too much unsent data is aborted, not buffered."""
+        conn = Connection(GameServer(max_buffer=100))
+        conn.transport = MagicMock()
+        conn.transport.is_closing.return_value = False
+        conn.transport.get_write_buffer_size.return_value = 50
+        conn.send(b"frame")
+        conn.transport.write.assert_called_once_with(b"frame")
+        conn.transport.get_write_buffer_size.return_value = 101
+        conn.send(b"frame")
+        conn.transport.abort.assert_called_once()
+        assert conn.transport.write.call_count == 1
+
+
+async def watcher(host, port, game):
+    client = await GameClient.connect(host, port)
+    client.watch(game)
+    await until(client, Snapshot)
+    return client
+
+
+def fake_watcher(server):
+    conn = Connection(server)
+    conn.transport = MagicMock()
+    conn.transport.is_closing.return_value = False
+    conn.transport.get_write_buffer_size.return_value = 0
+    return conn
+
+
+class TestSpectators:
+    """Test suite for watching tables."""
+
+    def test_watchers_follow_game(self):
+        """Test spectators rebuild every turn of a full game from deltas."""
+
+        async def test(server, host, port):
+            clients = await table(host, port)
+            game = clients[0].game
+            watchers = [await watcher(host, port, game) for _ in range(3)]
+            await asyncio.gather(
+                *(play(client, random.Random(seat)) for seat, client in enumerate(clients))
+            )
+            state = server.games[game].state
+            for spectator in watchers:
+                while spectator.state != state:
+                    assert type(await spectator.receive()) is Turn
+            return [spectator.state for spectator in watchers], state
+
+        mirrors, state = run(test)
+        assert state.is_over
+        assert all(mirror == state for mirror in mirrors)
+
+    def test_late_joiner_catches_up(self):
+        """Test a spectator joining mid-game gets the current state."""
+
+        async def test(server, host, port):
+            clients = await table(host, port)
+            game = server.games[clients[0].game]
+            turns = 0
+            while turns < SNAPSHOT_EVERY + 10:
+                current = clients[game.state.current_player]
+                if game.state.phase == engine.ROLL:
+                    current.roll()
+                    await until(current, Rolled, current.seat)
+                    moves = engine.legal_moves(current.state)
+                    if moves:
+                        current.move(moves[0])
+                    await until(current, Moved, current.seat)
+                    turns += 1
+            late = await GameClient.connect(host, port)
+            late.watch(game.id)
+            while late.state != game.state:
+                await late.receive()
+            return len(game.backlog) // len(encode(Turn(0, 1, 0, 0, 1, 0)))
+
+        assert run(test) == 10
+
+    def test_turn_encoded_once(self):
+        """Test every watcher is sent the very same bytes object."""
+        server = GameServer(seed=1)
+        game = server.game(1)
+        watchers = [fake_watcher(server) for _ in range(50)]
+        game.watchers.update(watchers)
+        game.seats = [fake_watcher(server) for _ in range(4)]
+        engine.apply_roll(game.state, 6)
+        server._apply(game, 0)
+        frames = [conn.transport.write.call_args[0][0] for conn in watchers]
+        assert all(frame is frames[0] for frame in frames)
+        assert len(frames[0]) == 7
+        assert game.backlog == frames[0]
+
+    def test_unknown_table(self):
+        """Test watching a table that does not exist is refused."""
+
+        async def test(server, host, port):
+            client = await GameClient.connect(host, port)
+            client.watch(77)
+            return (await until(client, Error)).code
+
+        assert run(test) == NO_GAME
+
+    def test_watched_table_kept(self):
+        """Test a table stays while it has spectators and goes after."""
+
+        async def test(server, host, port):
+            player = await GameClient.connect(host, port)
+            await player.join(8)
+            spectator = await watcher(host, port, 8)
+            await player.close()
+            await asyncio.sleep(0.05)
+            kept = 8 in server.games
+            await spectator.close()
+            while 8 in server.games:
+                await asyncio.sleep(0.01)
+            return kept
+
+        assert run(test)
@@ -0,0 +1,146 @@
+"""
+Unit tests for the headless tournament runner.
+
+Tests cover the move policies, tallies, seed sharding and the command
+line entry point.
+"""
+
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import engine
+import simulate
+from simulate import Tally
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+SEATS = ["random", "furthest", "capture", "first"]
+
+
+class TestPolicies:
+    """Test suite for the built-in move policies."""
+
+    def test_furthest_picks_most_advanced_piece(self):
+        """Test furthest_policy moves the piece closest to the centre."""
+        state = engine.new_game()
+        state.progress[0:4] = [3, 20, 7, engine.BASE]
+        engine.apply_roll(state, 2)
+        moves = engine.legal_moves(state)
+        assert simulate.furthest_policy(state, moves, None) == 1
+
+    def test_capture_prefers_capturing_move(self):
+        """Test capture_policy takes a capture when one is available."""
+        state = engine.new_game()
+        state.progress[0:2] = [10, 30]
+        state.progress[4] = 0  # path_2[0] is path_1[13]
+        engine.apply_roll(state, 3)
+        moves = engine.legal_moves(state)
+        assert simulate.capture_policy(state, moves, None) == 0
+
+    def test_policies_return_legal_moves(self):
+        """Test every policy only returns offered moves."""
+        rng = random.Random(3)
+        for name, policy in simulate.POLICIES.items():
+            state = engine.new_game()
+            state.progress[0:4] = [engine.BASE, 5, 40, 55]
+            engine.apply_roll(state, 1)
+            moves = engine.legal_moves(state)
+            assert policy(state, moves, rng) in moves, name
+
+
+class TestTally:
+    """Test suite for Tally."""
+
+    def test_add_game(self):
+        """Test a game updates wins, captures and lengths."""
+        tally = Tally()
+        tally.add_game(2, 300, [1, 0, 4, 0])
+        assert tally.wins == [0, 0, 1, 0]
+        assert tally.captures == [1, 0, 4, 0]
+        assert tally.shortest == tally.longest == 300
+
+    def test_merge_matches_single_tally(self):
+        """Test merging two tallies equals tallying all games at once."""
+        games = [(0, 100, [1, 0, 0, 0]), (3, 250, [0, 2, 0, 1]), (0, 80, [0, 0, 0, 0])]
+        whole, left, right = Tally(), Tally(), Tally()
+        for game in games:
+            whole.add_game(*game)
+        left.add_game(*games[0])
+        for game in games[1:]:
+            right.add_game(*game)
+        assert left.merge(right) == whole
+
+    def test_merge_with_empty(self):
+        """Test merging an empty tally changes nothing."""
+        tally = Tally()
+        tally.add_game(1, 50, [0, 0, 0, 0])
+        assert tally.merge(Tally()).shortest == 50
+
+
+class TestSimulate:
+    """Test suite for simulate() and the shard runner."""
+
+    def test_every_game_has_a_winner(self):
+        """Test all simulated games are played to the end."""
+        tally = simulate.simulate(SEATS, 20, workers=1, seed=5)
+        assert tally.games == 20
+        assert sum(tally.wins) == 20
+        assert tally.unfinished == 0
+
+    def test_same_seed_same_result(self):
+        """Test results depend only on the seed."""
+        first = simulate.simulate(SEATS, 12, workers=1, seed=9, shard_size=5)
+        second = simulate.simulate(SEATS, 12, workers=1, seed=9, shard_size=5)
+        assert first == second
+
+    def test_process_pool_matches_single_worker(self):
+        """Test sharding over processes gives the same totals as one worker."""
+        inline = simulate.simulate(SEATS, 12, workers=1, seed=1, shard_size=4)
+        pooled = simulate.simulate(SEATS, 12, workers=2, seed=1, shard_size=4)
+        assert pooled == inline
+
+    def test_shard_size_does_not_change_results(self):
+        """Test every game has its own streams, independent of sharding."""
+        small = simulate.simulate(SEATS, 10, workers=1, seed=4, shard_size=3)
+        large = simulate.simulate(SEATS, 10, workers=1, seed=4, shard_size=10)
+        assert small == large
+
+    def test_replay_game_is_deterministic(self):
+        """Test a single game can be replayed from its seed and number."""
+        assert simulate.replay_game(SEATS, 2, 17) == simulate.replay_game(SEATS, 2, 17)
+
+    def test_unknown_policy_rejected(self):
+        """Test an unknown policy name raises ValueError."""
+        with pytest.raises(ValueError):
+            simulate.simulate(["random", "random", "random", "nope"], 1, workers=1)
+
+    def test_wrong_seat_count_rejected(self):
+        """Test exactly four seats are required."""
+        with pytest.raises(ValueError):
+            simulate.simulate(["random"], 1, workers=1)
+
+
+class TestCommandLine:
+    """Test suite for python -m simulate."""
+
+    def test_main_prints_table(self, capsys):
+        """Test main() prints one row per seat."""
+        simulate.main(["--games", "4", "--workers", "1", "--seats", ",".join(SEATS)])
+        out = capsys.readouterr().out
+        assert "games: 4" in out
+        for name in SEATS:
+            assert name in out
+
+    def test_module_runs_without_turtle(self):
+        """Test python -m simulate never imports turtle."""
+        code = (
+            "import sys, simulate; simulate.main(['--games', '2', '--workers', '1']);"
+            "sys.exit('turtle' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True
+        )
+        assert result.returncode == 0
@@ -0,0 +1,101 @@
+"""
+Unit tests for the packed state codes and Zobrist hashes.
+
+Tests cover round trips through encode/decode, the two-word split,
+constant-time piece updates and incremental hash updates along real
+games.
+"""
+
+import random
+
+import engine
+import statecode
+from engine import BASE, PATH_LEN, START
+from rng import SeededDiceRNG
+
+
+def mid_game_state():
+    state = engine.new_game(first_player=2)
+    state.progress = [BASE, START, 0, PATH_LEN, 10, 20, 30, 40,
+                      55, BASE, BASE, 5, 49, 50, 51, 7]
+    state.six_streak = 2
+    state.die = 4
+    state.prev_die = 6
+    state.phase = engine.MOVE
+    return state
+
+
+class TestEncode:
+    """Test suite for encode and decode."""
+
+    def test_round_trip(self):
+        """Test decode(encode(state)) gives the state back."""
+        state = mid_game_state()
+        assert statecode.decode(statecode.encode(state)) == state
+
+    def test_round_trip_with_winner(self):
+        """Test the winner survives a round trip."""
+        state = mid_game_state()
+        state.winner = 3
+        assert statecode.decode(statecode.encode(state)).winner == 3
+
+    def test_fits_in_two_words(self):
+        """Test every code fits in 128 bits and survives split/join."""
+        state = mid_game_state()
+        code = statecode.encode(state)
+        assert code.bit_length() <= statecode.CODE_BITS <= 128
+        low, high = statecode.split(code)
+        assert low < 2**64 and high < 2**64
+        assert statecode.join(low, high) == code
+
+    def test_different_states_have_different_codes(self):
+        """Test changing one field changes the code."""
+        state = mid_game_state()
+        other = state.copy()
+        other.current_player = 3
+        assert statecode.encode(state) != statecode.encode(other)
+
+    def test_with_progress(self):
+        """Test with_progress matches re-encoding after a move."""
+        state = mid_game_state()
+        code = statecode.with_progress(statecode.encode(state), 4, 33)
+        state.progress[4] = 33
+        assert code == statecode.encode(state)
+        assert statecode.progress_of(code, 4) == 33
+
+
+class TestZobrist:
+    """Test suite for the Zobrist hash."""
+
+    def test_ignores_prev_die_and_winner(self):
+        """Test fields that do not affect play are left out of the hash."""
+        state = mid_game_state()
+        other = state.copy()
+        other.prev_die = 1
+        assert statecode.zobrist(state) == statecode.zobrist(other)
+
+    def test_side_to_move_changes_hash(self):
+        """Test the player to move is part of the hash."""
+        state = mid_game_state()
+        other = state.copy()
+        other.current_player = 0
+        assert statecode.zobrist(state) != statecode.zobrist(other)
+
+    def test_incremental_updates_match_full_hash(self):
+        """Test apply_roll/apply_move keep the hash equal to a full rehash."""
+        choices = random.Random(7)
+        dice = SeededDiceRNG(7)
+        captures = 0
+        for _ in range(20):
+            state = engine.new_game()
+            h = statecode.zobrist(state)
+            while not state.is_over:
+                value = dice.randbelow(engine.ROLL_FACES[state.six_streak]) + 1
+                h = statecode.apply_roll(state, value, h)
+                assert h == statecode.zobrist(state)
+                moves = engine.legal_moves(state)
+                piece = choices.choice(moves) if moves else None
+                captured, h = statecode.apply_move(state, piece, h)
+                captures += len(captured)
+                assert h == statecode.zobrist(state)
+        assert captures > 0
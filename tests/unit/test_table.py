@@ -0,0 +1,123 @@
+"""
+Unit tests for per-game tables.
+
+Tests cover games built on their own Table keeping separate turn, dice,
+piece and board state, the class-attribute fallback and the per-game
+memory footprint.
+"""
+
+from dice import Dice
+from engine import GameState
+from game import create_game
+from piece import CLASS_TABLE, Piece, check_overlap
+from player import Player
+from table import Table, footprint
+
+
+class FixedRNG:
+    def __init__(self, *values):
+        self.values = list(values)
+
+    def randbelow(self, n):
+        return self.values.pop(0) - 1
+
+
+class TestTable:
+    """Test suite for the Table state holder."""
+
+    def test_initial_state(self):
+        """Test a new table starts before the first player's turn."""
+        table = Table()
+        assert table.current_player == -1
+        assert table.allow_rolling and not table.allow_moving
+        assert table.piece_status[3] == {"available": 4, "active": 0}
+        assert table.board_cells == {}
+
+    def test_tables_share_nothing(self):
+        """Test mutable fields are not shared between tables."""
+        first, second = Table(), Table()
+        first.piece_status[0]["active"] = 2
+        first.board_cells[5] = {"piece"}
+        first.pieces[0].append("piece")
+        assert second.piece_status[0]["active"] == 0
+        assert second.board_cells == {}
+        assert second.pieces[0] == []
+
+
+class TestIsolatedGames:
+    """Test suite for games built on their own tables."""
+
+    def test_games_keep_their_own_state(self, headless_turtles):
+        """Test rolling and moving in one game leaves the other untouched."""
+        first, second = Table(rng=FixedRNG(6)), Table(rng=FixedRNG(3))
+        game_1 = create_game(table=first)
+        game_2 = create_game(table=second)
+        assert first.current_player == second.current_player == 0
+
+        game_1.dice.roll()
+        first.allow_moving = True
+        game_1.pieces[0][0].move()
+        assert first.current_value == 6
+        assert first.piece_status[0]["active"] == 1
+        assert second.current_value == 0
+        assert second.piece_status[0]["active"] == 0
+        assert not game_2.pieces[0][0].is_active
+
+    def test_captures_stay_on_their_board(self, headless_turtles):
+        """Test a piece only captures pieces of its own game."""
+        first, second = Table(), Table()
+        game_1 = create_game(table=first)
+        game_2 = create_game(table=second)
+        mover, victim = game_1.pieces[0][0], game_1.pieces[1][0]
+        other = game_2.pieces[1][0]
+        victim.is_active = other.is_active = True
+        victim.set_cell(5)
+        other.set_cell(5)
+        mover.set_cell(5)
+        check_overlap(mover)
+        assert not victim.is_active
+        assert other.is_active
+        assert second.board_cells[5] == {other}
+
+    def test_turn_change_is_per_game(self, headless_turtles):
+        """Test a player change in one game does not move the other."""
+        first, second = Table(), Table()
+        game_1 = create_game(table=first)
+        create_game(table=second)
+        game_1.player.handle_player_change()
+        assert first.current_player == 1
+        assert second.current_player == 0
+
+    def test_class_attributes_untouched(self, headless_turtles):
+        """Test table games leave the class-level state alone."""
+        before = (Player.current_player, Dice.current_value, Piece.allow_moving)
+        game = create_game(rng=FixedRNG(6), table=Table())
+        game.dice.roll()
+        game.table.allow_moving = True
+        assert (Player.current_player, Dice.current_value, Piece.allow_moving) == before
+
+
+class TestClassTable:
+    """Test suite for the class-attribute fallback."""
+
+    def test_reads_and_writes_class_attributes(self):
+        """Test the fallback table forwards to the class attributes."""
+        saved = Dice.current_value
+        try:
+            CLASS_TABLE.current_value = 4
+            assert Dice.current_value == 4
+        finally:
+            Dice.current_value = saved
+        assert CLASS_TABLE.piece_status is Piece.piece_status
+
+
+class TestFootprint:
+    """Test suite for the per-game memory measurement."""
+
+    def test_table_is_small(self):
+        """Test one game's front-end state stays within a few kilobytes."""
+        assert 0 < footprint(Table, 200) < 4096
+
+    def test_engine_state_is_smaller(self):
+        """Test the headless engine state costs less than a table."""
+        assert footprint(GameState, 200) < footprint(Table, 200)
@@ -0,0 +1,258 @@
+"""
+Unit tests for the endgame tablebase.
+
+Tests cover the multiset numbering, successors against the engine
+rules, win probabilities against games played by the engine, lookups
+from engine states, games played into the table, and resuming an
+interrupted generation.
+"""
+
+import random
+
+import pytest
+
+import engine
+import tablebase
+from engine import NUM_PIECES, NUM_PLAYERS, PATH_LEN, PIECES_PER_PLAYER
+from expectimax import ExpectimaxBot
+from tablebase import (
+    HOME_FIRST,
+    POSITIONS,
+    STREAKS,
+    WIN,
+    Layout,
+    Tablebase,
+    generate,
+    multisets,
+    rank,
+    successors,
+    unranked,
+)
+
+
+@pytest.fixture(scope="module")
+def table_path(tmp_path_factory):
+    """Tablebase of up to five unfinished pieces."""
+    path = tmp_path_factory.mktemp("tablebase") / "endgame.dtb"
+    generate(path, pieces=5, workers=1)
+    return path
+
+
+def endgame(seats, mover=0):
+    """Engine state with ``seats[s]`` the unfinished pieces of seat ``s``."""
+    state = engine.new_game(mover)
+    for index in range(NUM_PIECES):
+        state.place(index, PATH_LEN)
+    for seat, positions in enumerate(seats):
+        for slot, pos in enumerate(positions):
+            state.place(seat * PIECES_PER_PLAYER + slot, pos)
+    return state
+
+
+def config_of(layout, state):
+    """Config number of an engine state, or WIN once it is over."""
+    if state.is_over:
+        return WIN
+    seats = []
+    for turn in range(NUM_PLAYERS):
+        player = (state.current_player + turn) % NUM_PLAYERS
+        left = [pos - HOME_FIRST for pos in state.player_progress(player) if pos != PATH_LEN]
+        seats.append(tuple(sorted(left)))
+    return layout.config(seats)
+
+
+class TestNumbering:
+    """Test suite for multiset ranks and layers."""
+
+    @pytest.mark.parametrize("count", [1, 2, 3, 4])
+    def test_rank_round_trip(self, count):
+        """Test every multiset gets its own rank, in 0 .. multisets - 1."""
+        table = unranked(count)
+        assert len(table) == multisets(count)
+        assert all(rank(positions) == number for number, positions in enumerate(table))
+
+    def test_layers_fewest_pieces_first(self):
+        """Test layers are ordered by pieces left and every seat keeps a piece."""
+        assert tablebase.layers(5) == [
+            (1, 1, 1, 1), (1, 1, 1, 2), (1, 1, 2, 1), (1, 2, 1, 1), (2, 1, 1, 1)
+        ]
+        totals = [sum(layer) for layer in tablebase.layers(7)]
+        assert totals == sorted(totals)
+
+    def test_layout_size(self):
+        """Test the table holds every config for every streak."""
+        layout = Layout(5)
+        assert layout.records == (POSITIONS ** 4 + 4 * multisets(2) * POSITIONS ** 3) * STREAKS
+        assert layout.spans[5] == (POSITIONS ** 4, layout.configs)
+
+
+class TestSuccessors:
+    """Test suite for successors against the engine."""
+
+    @pytest.mark.parametrize("layer", [(2, 1, 1, 1), (1, 2, 1, 1), (3, 1, 2, 1)])
+    def test_match_engine(self, layer):
+        """Test every option leads to the config the engine reaches."""
+        layout = Layout(7)
+        rng = random.Random(sum(layer))
+        others = unranked(layer[1]), unranked(layer[2]), unranked(layer[3])
+        for own_rank in range(multisets(layer[0])):
+            targets = successors(7, layer, own_rank, own_rank + 1)
+            for _ in range(4):
+                row = rng.randrange(len(targets))
+                picks, number = [], row
+                for table in reversed(others):
+                    number, pick = divmod(number, len(table))
+                    picks.append(table[pick])
+                own = unranked(layer[0])[own_rank]
+                relative = [own] + picks[::-1]
+                mover = rng.randrange(NUM_PLAYERS)
+                seats = [None] * NUM_PLAYERS
+                for turn, positions in enumerate(relative):
+                    seats[(mover + turn) % NUM_PLAYERS] = [x + HOME_FIRST for x in positions]
+                for die in range(1, 7):
+                    state = endgame(seats, mover)
+                    engine.apply_roll(state, die)
+                    moves = engine.legal_moves(state)
+                    if not moves:
+                        after = state.copy()
+                        engine.apply_move(after, None)
+                        assert targets[row, die - 1, 0] == config_of(layout, after)
+                        continue
+                    for piece in moves:
+                        option = sorted(seats[mover]).index(seats[mover][piece])
+                        after = state.copy()
+                        engine.apply_move(after, piece)
+                        assert targets[row, die - 1, option] == config_of(layout, after)
+
+
+class TestTablebase:
+    """Test suite for generation and lookups."""
+
+    def test_matches_engine_games(self, table_path):
+        """Test one piece per seat gives the win shares of games played by the engine."""
+        seats = [[HOME_FIRST], [HOME_FIRST + 2], [HOME_FIRST], [PATH_LEN - 1]]
+        shares = Tablebase(table_path).win_probabilities(endgame(seats))
+        assert sum(shares) == pytest.approx(1.0, abs=4 / tablebase.SCALE)
+        rng = random.Random(3)
+        games = 3000
+        wins = [0] * NUM_PLAYERS
+        for _ in range(games):
+            state = endgame(seats)
+            while not state.is_over:
+                engine.roll(state, rng.randrange)
+                moves = engine.legal_moves(state)
+                engine.apply_move(state, moves[0] if moves else None)
+            wins[state.winner] += 1
+        for seat in range(NUM_PLAYERS):
+            assert wins[seat] / games == pytest.approx(shares[seat], abs=0.03)
+
+    def test_lookup_is_one_index(self, table_path):
+        """Test a position's record is read by a single array index."""
+        table = Tablebase(table_path)
+        state = endgame([[PATH_LEN - 1], [HOME_FIRST], [HOME_FIRST], [HOME_FIRST, HOME_FIRST]], 1)
+        index = table.index(state)
+        assert 0 <= index < len(table.records)
+        assert table.win_probability(state) == table.records[index]["win"][0] / tablebase.SCALE
+        # Seat 0 needs exactly a one and is the last to roll
+        assert table.win_probability(state) > table.win_probabilities(state)[0]
+
+    def test_best_move_is_legal(self, table_path):
+        """Test the table's move is legal in every rolled position it covers."""
+        table = Tablebase(table_path)
+        rng = random.Random(2)
+        home = range(HOME_FIRST, PATH_LEN)
+        for _ in range(300):
+            seats = [[rng.choice(home)] for _ in range(NUM_PLAYERS)]
+            seats[rng.randrange(NUM_PLAYERS)].append(rng.choice(home))
+            state = endgame(seats, rng.randrange(NUM_PLAYERS))
+            engine.apply_roll(state, rng.randrange(6) + 1)
+            piece = table.best_move(state)
+            moves = engine.legal_moves(state)
+            if moves:
+                assert piece in moves
+            else:
+                assert piece is None
+
+    def test_uncovered_positions(self, table_path):
+        """Test positions outside the table are looked up as None."""
+        table = Tablebase(table_path)
+        assert table.index(engine.new_game()) is None
+        assert table.index(endgame([[HOME_FIRST], [HOME_FIRST], [HOME_FIRST], [30]])) is None
+        six = [[HOME_FIRST, HOME_FIRST, HOME_FIRST]] + [[HOME_FIRST]] * 3
+        assert table.index(endgame(six)) is None
+        with pytest.raises(ValueError):
+            table.best_move(engine.new_game())
+
+    def test_reached_in_play_and_used_by_expectimax(self, table_path):
+        """Test games played from the ring reach the table and the bot plays its moves."""
+        table = Tablebase(table_path)
+
+        class Spy:
+            used = 0
+
+            def best_move(self, state):
+                piece = table.best_move(state)
+                Spy.used += piece is not None
+                return piece
+
+        bot = ExpectimaxBot(time_budget=None, max_depth=1, tablebase=Spy())
+        rng = random.Random(7)
+        covered = 0
+        for _ in range(20):
+            state = endgame([[44, 47], [45], [48], [49]])
+            while not state.is_over:
+                covered += table.index(state) is not None
+                engine.roll(state, rng.randrange)
+                moves = engine.legal_moves(state)
+                expected = table.best_move(state)
+                piece = bot.choose(state)
+                if len(moves) > 1 and expected is not None:
+                    assert piece == expected
+                    assert bot.depth == 0
+                engine.apply_move(state, piece)
+        assert covered > 0
+        assert Spy.used > 0
+
+    def test_resumes_unfinished_totals(self, tmp_path, monkeypatch):
+        """Test only totals without a done flag are solved again."""
+        complete = tmp_path / "complete.dtb"
+        generate(complete, pieces=4, workers=1)
+        path = tmp_path / "resumed.dtb"
+        path.write_bytes(complete.read_bytes())
+        with open(path, "r+b") as f:
+            f.seek(tablebase.HEADER.size)
+            f.write(b"\0")
+        generate(path, pieces=4, workers=1)
+        assert path.read_bytes() == complete.read_bytes()
+
+        def fail(*args):
+            raise AssertionError("a done total was solved again")
+
+        monkeypatch.setattr(tablebase, "solve_total", fail)
+        generate(path, pieces=4, workers=1)
+
+    def test_workers_write_the_same_table(self, tmp_path, monkeypatch):
+        """Test successors built in worker processes give the same table."""
+        monkeypatch.setattr(tablebase, "CHUNK_CONFIGS", 100)
+        generate(tmp_path / "serial.dtb", pieces=4, workers=1)
+        generate(tmp_path / "parallel.dtb", pieces=4, workers=2)
+        assert (tmp_path / "serial.dtb").read_bytes() == (tmp_path / "parallel.dtb").read_bytes()
+
+    def test_other_table_rejected(self, table_path, tmp_path):
+        """Test resuming into a file of another size or an impossible size raises ValueError."""
+        path = tmp_path / "other.dtb"
+        path.write_bytes(table_path.read_bytes())
+        with pytest.raises(ValueError):
+            generate(path, pieces=4)
+        with pytest.raises(ValueError):
+            generate(tmp_path / "x.dtb", pieces=3)
+
+    def test_main(self, table_path, capsys):
+        """Test the probe command prints every seat's chance and the moves."""
+        assert tablebase.main(
+            ["probe", str(table_path), "--seat0=52,54", "--seat1=51", "--seat2=53", "--seat3=55"]
+        ) == 0
+        out = capsys.readouterr().out
+        assert "seat 0 to roll" in out
+        assert "seat 3 wins with probability" in out
+        assert "die 2: move piece" in out
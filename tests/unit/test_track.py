@@ -0,0 +1,102 @@
+"""
+Unit tests for the compiled track tables.
+
+Tests cover the shared ring, start offsets, home columns, agreement with
+the hand-written paths in piece_path and rejection of malformed paths.
+"""
+
+from array import array
+
+import pytest
+
+import track
+from cells import CENTRE, NO_CELL, cell_of
+from piece_path import path_1, path_2, path_3, path_4
+from track import HOME_ENTRY, PATH_LEN, RING_LEN, RING_STEPS, TRACK
+
+PATHS = [path_1, path_2, path_3, path_4]
+
+
+class TestRing:
+    """Test suite for the shared ring."""
+
+    def test_ring_has_52_distinct_squares(self):
+        """Test the ring visits 52 different cells."""
+        assert len(TRACK.ring) == RING_LEN
+        assert len(set(TRACK.ring)) == RING_LEN
+
+    def test_starts_are_a_quarter_apart(self):
+        """Test each player enters the ring 13 squares after the previous one."""
+        assert list(TRACK.starts) == [0, 13, 26, 39]
+
+    def test_tables_are_compact_arrays(self):
+        """Test the tables are typed arrays rather than lists of coordinates."""
+        for table in (TRACK.ring, TRACK.starts, TRACK.homes, TRACK.cells):
+            assert isinstance(table, array)
+
+    def test_ring_index_wraps(self):
+        """Test the ring position of a piece is (start + progress) mod 52."""
+        assert TRACK.ring_index(3, 20) == (39 + 20) % RING_LEN
+        assert TRACK.ring_index(0, RING_STEPS - 1) == RING_STEPS - 1
+
+    def test_home_column_is_off_the_ring(self):
+        """Test ring_index is -1 in the home column and at the centre."""
+        assert TRACK.ring_index(0, HOME_ENTRY + 1) == -1
+        assert TRACK.ring_index(0, PATH_LEN) == -1
+
+
+class TestAgreementWithPaths:
+    """Test suite comparing compiled squares with piece_path."""
+
+    @pytest.mark.parametrize("player", [0, 2, 3])
+    def test_full_paths_match(self, player):
+        """Test every drawn square matches the compiled lookup."""
+        path = PATHS[player]
+        for pos in range(PATH_LEN + 1):
+            assert TRACK.cell(player, pos) == cell_of(path[pos])
+
+    def test_short_path_is_padded(self):
+        """Test path_2 gains the repeated last ring square it leaves out."""
+        for pos in range(RING_STEPS):
+            assert TRACK.cell(1, pos) == cell_of(path_2[pos])
+        assert TRACK.cell(1, HOME_ENTRY) == TRACK.cell(1, RING_STEPS - 1)
+        for pos in range(HOME_ENTRY + 1, PATH_LEN + 1):
+            assert TRACK.cell(1, pos) == cell_of(path_2[pos - 1])
+
+    def test_every_path_ends_at_centre(self):
+        """Test progress PATH_LEN is the centre for all players."""
+        for player in range(4):
+            assert TRACK.cell(player, PATH_LEN) == CENTRE
+
+    def test_path_has_room_for_every_step(self):
+        """Test Track.path gives PATH_LEN + 1 coordinates on the right squares."""
+        for player in range(4):
+            coords = TRACK.path(player)
+            assert len(coords) == PATH_LEN + 1
+            assert [cell_of(c) for c in coords] == [
+                TRACK.cell(player, pos) for pos in range(PATH_LEN + 1)
+            ]
+
+    def test_capture_cells_hide_centre(self):
+        """Test capture_cells maps the centre to NO_CELL."""
+        table = TRACK.capture_cells()
+        assert all(row[PATH_LEN] == NO_CELL for row in table)
+        assert table[2][5] == TRACK.cell(2, 5)
+
+
+class TestCompileErrors:
+    """Test suite for compile_track input checks."""
+
+    def test_path_off_the_ring(self):
+        """Test a path that leaves the ring early is rejected."""
+        broken = [list(path) for path in PATHS]
+        broken[2][10] = broken[2][11]
+        with pytest.raises(ValueError):
+            track.compile_track(broken)
+
+    def test_wrong_home_length(self):
+        """Test a home column of the wrong length is rejected."""
+        broken = [list(path) for path in PATHS]
+        del broken[3][52]
+        with pytest.raises(ValueError):
+            track.compile_track(broken)
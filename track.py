@@ -0,0 +1,141 @@
+"""
+Compiled track geometry.
+
+``piece_path`` stores one 57-entry coordinate list per player, each a
+rotation of the same outer ring followed by that player's home column.
+``compile_track`` turns them into one shared ring of board cells, a start
+offset per player and one home column per player, all as compact
+``array`` tables. A piece's progress is a plain integer and its square is
+a table lookup:
+
+    progress 0..49   ring[(start[player] + progress) % RING_LEN]
+    progress 50      the last ring square again (the drawn paths repeat it,
+                     e.g. [-279,-7] then [-279,-8])
+    progress 51..55  home[player][progress - 51]
+    progress 56      the centre
+
+``path_2`` leaves out the repeated square and is one entry short; the
+compiler fills it in the same way, so every player needs exactly
+``PATH_LEN`` steps.
+"""
+
+from array import array
+
+from cells import CENTRE, NO_CELL, cell_of, cell_position
+from piece_path import path_1, path_2, path_3, path_4
+
+PATH_LEN = 56
+RING_LEN = 52
+RING_STEPS = 50
+HOME_ENTRY = RING_STEPS
+HOME_LEN = PATH_LEN - HOME_ENTRY - 1
+
+
+class Track:
+    """Integer tables describing where every (player, progress) stands."""
+
+    def __init__(self, ring, starts, homes):
+        self.num_players = len(starts)
+        self.ring = array("h", ring)
+        self.starts = array("h", starts)
+        self.homes = array("h", [cell for home in homes for cell in home])
+        cells = array("h")
+        for player in range(self.num_players):
+            for pos in range(PATH_LEN + 1):
+                cells.append(self._square(player, pos))
+        # Flat (player * (PATH_LEN + 1) + progress) -> cell id
+        self.cells = cells
+        self.positions = array(
+            "h", [c for cell in cells for c in cell_position(cell)]
+        )
+
+    def _square(self, player, pos):
+        if pos < RING_STEPS:
+            return self.ring[(self.starts[player] + pos) % RING_LEN]
+        if pos == HOME_ENTRY:
+            return self.ring[(self.starts[player] + RING_STEPS - 1) % RING_LEN]
+        if pos < PATH_LEN:
+            return self.homes[player * HOME_LEN + pos - HOME_ENTRY - 1]
+        return CENTRE
+
+    def ring_index(self, player, pos):
+        """Index into ``ring`` of a piece at ``pos``, or -1 off the ring."""
+        if 0 <= pos < RING_STEPS:
+            return (self.starts[player] + pos) % RING_LEN
+        if pos == HOME_ENTRY:
+            return (self.starts[player] + RING_STEPS - 1) % RING_LEN
+        return -1
+
+    def cell(self, player, pos):
+        return self.cells[player * (PATH_LEN + 1) + pos]
+
+    def position(self, player, pos):
+        """Pixel coordinates of the square at ``pos`` on ``player``'s path."""
+        index = 2 * (player * (PATH_LEN + 1) + pos)
+        return (self.positions[index], self.positions[index + 1])
+
+    def path(self, player):
+        """Coordinate list in the format of ``piece_path``, for ``Piece``."""
+        return [list(self.position(player, pos)) for pos in range(PATH_LEN + 1)]
+
+    def capture_cells(self):
+        """Per-player tuples of cells for progress 0..PATH_LEN, NO_CELL at the centre."""
+        return tuple(
+            tuple(
+                NO_CELL if cell == CENTRE else cell
+                for cell in self.cells[
+                    player * (PATH_LEN + 1):(player + 1) * (PATH_LEN + 1)
+                ]
+            )
+            for player in range(self.num_players)
+        )
+
+
+def compile_track(paths):
+    """Build a ``Track`` from per-player coordinate lists.
+
+    The ring is walked from the first path; every other path must start
+    somewhere on it and follow it for ``RING_STEPS`` squares.
+    """
+    squares = [[cell_of(coord) for coord in path] for path in paths]
+    ring = _ring(squares)
+    starts = []
+    homes = []
+    for player, path in enumerate(squares):
+        if path[0] not in ring:
+            raise ValueError(f"path {player} does not start on the ring")
+        start = ring.index(path[0])
+        for pos in range(RING_STEPS):
+            if path[pos] != ring[(start + pos) % RING_LEN]:
+                raise ValueError(f"path {player} leaves the ring at step {pos}")
+        home = [cell for cell in path[RING_STEPS:] if cell != CENTRE]
+        if home and home[0] == path[RING_STEPS - 1]:
+            home = home[1:]
+        if len(home) != HOME_LEN:
+            raise ValueError(f"path {player} has {len(home)} home squares")
+        starts.append(start)
+        homes.append(home)
+    return Track(ring, starts, homes)
+
+
+def _ring(squares):
+    """The shared ring, starting at the first square of the first path."""
+    ring = list(squares[0][:RING_STEPS])
+    # The squares behind the first player's start are only walked by the
+    # others; take them from any path that passes them.
+    for path in squares[1:]:
+        start = path.index(ring[-1]) if ring[-1] in path[:RING_STEPS] else -1
+        if start < 0:
+            continue
+        for cell in path[start + 1:RING_STEPS]:
+            if cell == ring[0]:
+                break
+            ring.append(cell)
+        if len(ring) == RING_LEN:
+            break
+    if len(ring) != RING_LEN:
+        raise ValueError(f"ring has {len(ring)} squares, expected {RING_LEN}")
+    return ring
+
+
+TRACK = compile_track((path_1, path_2, path_3, path_4))